@@ -0,0 +1,164 @@
+"""
+Benchmarks the harness against the local stand-in application (vuln_app.py).
+
+For every scenario (a set of run_all_tests options) each test module is run on
+its own against a freshly reset app, then all modules run together. Reported:
+
+* wall time of each module run (browser startup included),
+* probes/sec: page loads and comment POSTs carrying a payload, counted by the
+  app, per second,
+* time to first finding in the all-modules run: from the start of the run to
+  the earliest Finding in the result stream (not to the first module that
+  finished with a finding).
+
+    python benchmark/run_benchmark.py --latency 20 --page-kb 100 --assets 10
+    python benchmark/run_benchmark.py --scenarios baseline hook fast-nav --json bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Cho phép import run_all_tests / xss_harness khi chạy trực tiếp file này
+_REPO_ROOT = str(Path(__file__).resolve().parent.parent)
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+from benchmark.vuln_app import VulnApp, start_server
+from run_all_tests import discover_test_scripts, run_selenium_tests
+from xss_harness.driver_pool import SUPPORTED_BROWSERS
+
+SCRIPTS_DIR = str(Path(_REPO_ROOT) / "selenium_tests")
+TARGET_PATH = "/?q=test&attr=test"
+
+# Tên kịch bản -> tham số cho run_selenium_tests
+SCENARIOS = {
+    "baseline": {},
+    "hook": {"alert_backend": "hook"},
+    "fast-nav": {"fast_navigation": True},
+    "eager": {"page_load_strategy": "eager"},
+    "prefilter": {"reflection_prefilter": True},
+    "context-filter": {"payload_context_filter": True},
+    "http-submit": {"submit_engine": "http"},
+    "shards-2": {"shards": 2},
+}
+
+
+@contextlib.contextmanager
+def quiet(enabled):
+    """Swallows the harness's console output while enabled."""
+    if not enabled:
+        yield
+        return
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def run_module(app, target_url, module_name, options, browser, use_headless, verbose):
+    """Runs one module against a reset app and returns its measurements."""
+    app.reset()
+    started = time.monotonic()
+    with quiet(not verbose):
+        results = run_selenium_tests(target_url, SCRIPTS_DIR, use_headless=use_headless, browser=browser,
+                                     only=[module_name], **options)
+    wall = time.monotonic() - started
+    stats = app.snapshot()
+    result = results.get(module_name, {"success": False, "message": "not run"})
+    return {"module": module_name, "wall": wall, "probes": stats["probes"],
+            "probes_per_sec": stats["probes"] / wall if wall else 0.0,
+            "found": result["success"], "bytes": stats["bytes_sent"], "assets": stats["assets"]}
+
+
+def finding_timestamps(results_jsonl):
+    """Timestamps of the findings in a results JSONL file."""
+    timestamps = []
+    with open(results_jsonl, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record.get("type") == "finding":
+                timestamps.append(record["timestamp"])
+    return timestamps
+
+
+def run_all_modules(app, target_url, module_names, options, browser, use_headless, verbose):
+    """Runs every module together (one worker per module) and measures time to first finding."""
+    app.reset()
+    fd, results_jsonl = tempfile.mkstemp(prefix="xss-bench-", suffix=".jsonl")
+    os.close(fd)
+    try:
+        # Finding.timestamp là time.time(): đo từ cùng đồng hồ
+        started_at = time.time()
+        started = time.monotonic()
+        with quiet(not verbose):
+            results = run_selenium_tests(target_url, SCRIPTS_DIR, use_headless=use_headless, browser=browser,
+                                         workers=len(module_names), results_jsonl=results_jsonl, **options)
+        wall = time.monotonic() - started
+        timestamps = finding_timestamps(results_jsonl)
+    finally:
+        os.remove(results_jsonl)
+    stats = app.snapshot()
+    return {"wall": wall, "probes": stats["probes"], "probes_per_sec": stats["probes"] / wall if wall else 0.0,
+            "time_to_first_finding": min(timestamps) - started_at if timestamps else None,
+            "found": sorted(name for name, result in results.items() if result["success"])}
+
+
+def print_report(report):
+    print(f"\n{'scenario':<16}{'module':<36}{'wall s':>8}{'probes':>8}{'probes/s':>10}{'KiB':>9}  found")
+    for scenario, data in report.items():
+        for row in data["modules"]:
+            print(f"{scenario:<16}{row['module']:<36}{row['wall']:>8.2f}{row['probes']:>8}"
+                  f"{row['probes_per_sec']:>10.2f}{row['bytes'] / 1024:>9.0f}  {'yes' if row['found'] else 'no'}")
+        combined = data["all_modules"]
+        ttff = combined["time_to_first_finding"]
+        print(f"{scenario:<16}{'(all modules)':<36}{combined['wall']:>8.2f}{combined['probes']:>8}"
+              f"{combined['probes_per_sec']:>10.2f}{'':>9}  first finding: "
+              f"{f'{ttff:.2f}s' if ttff is not None else 'none'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the XSS harness against a local vulnerable app.")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS), help="Runner option sets to benchmark (default: all)")
+    parser.add_argument("--modules", nargs="+", help="Test modules to benchmark (default: every module in selenium_tests)")
+    parser.add_argument("-b", "--browser", default="chrome", choices=list(SUPPORTED_BROWSERS), help="Browser to use (default: chrome)")
+    parser.add_argument("--no-headless", action="store_true", help="Disable headless mode")
+    parser.add_argument("--latency", type=float, default=0, help="App response delay in milliseconds (default: 0)")
+    parser.add_argument("--page-kb", type=int, default=0, help="Extra markup per page in KiB (default: 0)")
+    parser.add_argument("--assets", type=int, default=0, help="Images per page (default: 0)")
+    parser.add_argument("--json", help="Also write the measurements to this JSON file")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show the harness output")
+    args = parser.parse_args()
+    # Kết quả của các module đi qua logging; handler giữ sys.stdout lúc cấu hình nên quiet() không chặn được
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(message)s", stream=sys.stdout)
+
+    module_names = args.modules or [name for name, _ in discover_test_scripts(SCRIPTS_DIR)]
+    app = VulnApp(args.latency / 1000.0, args.page_kb, args.assets)
+    server = start_server(app)
+    target_url = f"http://127.0.0.1:{server.server_port}{TARGET_PATH}"
+    print(f"Benchmark app on {target_url}")
+
+    report = {}
+    try:
+        for scenario in args.scenarios:
+            options = SCENARIOS[scenario]
+            print(f"Scenario '{scenario}' {options or ''}...")
+            report[scenario] = {
+                "options": options,
+                "modules": [run_module(app, target_url, name, options, args.browser, not args.no_headless, args.verbose)
+                            for name in module_names],
+                "all_modules": run_all_modules(app, target_url, module_names, options, args.browser,
+                                               not args.no_headless, args.verbose),
+            }
+    finally:
+        server.shutdown()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"target": target_url, "latency_ms": args.latency, "page_kb": args.page_kb,
+                       "assets": args.assets, "scenarios": report}, f, indent=2)
+        print(f"\nMeasurements written to {args.json}")
@@ -0,0 +1,222 @@
+"""
+Stand-in vulnerable application for benchmarking the harness locally.
+
+One page (``/``) carries every sink the four test modules look for:
+
+* ``reflected`` - the ``q`` parameter is echoed raw into the page body
+* ``attribute`` - the ``attr`` parameter is echoed raw into a double-quoted
+  ``value`` attribute (mouseover injection)
+* ``stored``    - comments POSTed to ``/comment`` are rendered raw
+* ``href``      - the commenter's website is rendered raw as a link ``href``
+
+Each sink can be disabled (escaped) to measure the harness on a clean target.
+``--latency`` delays every response and ``--page-kb`` / ``--assets`` make the page
+heavier, so runner options such as --fast-navigation have something to save.
+
+    python benchmark/vuln_app.py --port 8000 --latency 50 --page-kb 200 --assets 20
+    python run_all_tests.py -u "http://127.0.0.1:8000/?q=test&attr=test"
+
+``GET /__stats`` returns request counters as JSON and ``POST /__reset`` clears
+them together with the stored comments. A page load or comment only counts as a
+probe when it carries a payload (PROBE_MARKERS); discovery loads, reloads and
+reflection canaries do not.
+"""
+import argparse
+import base64
+import html
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+SINKS = ("reflected", "attribute", "stored", "href")
+
+# PNG 1x1 trong suốt
+PIXEL_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+)
+STYLESHEET = b"body { font-family: sans-serif; } .comment { border-bottom: 1px solid #ccc; }"
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head><title>Benchmark blog</title><link rel="stylesheet" href="/asset/style.css"></head>
+<body>
+<h1>Benchmark blog</h1>
+<form method="GET" action="/">
+  <input type="text" name="attr" value="{attr}">
+  <button type="submit">Search</button>
+</form>
+<p>Search results for: {query}</p>
+{assets}
+<h2>Comments</h2>
+{comments}
+<form method="POST" action="/comment">
+  <input type="text" name="name" value="">
+  <input type="text" name="email" value="">
+  <input type="text" name="website" value="">
+  <textarea name="comment"></textarea>
+  <button type="submit">Post comment</button>
+</form>
+<div style="display:none">{padding}</div>
+</body>
+</html>
+"""
+
+# Mọi payload của các module gọi alert(...); canary và URL gốc thì không
+PROBE_MARKERS = ("alert(",)
+
+COMMENT_TEMPLATE = '<div class="comment"><p><a href="{website}">{name}</a> wrote:</p><p>{comment}</p></div>'
+
+
+def carries_payload(values):
+    """True if any of the (query or form) values contains a payload marker."""
+    return any(marker in value for value_list in values.values() for value in value_list for marker in PROBE_MARKERS)
+
+
+class VulnApp:
+    """State and configuration of one application instance (thread-safe)."""
+
+    def __init__(self, latency=0.0, page_kb=0, assets=0, disabled_sinks=()):
+        self.latency = latency
+        self.padding = "x" * (page_kb * 1024)
+        self.assets = assets
+        self.vulnerable = {sink: sink not in disabled_sinks for sink in SINKS}
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.comments = []
+            self.started = time.monotonic()
+            self.stats = {"page_loads": 0, "probe_loads": 0, "posts": 0, "probe_posts": 0, "assets": 0, "bytes_sent": 0}
+
+    def count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats["elapsed"] = time.monotonic() - self.started
+        stats["probes"] = stats["probe_loads"] + stats["probe_posts"]
+        return stats
+
+    def sink(self, name, value, quote=False):
+        return value if self.vulnerable[name] else html.escape(value, quote=quote)
+
+    def link_target(self, url):
+        """href sink: raw when vulnerable, otherwise only escaped http(s) URLs are kept."""
+        if self.vulnerable["href"]:
+            return url
+        return html.escape(url, quote=True) if url.lower().startswith(("http://", "https://")) else "#"
+
+    def render_page(self, query):
+        with self._lock:
+            comments = list(self.comments)
+        rendered_comments = "\n".join(
+            COMMENT_TEMPLATE.format(website=self.link_target(c.get("website", "")),
+                                    name=self.sink("stored", c.get("name", "")),
+                                    comment=self.sink("stored", c.get("comment", "")))
+            for c in comments
+        )
+        assets = "\n".join(f'<img src="/asset/{i}.png" alt="">' for i in range(self.assets))
+        return PAGE_TEMPLATE.format(
+            attr=self.sink("attribute", query.get("attr", [""])[0], quote=True),
+            query=self.sink("reflected", query.get("q", [""])[0]),
+            assets=assets,
+            comments=rendered_comments,
+            padding=self.padding,
+        )
+
+    def add_comment(self, fields):
+        with self._lock:
+            self.comments.append({key: values[0] for key, values in fields.items()})
+
+
+def make_handler(app):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, status, body, content_type="text/html; charset=utf-8"):
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            app.count("bytes_sent", len(body))
+
+        def _delay(self):
+            if app.latency:
+                time.sleep(app.latency)
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            if parsed.path == "/__stats":
+                return self._send(200, json.dumps(app.snapshot()), "application/json")
+            self._delay()
+            if parsed.path == "/":
+                app.count("page_loads")
+                query = parse_qs(parsed.query, keep_blank_values=True)
+                if carries_payload(query):
+                    app.count("probe_loads")
+                return self._send(200, app.render_page(query))
+            if parsed.path.startswith("/asset/"):
+                app.count("assets")
+                if parsed.path.endswith(".css"):
+                    return self._send(200, STYLESHEET, "text/css")
+                return self._send(200, PIXEL_PNG, "image/png")
+            self._send(404, "Not found", "text/plain")
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length).decode("utf-8", "replace")
+            parsed = urlparse(self.path)
+            if parsed.path == "/__reset":
+                app.reset()
+                return self._send(200, "{}", "application/json")
+            self._delay()
+            if parsed.path == "/comment":
+                app.count("posts")
+                fields = parse_qs(body, keep_blank_values=True)
+                if carries_payload(fields):
+                    app.count("probe_posts")
+                app.add_comment(fields)
+                return self._send(200, "Comment saved.", "text/plain")
+            self._send(404, "Not found", "text/plain")
+
+        def log_message(self, format, *args):
+            pass # Không in log mỗi request (làm sai lệch số đo)
+
+    return Handler
+
+
+def start_server(app, host="127.0.0.1", port=0):
+    """Starts the app on a background thread and returns the server (server.server_port has the bound port)."""
+    server = ThreadingHTTPServer((host, port), make_handler(app))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local vulnerable application for benchmarking the XSS harness.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0, help="Delay added to every response, in milliseconds (default: 0)")
+    parser.add_argument("--page-kb", type=int, default=0, help="Extra hidden markup per page, in KiB (default: 0)")
+    parser.add_argument("--assets", type=int, default=0, help="Number of images each page loads (default: 0)")
+    parser.add_argument("--disable", nargs="*", default=[], choices=list(SINKS), help="Sinks to escape (not vulnerable)")
+    args = parser.parse_args()
+
+    app = VulnApp(args.latency / 1000.0, args.page_kb, args.assets, args.disable)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(app))
+    server.daemon_threads = True
+    print(f"Vulnerable app on http://{args.host}:{args.port}/?q=test&attr=test (sinks: "
+          f"{', '.join(sink for sink in SINKS if app.vulnerable[sink])})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -1,89 +1,488 @@
 import os
 import sys
+import time
+import logging
 import importlib.util
 import argparse
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options as ChromeOptions
-from selenium.webdriver.firefox.options import Options as FirefoxOptions
+import inspect
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import replace
+from functools import partial
 
-def run_selenium_tests(target_url, scripts_dir, use_headless=True, browser='chrome'):
-    """Runs all Python test scripts found in a directory using Selenium."""
+from xss_harness import alert_hook, metrics, plugins
+from xss_harness.browser_daemon import DEFAULT_ADDRESS, attach_or_create_driver, parse_address
+from xss_harness.context import ScanContext
+from xss_harness.discovery import DiscoveryCache
+from xss_harness.driver_lifecycle import ManagedDriver
+from xss_harness.fast_navigation import PAGE_LOAD_STRATEGIES
+from xss_harness.journal import ProbeJournal
+from xss_harness.payload_scheduler import PayloadScheduler, default_db_path as default_stats_path
+from xss_harness.probe_planner import ProbePlanner
+from xss_harness.rescan_cache import RescanCache, default_db_path
+from xss_harness.results import ModuleResult, ResultStream
+from xss_harness.submission import SUBMIT_BROWSER, SUBMIT_ENGINES
+from xss_harness.targets import ScanTarget, iter_targets
+from xss_harness.driver_pool import WebDriverPool, create_driver, SUPPORTED_BROWSERS
 
-    # --- WebDriver Setup ---
-    driver = None
+TARGET_WINDOW = 8 # Số target được quét xen kẽ cùng lúc với --targets
+
+def discover_test_scripts(scripts_dir, only=None):
+    """Returns (module_name, script_path) for every test_*.py script in scripts_dir (restricted to the names in only, if given)."""
+    scripts = []
+    for filename in sorted(os.listdir(scripts_dir)):
+        if filename.endswith(".py") and filename.startswith("test_"):
+            if only and filename[:-3] not in only:
+                continue
+            scripts.append((filename[:-3], os.path.join(scripts_dir, filename))) # Bỏ ".py"
+    return scripts
+
+def load_test_module(module_name, script_path):
+    """Imports a test script dynamically."""
+    spec = importlib.util.spec_from_file_location(module_name, script_path)
+    test_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(test_module)
+    return test_module
+
+def accepts_context(func):
+    """True if func can be called with a 'context' keyword argument."""
     try:
-        if browser.lower() == 'chrome':
-            options = ChromeOptions()
-            if use_headless:
-                options.add_argument("--headless")
-            options.add_argument("--no-sandbox") # Thường cần thiết trong môi trường container/CI
-            options.add_argument("--disable-dev-shm-usage") # Thường cần thiết
-            # options.add_argument("--window-size=1920,1080") # Có thể cần thiết cho headless
-            driver = webdriver.Chrome(options=options)
-        elif browser.lower() == 'firefox':
-             options = FirefoxOptions()
-             if use_headless:
-                 options.add_argument("--headless")
-             driver = webdriver.Firefox(options=options)
+        return 'context' in inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+
+def run_test_module(test_module, driver, target_url, context=None):
+    """Runs a loaded test module's run_test and returns its result dict."""
+    # Check if the module has the 'run_test' function
+    if not (hasattr(test_module, 'run_test') and callable(test_module.run_test)):
+        return {"success": False, "message": "No run_test function found"}
+    if context is not None and accepts_context(test_module.run_test):
+        success, message = test_module.run_test(driver, target_url, context=context)
+    else:
+        success, message = test_module.run_test(driver, target_url)
+    return {"success": success, "message": message}
+
+def schedule_jobs(targets, module_names, window=TARGET_WINDOW):
+    """
+    Yields (target, module_name) jobs. Targets are taken window at a time and
+    every module is run across the whole window before the next module, so no
+    single target or module monopolises the browsers.
+    """
+    batch = []
+    for target in targets:
+        batch.append(target)
+        if len(batch) == window:
+            yield from ((t, module_name) for module_name in module_names for t in batch)
+            batch = []
+    yield from ((t, module_name) for module_name in module_names for t in batch)
+
+def run_selenium_scan(targets, scripts_dir, use_headless=True, browser='chrome', workers=1, shards=1,
+                      alert_backend=alert_hook.BACKEND_DIALOG, reflection_prefilter=False,
+                      payload_context_filter=False, submit_engine=SUBMIT_BROWSER, target_window=TARGET_WINDOW,
+                      daemon_address=None, page_load_strategy="normal", fast_navigation=False,
+                      only=None, on_result=None, metrics_json=None, metrics_prometheus=None,
+                      results_jsonl=None, journal=None, resume=False, rescan_cache=None, adaptive_order=None,
+                      confirm_only=False, merge_get_probes=False, recycle_after=None, max_browser_rss=None):
+    """
+    Runs all Python test scripts found in a directory against every target in
+    targets (an iterable of ScanTarget, consumed lazily) using Selenium.
+
+    browser is one browser name or a list of them. Each browser gets its own
+    pool of WebDriver instances, shared by all targets, and the pools run at
+    the same time; the results are merged into a target/module x browser
+    matrix. With confirm_only=True only the first browser runs the full scan
+    and the others just re-check the findings it reported. With workers > 1
+    the (target, module) jobs run in parallel, each on whichever driver is
+    free, interleaved across target_window targets at a time (see
+    schedule_jobs). With shards > 1 scripts that support it split their own
+    probes across that many browser sessions (the extra sessions are started
+    by the script itself).
+    alert_backend selects how scripts detect alerts (see xss_harness.alert_hook).
+    reflection_prefilter makes reflected probes skip parameters whose HTTP
+    response does not echo a canary (see xss_harness.reflection), and
+    payload_context_filter (which implies it) also narrows each parameter's
+    payloads to those matching its injection context. Pages and forms the
+    scripts discover are cached for the whole run (see xss_harness.discovery).
+    submit_engine selects how stored-XSS scripts send their POSTs (see
+    xss_harness.submission). With daemon_address the drivers are leased from
+    a running warm-browser daemon instead of being started (see
+    xss_harness.browser_daemon). page_load_strategy is applied to every
+    driver, and fast_navigation blocks images, fonts, stylesheets and analytics
+    while scripts load probe pages (see xss_harness.fast_navigation).
+    only restricts the run to the named modules, and on_result(target_key,
+    module_name, result) is called as each result arrives. With metrics_json
+    and/or metrics_prometheus the time spent in each probe phase (navigate,
+    DOM wait, alert wait, POST, reload, interaction) is recorded, summarised at
+    the end and exported to those paths (see xss_harness.metrics). Every
+    finding scripts report and every module result is streamed as a JSON line
+    to results_jsonl (see xss_harness.results); the end-of-run summary is built
+    from the same stream. With journal every completed probe is checkpointed
+    to that file, and resume=True loads it first so scripts skip the probes
+    (and reuse the hits) it already holds (see xss_harness.journal). With
+    rescan_cache (an SQLite path) probes that were negative in an earlier run
+    against an unchanged response or form are skipped (see
+    xss_harness.rescan_cache). With adaptive_order (an SQLite path) reflected
+    payloads are tried in order of estimated success probability, learnt from
+    earlier outcomes (see xss_harness.payload_scheduler).
+    Scripts are imported lazily, on their first job. Each script's
+    PLUGIN_REQUIREMENTS (query parameters, a POST form, an HTML page, headless
+    support, cost) is read without importing it and checked against one cheap
+    HTTP probe of each target, so scripts that cannot apply to a target are
+    reported as not applicable instead of run; expensive scripts are started
+    first (see xss_harness.plugins). With merge_get_probes (hook alert backend
+    only) reflected navigations also carry the mouseover probes of the other
+    parameters, and the mouseover script reuses those outcomes instead of
+    loading the page again (see xss_harness.probe_planner). With recycle_after
+    (navigations) and/or max_browser_rss (MB) every pooled browser is replaced,
+    keeping its cookies and CDP setup, once it crosses either limit (see
+    xss_harness.driver_lifecycle).
+
+    Returns {target.key: {module_name: result}}, with the first browser's
+    result; with several browsers it also holds {"browsers": {browser: result}}.
+    """
+
+    # --- Test Discovery ---
+    scripts = discover_test_scripts(scripts_dir, only)
+    if not scripts:
+        print(f"No test scripts found in directory: {scripts_dir}")
+        return {}
+
+    script_paths = dict(scripts)
+    requirements = {}
+    for module_name, script_path in scripts:
+        print(f">>> Found test script: {os.path.basename(script_path)}")
+        requirements[module_name] = plugins.read_requirements(script_path)
+    module_names = plugins.order_by_cost(requirements)
+    # Chỉ tải trang qua HTTP nếu có script cần biết form / loại nội dung
+    fetch_page = any(plugins.needs_page_fetch(r) for r in requirements.values())
+    load_errors = {}
+    test_modules = {} # Nạp khi job đầu tiên của script được chạy
+
+    def get_test_module(module_name):
+        if module_name not in test_modules and module_name not in load_errors:
+            try:
+                test_modules[module_name] = load_test_module(module_name, script_paths[module_name])
+            except Exception as e:
+                print(f"Error loading script {script_paths[module_name]}: {e}")
+                load_errors[module_name] = {"success": False, "message": f"Execution error: {e}"}
+        return test_modules.get(module_name)
+
+    results = {}
+
+    # --- WebDriver Setup ---
+    browsers = [browser.lower()] if isinstance(browser, str) else [name.lower() for name in browser]
+    for name in browsers:
+        if name not in SUPPORTED_BROWSERS:
+            print(f"Error: Unsupported browser '{name}'")
+            return results
+    if not browsers:
+        print("Error: No browser given")
+        return results
+    browsers = list(dict.fromkeys(browsers)) # Bỏ trùng, giữ thứ tự
+    primary = browsers[0]
+    # Không cần nhiều driver hơn số job chạy xen kẽ cùng lúc
+    pool_size = max(1, min(workers, len(module_names) * target_window))
+    pools = {}
+    contexts = {}
+    if merge_get_probes and alert_backend != alert_hook.BACKEND_HOOK:
+        print("WARNING: Merging GET probes needs --alert-backend hook; probes are not merged.")
+        merge_get_probes = False
+    context = ScanContext(shard_count=shards, alert_backend=alert_backend,
+                          reflection_prefilter=reflection_prefilter or payload_context_filter,
+                          payload_context_filter=payload_context_filter,
+                          discovery=DiscoveryCache(), submit_engine=submit_engine, fast_navigation=fast_navigation,
+                          metrics=metrics.MetricsRecorder() if (metrics_json or metrics_prometheus) else None,
+                          results=ResultStream(results_jsonl),
+                          journal=ProbeJournal(journal, resume) if journal else None,
+                          rescan_cache=RescanCache(rescan_cache) if rescan_cache else None,
+                          payload_scheduler=PayloadScheduler(adaptive_order) if adaptive_order else None)
+    for name in browsers:
+        if daemon_address:
+            driver_factory = partial(attach_or_create_driver, name, use_headless, daemon_address,
+                                     page_load_strategy, fast_navigation)
         else:
-            print(f"Error: Unsupported browser '{browser}'")
-            return
-        print(f"WebDriver ({browser}{' headless' if use_headless else ''}) initialized.")
+            driver_factory = partial(create_driver, name, use_headless, page_load_strategy, fast_navigation)
+        if recycle_after or max_browser_rss:
+            pools[name] = WebDriverPool(pool_size, partial(ManagedDriver, driver_factory, recycle_after, max_browser_rss))
+        else:
+            pools[name] = WebDriverPool(pool_size, driver_factory)
+        # Một browser: giữ khoá journal/rescan cache như cũ (không gắn tên browser)
+        contexts[name] = replace(context, driver_factory=driver_factory,
+                                 browser=name if len(browsers) > 1 else None,
+                                 probe_planner=ProbePlanner() if merge_get_probes else None)
+    stream = context.results
+
+    def close_services():
+        stream.close()
+        if context.journal is not None:
+            context.journal.close()
+        if context.rescan_cache is not None:
+            context.rescan_cache.close()
+        if context.payload_scheduler is not None:
+            context.payload_scheduler.close()
+
+    if context.journal is not None and resume:
+        print(f"Resuming from journal {journal} ({len(context.journal)} completed probes).")
+    try:
+        for name, pool in pools.items():
+            pool.open()
+            print(f"WebDriver pool ({pool.size} x {name}{' headless' if use_headless else ''}) initialized.")
+            if daemon_address:
+                saved = sum(getattr(driver, "saved_startup_seconds", 0.0) for driver in pool.drivers)
+                print(f"Attached to warm browser sessions: ~{saved:.1f}s of browser startup saved.")
     except Exception as e:
         print(f"Error initializing WebDriver: {e}")
         print("Make sure you have the correct WebDriver installed and in your PATH.")
-        return
+        for pool in pools.values():
+            pool.close()
+        close_services()
+        return results
 
-    # --- Test Discovery and Execution ---
-    results = {}
-    found_scripts = False
-    for filename in os.listdir(scripts_dir):
-        if filename.endswith(".py") and filename.startswith("test_"):
-            found_scripts = True
-            script_path = os.path.join(scripts_dir, filename)
-            module_name = filename[:-3] # Bỏ ".py"
-            print(f"\n>>> Found test script: {filename}")
+    # Đếm trước khi pool đóng (danh sách driver bị xoá khi close)
+    managed_drivers = [driver for pool in pools.values() for driver in pool.drivers if isinstance(driver, ManagedDriver)]
 
+    # --- Test Execution ---
+    def run_on_pool(name, target, module_name, test_module, focus=None):
+        with pools[name].acquire() as driver:
+            print(f"\n>>> Running test script: {module_name} on {target.key}{f' [{name}]' if len(browsers) > 1 else ''}")
+            started = time.monotonic()
+            job_context = replace(contexts[name], target=target, module_name=module_name, module_started=started,
+                                  fingerprints={}, injection_contexts={}, focus=focus)
             try:
-                # Import the test module dynamically
-                spec = importlib.util.spec_from_file_location(module_name, script_path)
-                test_module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(test_module)
-
-                # Check if the module has the 'run_test' function
-                if hasattr(test_module, 'run_test') and callable(test_module.run_test):
-                    # Execute the test
-                    success, message = test_module.run_test(driver, target_url)
-                    results[module_name] = {"success": success, "message": message}
-                    print(f"<<< Result [{module_name}]: {'Success' if success else 'Failed'} - {message}")
-                else:
-                    print(f"Warning: Script {filename} does not have a 'run_test' function.")
-                    results[module_name] = {"success": False, "message": "No run_test function found"}
-
+                with metrics.recording(context.metrics, module_name):
+                    result = run_test_module(test_module, driver, target.url, job_context)
             except Exception as e:
-                print(f"Error running script {filename}: {e}")
-                results[module_name] = {"success": False, "message": f"Execution error: {e}"}
+                print(f"Error running script {module_name} on {target.key}: {e}")
+                result = {"success": False, "message": f"Execution error: {e}"}
+            return result, time.monotonic() - started
+
+    executors = {name: ThreadPoolExecutor(max_workers=pool.size) for name, pool in pools.items()}
+    pending = {}
+    by_job = {} # (target.key, module_name) -> {browser: result}
 
-    if not found_scripts:
-         print(f"No test scripts found in directory: {scripts_dir}")
+    def submit(name, target, module_name, focus=None):
+        future = executors[name].submit(run_on_pool, name, target, module_name, get_test_module(module_name), focus)
+        pending[future] = (name, target, module_name)
 
-    # --- Cleanup ---
-    if driver:
-        driver.quit()
+    def add_result(name, target, module_name, result, elapsed):
+        label = name if len(browsers) > 1 else None
+        if label is not None:
+            result["browser"] = name
+        by_browser = by_job.setdefault((target.key, module_name), {})
+        by_browser[name] = result
+        if name == primary:
+            results[target.key][module_name] = dict(result, browsers=by_browser) if label else result
+        stream.add_result(ModuleResult(module_name, target.key, result["success"], result["message"], elapsed,
+                                       browser=label))
+        if on_result is not None:
+            on_result(target.key, module_name, result)
+        print(f"<<< Result [{target.key}][{module_name}]{f'[{name}]' if label else ''}: "
+              f"{'Success' if result['success'] else 'Failed'} - {result['message']}")
+
+    def record(name, target, module_name, future):
+        try:
+            result, elapsed = future.result()
+        except Exception as e:
+            print(f"Error running script {module_name} on {target.key}: {e}")
+            result, elapsed = {"success": False, "message": f"Execution error: {e}"}, 0.0
+        add_result(name, target, module_name, result, elapsed)
+        if not confirm_only or name != primary:
+            return
+        # Chỉ xác nhận: các browser còn lại chỉ chạy lại những finding browser đầu tiên tìm được
+        focus = [(f.location, f.payload) for f in stream.findings_for(module_name, target.key, contexts[name].browser)]
+        for other in browsers[1:]:
+            if result["success"] and focus:
+                submit(other, target, module_name, focus)
+            else:
+                add_result(other, target, module_name,
+                           {"success": False, "message": f"Not run (no {primary} finding to confirm)"}, 0.0)
+
+    def drain(limit):
+        while len(pending) > limit:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                record(*pending.pop(future), future)
+
+    try:
+        # Chỉ giữ một số job đang chờ để target được đọc dần từ input
+        max_pending = sum(pool.size for pool in pools.values()) * 2
+        profiles = {}
+        for target, module_name in schedule_jobs(targets, module_names, target_window):
+            if target.key not in results:
+                results[target.key] = {}
+                profiles[target.key] = plugins.probe_page(target.url, fetch=fetch_page, method=target.method, body=target.body)
+                if merge_get_probes:
+                    for hover_module in module_names:
+                        if (requirements[hover_module].get("hover_probes")
+                                and plugins.skip_reason(requirements[hover_module], profiles[target.key], use_headless) is None):
+                            for job_context in contexts.values():
+                                job_context.probe_planner.expect(target.key, hover_module, profiles[target.key].param_names)
+            reason = plugins.skip_reason(requirements[module_name], profiles[target.key], use_headless)
+            if reason is not None:
+                for name in browsers:
+                    add_result(name, target, module_name, {"success": False, "message": f"Not applicable: {reason}"}, 0.0)
+                continue
+            if get_test_module(module_name) is None:
+                for name in browsers:
+                    add_result(name, target, module_name, dict(load_errors[module_name]), 0.0)
+                continue
+            drain(max_pending - 1)
+            for name in ([primary] if confirm_only else browsers):
+                submit(name, target, module_name)
+        # Job xác nhận được thêm vào pending trong lúc chờ
+        drain(0)
+    finally:
+        # --- Cleanup ---
+        for executor in executors.values():
+            executor.shutdown(wait=True)
+        for pool in pools.values():
+            pool.close()
         print("\nWebDriver closed.")
 
     # --- Report Summary (optional) ---
     print("\n--- Test Summary ---")
-    for name, result in results.items():
-         print(f"- {name}: {'PASS' if result['success'] else 'FAIL'} ({result['message']})")
+    for line in stream.summary_lines():
+        print(line)
+    if len(browsers) > 1:
+        print(f"\n--- Browser Matrix{' (confirm only)' if confirm_only else ''} ---")
+        for line in stream.matrix_lines(browsers):
+            print(line)
+    if managed_drivers:
+        print(f"Browser recycling: {sum(driver.recycles for driver in managed_drivers)} browsers replaced.")
+    if merge_get_probes:
+        merged = sum(job_context.probe_planner.merged for job_context in contexts.values())
+        print(f"Probe planner: {merged} mouseover probes answered by shared page loads.")
+    if context.rescan_cache is not None:
+        print(f"Rescan cache: {context.rescan_cache.skipped} known-negative probes skipped ({context.rescan_cache.path}).")
+    close_services()
+    if results_jsonl:
+        print(f"Results written to {results_jsonl}")
+
+    if context.metrics is not None:
+        print("\n--- Phase Timings ---")
+        print(context.metrics.summary())
+        if metrics_json:
+            context.metrics.write_json(metrics_json)
+            print(f"Metrics written to {metrics_json}")
+        if metrics_prometheus:
+            context.metrics.write_prometheus(metrics_prometheus)
+            print(f"Prometheus metrics written to {metrics_prometheus}")
+    return results
+
+def run_selenium_tests(target_url, scripts_dir, use_headless=True, browser='chrome', workers=1, shards=1,
+                       alert_backend=alert_hook.BACKEND_DIALOG, reflection_prefilter=False,
+                       payload_context_filter=False, submit_engine=SUBMIT_BROWSER, daemon_address=None,
+                       page_load_strategy="normal", fast_navigation=False, only=None, on_result=None,
+                       metrics_json=None, metrics_prometheus=None, results_jsonl=None, journal=None, resume=False,
+                       rescan_cache=None, adaptive_order=None, confirm_only=False, merge_get_probes=False,
+                       recycle_after=None, max_browser_rss=None):
+    """
+    Runs all Python test scripts found in a directory against target_url (see
+    run_selenium_scan for the options) and returns {module_name: result}.
+    """
+    target = ScanTarget(target_url)
+    results = run_selenium_scan([target], scripts_dir, use_headless=use_headless, browser=browser, workers=workers,
+                                shards=shards, alert_backend=alert_backend, reflection_prefilter=reflection_prefilter,
+                                payload_context_filter=payload_context_filter, submit_engine=submit_engine,
+                                target_window=1, daemon_address=daemon_address,
+                                page_load_strategy=page_load_strategy, fast_navigation=fast_navigation,
+                                only=only, on_result=on_result, metrics_json=metrics_json,
+                                metrics_prometheus=metrics_prometheus, results_jsonl=results_jsonl,
+                                journal=journal, resume=resume, rescan_cache=rescan_cache,
+                                adaptive_order=adaptive_order, confirm_only=confirm_only,
+                                merge_get_probes=merge_get_probes, recycle_after=recycle_after,
+                                max_browser_rss=max_browser_rss)
+    return results.get(target.key, {})
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run Selenium tests from a directory.")
-    parser.add_argument("-u", "--url", required=True, help="Target URL")
+    target_group = parser.add_mutually_exclusive_group(required=True)
+    target_group.add_argument("-u", "--url", help="Target URL")
+    target_group.add_argument("--targets", help="File of targets to scan with one shared browser pool: one URL per line, or JSONL objects with method/url/body")
     parser.add_argument("-d", "--scripts-dir", default="selenium_tests", help="Directory containing test scripts (default: selenium_tests)")
-    parser.add_argument("-b", "--browser", default="chrome", choices=["chrome", "firefox"], help="Browser to use (default: chrome)")
+    parser.add_argument("--only", nargs="+", metavar="MODULE", help="Run only these test modules (e.g. test_reflected_xss_get)")
+    parser.add_argument("-b", "--browser", nargs="+", default=["chrome"], choices=list(SUPPORTED_BROWSERS), help="Browser(s) to use; several browsers run in parallel, one pool each (default: chrome)")
+    parser.add_argument("--confirm-only", action="store_true", help="With several browsers, only the first runs the full scan; the others re-check its findings")
     parser.add_argument("--no-headless", action="store_true", help="Disable headless mode")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Number of WebDriver instances running test scripts in parallel (default: 1)")
+    parser.add_argument("--shards", type=int, default=1, help="Browser sessions each supporting script may split its probes across (default: 1)")
+
+    parser.add_argument("--alert-backend", default=alert_hook.BACKEND_DIALOG, choices=list(alert_hook.BACKENDS), help="How alerts are detected: wait for real dialogs, or record alert()/confirm()/prompt() calls through an injected hook (Chrome only) (default: dialog)")
+
+    parser.add_argument("--reflection-prefilter", action="store_true", help="Send an HTTP canary per parameter first and only browser-test parameters that reflect it")
+
+    parser.add_argument("--context-filter", action="store_true", help="Only try payloads matching the context each parameter is reflected in (implies --reflection-prefilter)")
+
+    parser.add_argument("--merge-get-probes", action="store_true", help="Let reflected-XSS page loads also carry the mouseover probes of the other parameters, saving the mouseover script's own page loads (needs --alert-backend hook)")
+
+    parser.add_argument("--submit-engine", default=SUBMIT_BROWSER, choices=list(SUBMIT_ENGINES), help="How stored-XSS scripts send form POSTs: fetch() inside the browser, or directly over HTTP with the browser's cookies (default: browser)")
+
+    parser.add_argument("--target-window", type=int, default=TARGET_WINDOW, help=f"With --targets, how many targets have their modules interleaved at a time (default: {TARGET_WINDOW})")
+
+    parser.add_argument("--daemon", nargs="?", const=f"{DEFAULT_ADDRESS[0]}:{DEFAULT_ADDRESS[1]}", metavar="HOST:PORT", help="Lease warm browser sessions from a running xss_harness.browser_daemon instead of starting browsers (default address: %(const)s)")
+
+    parser.add_argument("--recycle-after", type=int, metavar="N", help="Replace each browser (keeping its cookies) after N page loads, to keep long runs from slowing down")
+    parser.add_argument("--max-browser-rss", type=int, metavar="MB", help="Replace a browser (keeping its cookies) once its process tree uses more than MB of resident memory (psutil or /proc)")
+
+    parser.add_argument("--page-load-strategy", default="normal", choices=list(PAGE_LOAD_STRATEGIES), help="When driver.get() returns: after the full load (normal), at DOMContentLoaded (eager) or immediately (none) (default: normal)")
+
+    parser.add_argument("--fast-navigation", action="store_true", help="Block images, fonts, stylesheets, media and common analytics scripts while probe pages load (Chrome; Firefox only skips images and web fonts)")
+
+    parser.add_argument("--metrics-json", metavar="PATH", help="Record per-phase timings and write them (records + histograms) to this JSON file")
+
+    parser.add_argument("--metrics-prom", metavar="PATH", help="Record per-phase timings and write them as a Prometheus textfile (node_exporter textfile collector)")
+
+    parser.add_argument("--results-jsonl", metavar="PATH", help="Append every finding and module result to this file as JSON lines")
+
+    parser.add_argument("--journal", metavar="PATH", help="Checkpoint every completed probe to this file (fsync'd JSON lines) so an interrupted scan can be resumed")
+    parser.add_argument("--resume", action="store_true", help="Continue the scan recorded in --journal: skip its completed probes and reuse its hits")
+
+    parser.add_argument("--rescan-cache", nargs="?", const=default_db_path(), metavar="PATH", help="Skip probes that were negative in an earlier run against an unchanged response/form, and record this run's outcomes (SQLite; default path: %(const)s)")
+
+    parser.add_argument("--adaptive-order", nargs="?", const=default_stats_path(), metavar="PATH", help="Try reflected payloads most-likely-first, from per-context/per-page hit rates of earlier runs (SQLite; default path: %(const)s)")
+
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING"], help="Verbosity of the per-probe output of the test scripts (default: INFO)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Same as --log-level DEBUG (every payload and attack URL)")
 
     args = parser.parse_args()
+    # print() và log dùng chung stdout để giữ đúng thứ tự dòng
+    logging.basicConfig(level="DEBUG" if args.verbose else args.log_level, format="%(message)s", stream=sys.stdout)
+    daemon_address = parse_address(args.daemon) if args.daemon else None
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.shards < 1:
+        parser.error("--shards must be at least 1")
+    if args.recycle_after is not None and args.recycle_after < 1:
+        parser.error("--recycle-after must be at least 1")
+    if args.max_browser_rss is not None and args.max_browser_rss < 1:
+        parser.error("--max-browser-rss must be at least 1")
+    if args.target_window < 1:
+        parser.error("--target-window must be at least 1")
+    if args.confirm_only and len(args.browser) < 2:
+        parser.error("--confirm-only requires at least two browsers")
+    if args.resume and not args.journal:
+        parser.error("--resume requires --journal")
+    if args.targets and not os.path.isfile(args.targets):
+        parser.error(f"--targets file not found: {args.targets}")
 
-    run_selenium_tests(args.url, args.scripts_dir, use_headless=(not args.no_headless), browser=args.browser)
+    if args.targets:
+        run_selenium_scan(iter_targets(args.targets), args.scripts_dir, use_headless=(not args.no_headless), browser=args.browser, workers=args.workers, shards=args.shards,
+                          alert_backend=args.alert_backend, reflection_prefilter=args.reflection_prefilter,
+                          payload_context_filter=args.context_filter, submit_engine=args.submit_engine,
+                          target_window=args.target_window, daemon_address=daemon_address,
+                          page_load_strategy=args.page_load_strategy, fast_navigation=args.fast_navigation,
+                          only=args.only, metrics_json=args.metrics_json, metrics_prometheus=args.metrics_prom,
+                          results_jsonl=args.results_jsonl, journal=args.journal, resume=args.resume,
+                          rescan_cache=args.rescan_cache, adaptive_order=args.adaptive_order,
+                          confirm_only=args.confirm_only, merge_get_probes=args.merge_get_probes,
+                          recycle_after=args.recycle_after, max_browser_rss=args.max_browser_rss)
+    else:
+        run_selenium_tests(args.url, args.scripts_dir, use_headless=(not args.no_headless), browser=args.browser, workers=args.workers, shards=args.shards,
+                           alert_backend=args.alert_backend, reflection_prefilter=args.reflection_prefilter,
+                           payload_context_filter=args.context_filter, submit_engine=args.submit_engine,
+                           daemon_address=daemon_address, page_load_strategy=args.page_load_strategy,
+                           fast_navigation=args.fast_navigation, only=args.only,
+                           metrics_json=args.metrics_json, metrics_prometheus=args.metrics_prom,
+                           results_jsonl=args.results_jsonl, journal=args.journal, resume=args.resume,
+                           rescan_cache=args.rescan_cache, adaptive_order=args.adaptive_order,
+                           confirm_only=args.confirm_only, merge_get_probes=args.merge_get_probes,
+                           recycle_after=args.recycle_after, max_browser_rss=args.max_browser_rss)
@@ -1,38 +1,247 @@
 import os
+import logging
+import sys
 import time
+import threading
 from pathlib import Path
-from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+from urllib.parse import urlparse, parse_qsl
 from selenium.webdriver.remote.webdriver import WebDriver
-from selenium.common.exceptions import TimeoutException, NoAlertPresentException
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import NoAlertPresentException
 import requests # Thêm thư viện requests để dễ dàng lấy nội dung từ URL
 
+# Cho phép import xss_harness khi chạy trực tiếp file này
+_REPO_ROOT = str(Path(__file__).resolve().parent.parent)
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+from xss_harness import alert_hook, metrics
+from xss_harness.context import ScanContext
+from xss_harness.fast_navigation import blocked_resources
+from xss_harness.payload_corpus import PayloadCorpus, is_remote, load_corpus
+from xss_harness.injection_context import classify_reflection, select_payloads
+from xss_harness.http_session import browser_session
+from xss_harness.probe_planner import required_params
+from xss_harness.reflection import probe_reflections, replace_query_params
+from xss_harness.rescan_cache import response_fingerprint
+
+log = logging.getLogger(__name__)
+
 # --- Configuration ---
 PAYLOADS_FILENAME = "payloads.txt" # Tên file chứa payload
 ALERT_WAIT_TIMEOUT = 1     # Thời gian chờ alert xuất hiện (giây)
 POST_ACCEPT_SLEEP = 0.5    # Thời gian chờ sau khi accept alert (giây)
+SHARD_COUNT = 1            # Số browser session chia nhau lưới (param, payload); context.shard_count ghi đè
+
+# Điều kiện để runner chạy script này (đọc bằng ast, không import; xem xss_harness.plugins)
+PLUGIN_REQUIREMENTS = {
+    "query_params": True,
+    "post_form": False,
+    "javascript": True,
+    "headless": True,
+    "cost": 4, # Tương đối: ~ số lần tải trang
+}
 
 def build_test_url(base_url: str, param_name: str, payload: str) -> str:
     """
     Ghép thêm param_name=payload vào base_url, tự động xử lý
     & hoặc ? tùy base_url đã có query hay chưa.
     """
-    parsed = urlparse(base_url)
-    # Lấy danh sách các cặp key-value hiện có từ query string
-    qlist = parse_qsl(parsed.query, keep_blank_values=True)
     # Ghi đè giá trị của param_name nếu nó đã tồn tại, hoặc thêm mới
     # Điều này đảm bảo chúng ta chỉ kiểm tra param_name với payload hiện tại
     # mà không bị ảnh hưởng bởi giá trị gốc của nó trong base_url.
-    qlist_updated = [(k, v) for k, v in qlist if k != param_name]
-    qlist_updated.append((param_name, payload))
-    new_query = urlencode(qlist_updated)
-    return urlunparse(parsed._replace(query=new_query))
+    return replace_query_params(base_url, {param_name: payload})
+
+def probe_payload(driver: WebDriver, target_url: str, param: str, payload: str,
+                  alert_backend: str = alert_hook.BACKEND_DIALOG, context: ScanContext = None, merge: bool = True):
+    """
+    Tải URL đã chèn payload vào param và chờ alert.
+    Trả về text của alert nếu XSS được kích hoạt, ngược lại None.
+    Probe chạy xong (không lỗi) được ghi vào context.journal.
+    Với context.probe_planner (backend hook), cùng lần tải trang còn mang các
+    probe mouseover của script khác ở những tham số còn lại (trừ tham số có giá
+    trị gốc trông như định danh). Nếu trang không phản chiếu marker nào của chúng
+    (trang lỗi), probe được tải lại một mình (merge=False) thay vì ghi âm tính.
+    """
+    # Tạo URL test dựa trên URL gốc và payload hiện tại
+    # Điều này quan trọng để không tích lũy payload từ vòng lặp trước
+    test_url = build_test_url(target_url, param, payload)
+    riders = []
+    planner = context.probe_planner if context is not None and context.target is not None else None
+    if merge and planner is not None and alert_backend == alert_hook.BACKEND_HOOK:
+        riders = planner.claim(context.target.key, exclude={param} | required_params(target_url))
+        if riders:
+            test_url = replace_query_params(test_url, {rider.param: rider.payload for rider in riders})
+
+    payload_preview = payload[:60] + '...' if len(payload) > 60 else payload
+    log.debug(f"  Trying payload: '{payload_preview}'")
+    log.debug(f"  Testing URL: {test_url}") # <<< DÒNG NÀY ĐÃ ĐƯỢC BỎ COMMENT
 
-def run_test(driver: WebDriver, target_url: str):
+    try:
+        with metrics.timed(metrics.NAVIGATE):
+            driver.get(test_url)
+        captured = alert_hook.wait_for_alert(driver, alert_backend, ALERT_WAIT_TIMEOUT, POST_ACCEPT_SLEEP)
+        if riders:
+            # Alert khi tải trang thuộc về payload của param; marker mouseover chỉ kích hoạt khi hover
+            page_ok = planner.resolve(driver, riders, test_url)
+            riders = []
+            if captured is None and not page_ok:
+                # Marker của tham số khác có thể đã làm hỏng trang: thử lại không kèm marker
+                return probe_payload(driver, target_url, param, payload, alert_backend, context, merge=False)
+        if captured is None:
+            if context is not None:
+                context.record_probe(param, payload)
+            return None # Không có alert, tiếp tục
+        log.info(f"  Alert detected! Text: '{captured.text}'")
+        if captured.origin is None:
+             log.warning(f"  WARNING: Không thể lấy origin sau khi accept alert (trang có thể đã điều hướng hoặc đóng).")
+             # Vẫn có thể coi là thành công nếu alert xuất hiện, tùy thuộc vào yêu cầu
+             # Ở đây ta vẫn yêu cầu lấy được origin
+             if context is not None:
+                 context.record_probe(param, payload)
+             return None # Chuyển sang payload tiếp theo
+
+        # Sửa đổi điều kiện kiểm tra: chỉ cần alert xuất hiện là thành công
+        # Hoặc bạn có thể giữ nguyên kiểm tra origin nếu muốn
+        # if captured.text == captured.origin: # Kiểm tra origin cũ
+        log.info(f"  SUCCESS: XSS found! Parameter='{param}', Payload='{payload}' triggered an alert ('{captured.text}').")
+        if context is not None:
+            context.record_probe(param, payload, captured.text)
+        return captured.text
+
+    except Exception as e:
+        log.warning(f"  ERROR testing param '{param}' with payload '{payload_preview}': {e}")
+        if riders:
+            planner.release(riders)
+        if "unexpected alert open" in str(e).lower():
+            try:
+                log.debug("  Attempting to dismiss unexpected alert...")
+                alert = driver.switch_to.alert
+                alert.dismiss()
+                time.sleep(POST_ACCEPT_SLEEP)
+                log.debug("  Unexpected alert dismissed.")
+            except NoAlertPresentException:
+                log.debug("  No alert found to dismiss.")
+            except Exception as alert_err:
+                log.warning(f"  Error dismissing unexpected alert: {alert_err}")
+    return None
+
+def run_sequential(driver: WebDriver, target_url: str, param_names, payloads_by_param,
+                   alert_backend: str = alert_hook.BACKEND_DIALOG, context: ScanContext = None):
+    """Thử lần lượt từng (param, payload) trên một driver, dừng ở lỗ hổng đầu tiên."""
+    for param in param_names:
+        log.info(f"\nTesting parameter: '{param}'")
+        for payload in payloads_by_param[param]:
+            alert_text = probe_payload(driver, target_url, param, payload, alert_backend, context)
+            if alert_text is not None:
+                return (param, payload, alert_text)
+    return None
+
+def run_sharded(driver: WebDriver, target_url: str, param_names, payloads_by_param, shard_count, driver_factory,
+                alert_backend: str = alert_hook.BACKEND_DIALOG, fast_navigation: bool = False,
+                context: ScanContext = None):
+    """
+    Chia payload của mỗi param thành shard_count phần theo kiểu round-robin và chạy
+    song song: shard 0 dùng driver hiện tại, các shard còn lại tự tạo browser session
+    riêng bằng driver_factory. Shard đầu tiên xác nhận được alert sẽ hủy các shard khác.
+    fast_navigation bật chặn tài nguyên phụ trên các session shard tự tạo.
+    """
+    total = sum(len(payloads_by_param[param]) for param in param_names)
+    shard_count = max(1, min(shard_count, total))
+    print(f"Sharded mode: {total} probes split across {shard_count} browser sessions.")
+
+    def shard_combos(index):
+        # Lấy lazy từng payload thứ index, index+shard_count, ... của mỗi param
+        for param in param_names:
+            payloads = payloads_by_param[param]
+            if isinstance(payloads, PayloadCorpus):
+                shard = payloads.iter_shard(index, shard_count) # Đọc thẳng từ mmap, không tạo list
+            else:
+                shard = payloads[index::shard_count] # Danh sách đã lọc / sắp xếp lại
+            for payload in shard:
+                yield param, payload
+
+    stop_event = threading.Event()
+    lock = threading.Lock()
+    metrics_binding = metrics.current() # Các thread shard ghi số đo vào cùng recorder
+    found = []
+    orphaned = [] # Shard không tạo được driver -> chạy lại trên driver chính
+
+    def run_shard(index, shard_driver, combos):
+        backend = alert_hook.prepare(shard_driver, alert_backend)
+        for param, payload in combos:
+            if stop_event.is_set():
+                return
+            alert_text = probe_payload(shard_driver, target_url, param, payload, backend, context)
+            if alert_text is not None:
+                with lock:
+                    if not found:
+                        found.append((param, payload, alert_text))
+                stop_event.set()
+                log.info(f"  Shard {index} confirmed an alert. Cancelling remaining shards.")
+                return
+
+    def run_extra_shard(index):
+        with metrics.bound(metrics_binding):
+            _run_extra_shard(index)
+
+    def _run_extra_shard(index):
+        try:
+            shard_driver = driver_factory()
+        except Exception as e:
+            print(f"WARNING: Could not start browser for shard {index}: {e}. Its probes will run on the main driver.")
+            with lock:
+                orphaned.append(index)
+            return
+        try:
+            with blocked_resources(shard_driver, fast_navigation):
+                run_shard(index, shard_driver, shard_combos(index))
+        finally:
+            try:
+                shard_driver.quit()
+            except Exception as quit_err:
+                print(f"WARNING: Error closing browser of shard {index}: {quit_err}")
+
+    threads = [threading.Thread(target=run_extra_shard, args=(i,), daemon=True)
+               for i in range(1, shard_count)]
+    for thread in threads:
+        thread.start()
+    run_shard(0, driver, shard_combos(0))
+    for thread in threads:
+        thread.join()
+    for index in orphaned:
+        if stop_event.is_set():
+            break
+        run_shard(0, driver, shard_combos(index))
+
+    return found[0] if found else None
+
+def prefilter_reflected_params(driver: WebDriver, target_url: str, param_names):
+    """
+    Gửi một canary riêng cho mỗi tham số qua requests (kèm cookie của browser)
+    và trả về {param: ReflectionProbe}.
+    """
+    print(f"Pre-filtering {len(param_names)} parameters over HTTP...")
+    session = browser_session(driver)
+    probes = probe_reflections(target_url, param_names, session=session)
+    for param in param_names:
+        probe = probes[param]
+        if probe.error:
+            log.debug(f"  '{param}': request failed ({probe.error}); keeping it for the browser stage.")
+        else:
+            log.debug(f"  '{param}': HTTP {probe.status}, {'reflected' if probe.reflected else 'not reflected'}")
+    return probes
+
+def run_test(driver: WebDriver, target_url: str, context: ScanContext = None):
     """
     Kiểm tra reflected XSS trong tham số GET lấy từ chính target_url,
     sử dụng payloads từ file payloads.txt.
+    Nếu context.shard_count > 1 (và có driver_factory), lưới (param, payload)
+    được chia cho nhiều browser session chạy song song.
+    Nếu context.reflection_prefilter, chỉ những tham số phản chiếu canary
+    trong response HTTP mới được kiểm tra bằng browser; thêm
+    context.payload_context_filter thì mỗi tham số chỉ thử các payload
+    phù hợp với ngữ cảnh mà canary được phản chiếu (xss_harness.injection_context).
+    context.fast_navigation chặn ảnh/font/CSS/analytics khi tải các URL tấn công.
+    context.payload_scheduler thay thứ tự file bằng thứ tự theo tỉ lệ trúng ước lượng.
     """
     print(f"--- Running test: Reflected XSS on {target_url} ---")
 
@@ -53,25 +262,36 @@ def run_test(driver: WebDriver, target_url: str):
     except Exception as e:
         return False, f"Lỗi khi phân tích URL '{target_url}' để lấy tham số: {e}"
 
-    # --- Đọc Payloads ---
-    try:
-        # Kiểm tra xem PAYLOADS_FILENAME là URL hay file path
-        if PAYLOADS_FILENAME.startswith(('http://', 'https://')):
-            print(f"Fetching payloads from URL: {PAYLOADS_FILENAME}")
-            response = requests.get(PAYLOADS_FILENAME)
-            response.raise_for_status() # Ném lỗi nếu request không thành công (e.g., 404)
-            payloads = [line.strip() for line in response.text.splitlines() if line.strip()]
-        else:
-            payloads_file_path = script_dir / PAYLOADS_FILENAME
-            print(f"Reading payloads from file: {payloads_file_path}")
-            with open(payloads_file_path, 'r', encoding='utf-8') as f:
-                payloads = [line.strip() for line in f if line.strip()]
+    context = context or ScanContext()
+    if context.focus is not None:
+        # Chỉ xác nhận (--confirm-only): chỉ các tham số browser đầu tiên đã tìm thấy lỗi
+        param_names = [param for param in param_names if context.in_focus(param)]
+        if not param_names:
+            return False, "No finding to confirm for the URL parameters."
+        print(f"Confirming findings for {len(param_names)} parameters: {', '.join(param_names)}")
+
+    # --- Canary qua HTTP: lọc trước tham số được phản chiếu, fingerprint cho rescan cache ---
+    if context.reflection_prefilter or context.rescan_cache is not None or context.payload_scheduler is not None:
+        reflection_probes = prefilter_reflected_params(driver, target_url, param_names)
+        for param, probe in reflection_probes.items():
+            if probe.error is None:
+                context.fingerprints[param] = response_fingerprint(probe.body, probe.canary)
+    if context.reflection_prefilter:
+        param_names = [param for param in param_names if reflection_probes[param].reflected]
+        if not param_names:
+            return False, "No reflected XSS possible: none of the URL parameters is reflected in the HTTP response."
+        print(f"{len(param_names)} parameters reflect the canary and go to the browser stage: {', '.join(param_names)}")
 
-        if not payloads:
+    # --- Đọc Payloads (qua corpus có cache trên đĩa) ---
+    source_type = "URL" if is_remote(PAYLOADS_FILENAME) else "file"
+    payloads_source = PAYLOADS_FILENAME if source_type == "URL" else script_dir / PAYLOADS_FILENAME
+    try:
+        print(f"Loading payloads from {source_type}: {payloads_source}")
+        payloads = load_corpus(payloads_source)
+        if not len(payloads):
              # Phân biệt thông báo lỗi dựa trên nguồn payloads
-            source_type = "URL" if PAYLOADS_FILENAME.startswith(('http://', 'https://')) else "file"
             return False, f"Nguồn payload ({source_type} '{PAYLOADS_FILENAME}') rỗng hoặc không chứa payload hợp lệ."
-        print(f"Loaded {len(payloads)} payloads.")
+        print(f"Loaded {len(payloads)} payloads{' (cached)' if payloads.from_cache else ''}.")
 
     except FileNotFoundError:
          # Chỉ áp dụng nếu là file
@@ -81,94 +301,63 @@ def run_test(driver: WebDriver, target_url: str):
         return False, f"Lỗi khi tải payloads từ URL '{PAYLOADS_FILENAME}': {e}"
     except Exception as e:
          # Lỗi chung khác
-        source_type = "URL" if PAYLOADS_FILENAME.startswith(('http://', 'https://')) else "file"
         return False, f"Lỗi khi đọc/xử lý payloads từ {source_type} '{PAYLOADS_FILENAME}': {e}"
 
+    # --- Chọn payload theo ngữ cảnh phản chiếu của từng tham số ---
+    payloads_by_param = {param: payloads for param in param_names}
+    if context.reflection_prefilter and context.payload_context_filter:
+        for param in param_names:
+            probe = reflection_probes[param]
+            contexts = classify_reflection(probe.body, probe.canary)
+            payloads_by_param[param] = select_payloads(payloads, contexts)
+            print(f"  '{param}' reflects in {', '.join(sorted(contexts)) or 'unknown context'}: "
+                  f"{len(payloads_by_param[param])}/{len(payloads)} payloads selected.")
+
+    # --- Thử trước các payload từng trúng ở ngữ cảnh / trang tương tự (context.payload_scheduler) ---
+    if context.payload_scheduler is not None:
+        for param in param_names:
+            probe = reflection_probes[param]
+            contexts = classify_reflection(probe.body, probe.canary) if probe.error is None else set()
+            payloads_by_param[param] = context.order_payloads(param, payloads_by_param[param], contexts)
+        print(f"Payloads ordered by historical hit rate for {len(param_names)} parameters.")
+    if context.focus is not None:
+        payloads_by_param = {param: context.focus_payloads(param, payloads_by_param[param]) for param in param_names}
 
     vulnerable_combination = None # Lưu (param, payload, alert_text) nếu tìm thấy
-    found_vulnerability = False # Cờ để dừng sớm
-
-    # --- Vòng lặp kiểm tra ---
-    original_parsed_url = urlparse(target_url) # Phân tích URL gốc một lần
-
-    for param in param_names:
-        if found_vulnerability: # Nếu đã tìm thấy lỗ hổng, không cần kiểm tra param khác
-            break
-        print(f"\nTesting parameter: '{param}'")
-
-        for payload in payloads:
-            # Tạo URL test dựa trên URL gốc và payload hiện tại
-            # Điều này quan trọng để không tích lũy payload từ vòng lặp trước
-            test_url = build_test_url(target_url, param, payload)
 
-            payload_preview = payload[:60] + '...' if len(payload) > 60 else payload
-            print(f"  Trying payload: '{payload_preview}'")
-            print(f"  Testing URL: {test_url}") # <<< DÒNG NÀY ĐÃ ĐƯỢC BỎ COMMENT
-
-            try:
-                driver.get(test_url)
-                try:
-                    WebDriverWait(driver, ALERT_WAIT_TIMEOUT).until(EC.alert_is_present())
-                    alert = driver.switch_to.alert
-                    alert_text = alert.text
-                    print(f"  Alert detected! Text: '{alert_text}'")
-                    alert.accept()
-                    print(f"  Alert accepted. Sleeping {POST_ACCEPT_SLEEP}s...")
-                    time.sleep(POST_ACCEPT_SLEEP)
-
-                    try:
-                        # Cố gắng lấy origin một cách an toàn hơn
-                        origin = driver.execute_script(
-                            "try { return window.location.origin; } catch (e) { return null; }"
-                        )
-                        if origin is None:
-                             print(f"  WARNING: Không thể lấy origin sau khi accept alert (trang có thể đã điều hướng hoặc đóng).")
-                             # Vẫn có thể coi là thành công nếu alert xuất hiện, tùy thuộc vào yêu cầu
-                             # Ở đây ta vẫn yêu cầu khớp origin
-                             continue # Chuyển sang payload tiếp theo
-
-
-                    except Exception as err:
-                        print(f"  WARNING: Lỗi khi thực thi script lấy origin: {err}")
-                        continue # Chuyển sang payload tiếp theo
-
-                    # Sửa đổi điều kiện kiểm tra: chỉ cần alert xuất hiện là thành công
-                    # Hoặc bạn có thể giữ nguyên kiểm tra origin nếu muốn
-                    # if alert_text == origin: # Kiểm tra origin cũ
-                    print(f"  SUCCESS: XSS found! Parameter='{param}', Payload='{payload}' triggered an alert ('{alert_text}').")
-                    vulnerable_combination = (param, payload, alert_text)
-                    found_vulnerability = True
-                    break # Dừng thử các payload khác cho param này
-                    # else:
-                    #     print(f"  WARNING: Alert text ('{alert_text}') does not match origin ('{origin}').")
-
-
-                except TimeoutException:
-                    pass # Không có alert, tiếp tục
-                except NoAlertPresentException:
-                    print("  WARNING: Alert disappeared before interaction.")
-
-            except Exception as e:
-                print(f"  ERROR testing param '{param}' with payload '{payload_preview}': {e}")
-                if "unexpected alert open" in str(e).lower():
-                    try:
-                        print("  Attempting to dismiss unexpected alert...")
-                        alert = driver.switch_to.alert
-                        alert.dismiss()
-                        time.sleep(POST_ACCEPT_SLEEP)
-                        print("  Unexpected alert dismissed.")
-                    except NoAlertPresentException:
-                        print("  No alert found to dismiss.")
-                    except Exception as alert_err:
-                        print(f"  Error dismissing unexpected alert: {alert_err}")
-
-            if found_vulnerability:
-                break
+    # --- Chạy tiếp từ journal (--resume): dùng lại hit đã ghi ---
+    recorded_hits = context.journaled_hits()
+    if recorded_hits:
+        hit = recorded_hits[0]
+        print(f"Resuming: journal already has a hit for '{hit.location}'; not probing again.")
+        vulnerable_combination = (hit.location, hit.payload, hit.alert_text)
+    elif context.journal is not None or context.rescan_cache is not None:
+        # Bỏ qua probe đã xong (journal) hoặc đã âm tính với response không đổi (rescan cache)
+        remaining = {param: [payload for payload in payloads_by_param[param]
+                             if not context.skip_probe(param, payload)] for param in param_names}
+        skipped = sum(len(payloads_by_param[param]) - len(remaining[param]) for param in param_names)
+        if skipped:
+            print(f"Skipping {skipped} probes already in the journal or known negative for an unchanged response.")
+        payloads_by_param = remaining
+
+    shard_count = max(context.shard_count, SHARD_COUNT)
+    # Chỉ tài liệu chính cần cho việc phát hiện: chặn tài nguyên phụ trong lúc probe
+    if vulnerable_combination is None:
+        with blocked_resources(driver, context.fast_navigation):
+            if shard_count > 1 and context.driver_factory is not None:
+                vulnerable_combination = run_sharded(driver, target_url, param_names, payloads_by_param,
+                                                     shard_count, context.driver_factory, context.alert_backend,
+                                                     context.fast_navigation, context)
+            else:
+                alert_backend = alert_hook.prepare(driver, context.alert_backend)
+                vulnerable_combination = run_sequential(driver, target_url, param_names, payloads_by_param,
+                                                        alert_backend, context)
 
     # --- Kết quả cuối cùng ---
     print("\n--- Test finished ---")
     if vulnerable_combination:
         param, payload, alert_text_final = vulnerable_combination
+        context.report_finding(param, payload, alert_text=alert_text_final)
         success_message = (f"Found Reflected XSS!\n"
                            f"  Parameter: '{param}'\n"
                            f"  Payload: '{payload}'\n"
@@ -181,6 +370,7 @@ def run_test(driver: WebDriver, target_url: str):
 
 # ----- Ví dụ cách sử dụng (nếu chạy script trực tiếp) -----
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
     from selenium import webdriver
     from selenium.webdriver.chrome.service import Service
     from webdriver_manager.chrome import ChromeDriverManager
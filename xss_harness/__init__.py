@@ -0,0 +1 @@
+"""Shared helpers for the selenium-xss runner and the test scripts in selenium_tests/."""
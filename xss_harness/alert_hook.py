@@ -0,0 +1,216 @@
+"""
+Alert detection backends.
+
+``dialog`` (the default) waits for a real modal with ``EC.alert_is_present()``,
+accepts it and sleeps ``post_accept_sleep`` seconds, which is how the test
+scripts always worked.
+
+``hook`` installs a recorder for ``alert``/``confirm``/``prompt`` that runs
+before any page script (CDP ``Page.addScriptToEvaluateOnNewDocument``). The
+dialogs never open; the harness reads the recorded calls back with one
+``execute_script``. This needs a Chromium-based driver. Other drivers fall back
+to ``dialog``.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from selenium.common.exceptions import NoAlertPresentException, TimeoutException
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from xss_harness import metrics
+from xss_harness.waits import document_is_ready
+
+BACKEND_DIALOG = "dialog"
+BACKEND_HOOK = "hook"
+BACKENDS = (BACKEND_DIALOG, BACKEND_HOOK)
+
+HOOK_SETTLE_TIME = 0.1   # Thời gian chờ alert "muộn" (setTimeout...) sau khi trang tải xong, ở chế độ hook (giây)
+HOOK_POLL_INTERVAL = 0.02
+
+# Ghi lại alert/confirm/prompt thay vì mở hộp thoại. Chạy trong mọi frame; frame con
+# cùng origin đẩy bản ghi lên window.top để một lần đọc là đủ.
+HOOK_SCRIPT = """
+(function () {
+  if (window.__xssHarnessAlerts) { return; }
+  var calls = [];
+  Object.defineProperty(window, '__xssHarnessAlerts', { value: calls, configurable: true });
+  function record(type, result) {
+    return function (message) {
+      var sink = calls;
+      try {
+        if (window.top !== window && window.top.__xssHarnessAlerts) { sink = window.top.__xssHarnessAlerts; }
+      } catch (e) {}
+      sink.push({ type: type, text: message === undefined ? '' : String(message), origin: window.location.origin });
+      return result;
+    };
+  }
+  window.alert = record('alert', undefined);
+  window.confirm = record('confirm', true);
+  window.prompt = record('prompt', null);
+})();
+"""
+
+READ_SCRIPT = "return window.__xssHarnessAlerts ? window.__xssHarnessAlerts.splice(0) : [];"
+
+# text: nội dung alert; origin: window.location.origin lúc alert (None nếu không lấy được)
+CapturedAlert = namedtuple("CapturedAlert", ["text", "origin"])
+
+_installed_sessions = set()
+_lock = threading.Lock()
+
+
+def install(driver):
+    """Installs the recorder for every new document of this driver. Returns False if unsupported."""
+    session_id = getattr(driver, "session_id", None)
+    with _lock:
+        if session_id in _installed_sessions:
+            return True
+    if not hasattr(driver, "execute_cdp_cmd"):
+        return False
+    try:
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": HOOK_SCRIPT})
+        driver.execute_script(HOOK_SCRIPT) # Trang hiện tại cũng cần hook
+    except Exception as e:
+        print(f"WARNING: Could not install alert hook: {e}")
+        return False
+    with _lock:
+        _installed_sessions.add(session_id)
+    return True
+
+
+def forget(driver):
+    """Drops the driver's session from the installed set (its hook script was removed)."""
+    with _lock:
+        _installed_sessions.discard(getattr(driver, "session_id", None))
+
+
+def prepare(driver, backend=BACKEND_DIALOG):
+    """Sets the driver up for the requested backend and returns the backend actually in use."""
+    if backend != BACKEND_HOOK:
+        return BACKEND_DIALOG
+    if install(driver):
+        return BACKEND_HOOK
+    print("WARNING: Alert hook needs a Chromium-based driver; falling back to dialog alerts.")
+    return BACKEND_DIALOG
+
+
+def read_alerts(driver):
+    """Returns and clears the calls recorded in the current document (hook backend)."""
+    try:
+        records = driver.execute_script(READ_SCRIPT) or []
+    except Exception:
+        return []
+    return [CapturedAlert(record.get("text", ""), record.get("origin")) for record in records]
+
+
+def wait_for_alert(driver, backend, timeout, post_accept_sleep=0):
+    """
+    Waits for the first alert triggered in the current page and returns it as a
+    CapturedAlert, or None if nothing was triggered within the timeout.
+    """
+    with metrics.timed(metrics.ALERT_WAIT):
+        return _wait_for_alert(driver, backend, timeout, post_accept_sleep)
+
+
+def _wait_for_alert(driver, backend, timeout, post_accept_sleep):
+    if backend == BACKEND_HOOK:
+        alerts = wait_for_recorded_alerts(driver, timeout)
+        return alerts[0] if alerts else None
+
+    alert_text = _accept_dialog(driver, timeout)
+    if alert_text is None:
+        return None
+    if post_accept_sleep:
+        time.sleep(post_accept_sleep)
+    return CapturedAlert(alert_text, _read_origin(driver))
+
+
+def _accept_dialog(driver, timeout):
+    """Accepts the next dialog and returns its text, or None if none opened within timeout."""
+    try:
+        WebDriverWait(driver, timeout).until(EC.alert_is_present())
+        alert = driver.switch_to.alert
+        alert_text = alert.text
+        alert.accept()
+    except (TimeoutException, NoAlertPresentException):
+        return None
+    return alert_text
+
+
+def _read_origin(driver):
+    """window.location.origin, or None. Never runs a script while a dialog is open (it would be dismissed)."""
+    try:
+        driver.switch_to.alert
+        return None
+    except NoAlertPresentException:
+        pass
+    except Exception:
+        return None
+    try:
+        return driver.execute_script("try { return window.location.origin; } catch (e) { return null; }")
+    except Exception:
+        return None
+
+
+def wait_for_all_alerts(driver, backend, timeout, post_accept_sleep=0, followup_timeout=0.5):
+    """
+    Collects every alert the current page triggers: the first one within timeout,
+    then (dialog backend) further dialogs until none opens within followup_timeout.
+    """
+    return collect_alerts(driver, backend, timeout, post_accept_sleep, followup_timeout)[0]
+
+
+def collect_alerts(driver, backend, timeout, post_accept_sleep=0, followup_timeout=0.5):
+    """
+    Like wait_for_all_alerts, but returns (alerts, complete). complete is False
+    when the dialog loop stopped on an error instead of a follow-up wait that
+    timed out, i.e. a later alert may have been lost.
+
+    Between dialogs no script runs: a stored page often opens the next alert
+    right after the previous one is accepted, and a script call at that moment
+    makes the driver dismiss it. The origin is read once, after the last dialog.
+    """
+    if backend == BACKEND_HOOK:
+        with metrics.timed(metrics.ALERT_WAIT):
+            return wait_for_recorded_alerts(driver, timeout), True
+    texts = []
+    complete = True
+    with metrics.timed(metrics.ALERT_WAIT):
+        try:
+            alert_text = _accept_dialog(driver, timeout)
+            while alert_text is not None:
+                texts.append(alert_text)
+                if post_accept_sleep:
+                    time.sleep(post_accept_sleep)
+                alert_text = _accept_dialog(driver, followup_timeout)
+        except Exception as e:
+            print(f"WARNING: Error while collecting alerts ({e}); later alerts may have been missed.")
+            complete = False
+    origin = _read_origin(driver) if texts else None
+    return [CapturedAlert(text, origin) for text in texts], complete
+
+
+def wait_for_recorded_alerts(driver, timeout, settle_time=HOOK_SETTLE_TIME):
+    """
+    Polls the recorder until at least one call is seen, or settle_time after the
+    document finished loading (page_load_strategy "eager"/"none" return before
+    that), never longer than timeout.
+    """
+    deadline = time.monotonic() + timeout
+    settle_deadline = None
+    while True:
+        alerts = read_alerts(driver)
+        now = time.monotonic()
+        if alerts or now >= deadline:
+            return alerts
+        if settle_deadline is None:
+            try:
+                if document_is_ready(driver):
+                    settle_deadline = now + settle_time
+            except Exception:
+                settle_deadline = now + settle_time
+        if settle_deadline is not None and now >= settle_deadline:
+            return alerts
+        time.sleep(HOOK_POLL_INTERVAL)
@@ -0,0 +1,411 @@
+"""
+Warm-browser daemon.
+
+Keeps a few pre-configured browser sessions running so short scans do not pay
+for starting ChromeDriver + Chrome (or geckodriver + Firefox) every time:
+
+    python -m xss_harness.browser_daemon --browser chrome --size 4
+    python run_all_tests.py -u "https://target.example/?q=1" --daemon
+    python -m xss_harness.browser_daemon --status | --stop
+
+The runner leases a session over a multiprocessing.connection socket and talks
+to its driver server directly through an attached ``webdriver.Remote``. The
+lease lasts as long as that connection: when the driver is "quit" the client
+removes the CDP setup it applied (alert hook script, blocked URLs) and the
+daemon resets the session and returns it to the warm pool. A Chromium session
+whose client died, or could not undo its setup, is discarded instead, so a
+later lease never inherits a hook that swallows real dialogs.
+
+Resetting clears storage with CDP ``Storage.clearDataForOrigin`` for every
+origin the lease touched: those the client navigated to, those in each tab's
+history and frame tree (redirects, iframes) and those of every cookie, then
+removes all cookies. Without CDP (Firefox) only the origin of the page left
+open can be cleared by script, plus the cookies WebDriver can see; storage of
+other origins then survives into the next lease.
+Connections are authenticated with a random key kept in the cache directory.
+"""
+import argparse
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Client, Listener
+from urllib.parse import urlparse
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.firefox.options import Options as FirefoxOptions
+
+from xss_harness import alert_hook
+from xss_harness.cache_dir import get_cache_dir
+from xss_harness.driver_pool import SUPPORTED_BROWSERS, create_driver
+from xss_harness.fast_navigation import PAGE_LOAD_STRATEGIES
+
+DEFAULT_ADDRESS = ("127.0.0.1", 47321)
+AUTHKEY_FILENAME = "authkey"
+DEFAULT_WARM_SESSIONS = 2
+
+# Xoá storage còn sót lại của lượt quét trước (chỉ origin của trang hiện tại; dự phòng khi không có CDP)
+CLEAR_STORAGE_SCRIPT = """
+try { window.localStorage.clear(); } catch (e) {}
+try { window.sessionStorage.clear(); } catch (e) {}
+"""
+
+
+def parse_address(text):
+    """'host:port' (or just 'port') -> (host, port)."""
+    host, _, port = text.rpartition(":")
+    return (host or DEFAULT_ADDRESS[0], int(port))
+
+
+def load_authkey(create=False):
+    """Reads the daemon's auth key from the cache directory, creating it (mode 0600) if asked."""
+    path = os.path.join(get_cache_dir("daemon"), AUTHKEY_FILENAME)
+    if create and not os.path.exists(path):
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(secrets.token_hex(32))
+    with open(path, "r") as f:
+        return f.read().strip().encode()
+
+
+def url_origin(url):
+    """scheme://host[:port] of an http(s) URL, else None."""
+    parsed = urlparse(url or "")
+    if parsed.scheme not in ("http", "https") or not parsed.netloc:
+        return None
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+def _frame_urls(tree):
+    yield tree.get("frame", {}).get("url")
+    for child in tree.get("childFrames", []):
+        yield from _frame_urls(child)
+
+
+def _tab_origins(driver):
+    """Origins in the current tab's navigation history and frame tree (CDP)."""
+    urls = [entry.get("url") for entry in driver.execute_cdp_cmd("Page.getNavigationHistory", {}).get("entries", [])]
+    urls.extend(_frame_urls(driver.execute_cdp_cmd("Page.getFrameTree", {}).get("frameTree", {})))
+    return {origin for origin in map(url_origin, urls) if origin}
+
+
+def _clear_origins(driver, origins):
+    """Clears the storage of origins and of every cookie's domain, then all cookies (CDP)."""
+    origins = set(origins)
+    for cookie in driver.execute_cdp_cmd("Network.getAllCookies", {}).get("cookies", []):
+        domain = cookie.get("domain", "").lstrip(".")
+        if domain:
+            origins.update((f"http://{domain}", f"https://{domain}"))
+    for origin in sorted(origins):
+        driver.execute_cdp_cmd("Storage.clearDataForOrigin", {"origin": origin, "storageTypes": "all"})
+    driver.execute_cdp_cmd("Network.clearBrowserCookies", {}) # Mọi domain, không chỉ trang hiện tại
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": []})
+
+
+def reset_session(driver, origins=()):
+    """
+    Brings a used session back to a clean about:blank state (one window, no
+    cookies or storage). origins are those the client reported navigating to.
+    """
+    try:
+        driver.switch_to.alert.accept()
+    except Exception:
+        pass
+    origins = set(origins)
+    cdp = hasattr(driver, "execute_cdp_cmd")
+    handles = driver.window_handles
+    for handle in reversed(handles): # Kết thúc ở cửa sổ đầu tiên
+        driver.switch_to.window(handle)
+        if cdp:
+            try:
+                origins |= _tab_origins(driver)
+            except Exception:
+                cdp = False
+        if handle != handles[0]:
+            driver.close()
+    driver.switch_to.window(handles[0])
+    driver.execute_script(CLEAR_STORAGE_SCRIPT)
+    if cdp:
+        try:
+            _clear_origins(driver, origins)
+        except Exception as e:
+            print(f"Warning: could not clear storage of every visited origin: {e}")
+    driver.delete_all_cookies()
+    driver.get("about:blank")
+
+
+class _WarmSession:
+    def __init__(self, driver, startup_seconds):
+        self.driver = driver
+        self.startup_seconds = startup_seconds
+
+
+class BrowserDaemon:
+    """Serves warm sessions of one browser configuration; keeps up to size of them idle."""
+
+    def __init__(self, browser="chrome", use_headless=True, size=DEFAULT_WARM_SESSIONS,
+                 address=DEFAULT_ADDRESS, authkey=None, page_load_strategy="normal", fast_navigation=False):
+        self.browser = browser.lower()
+        self.use_headless = use_headless
+        self.page_load_strategy = page_load_strategy
+        self.fast_navigation = fast_navigation
+        self.size = size
+        self.address = address
+        self.authkey = authkey or load_authkey(create=True)
+        self._idle = []
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self.leases = 0
+        self.saved_seconds = 0.0
+
+    @property
+    def config(self):
+        """Session configuration a lease request must match."""
+        return {"browser": self.browser, "headless": self.use_headless,
+                "page_load_strategy": self.page_load_strategy, "fast_navigation": self.fast_navigation}
+
+    def _launch(self):
+        started = time.monotonic()
+        driver = create_driver(self.browser, self.use_headless, self.page_load_strategy, self.fast_navigation)
+        return _WarmSession(driver, time.monotonic() - started)
+
+    def warm_up(self):
+        """Starts size sessions concurrently."""
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            futures = [executor.submit(self._launch) for _ in range(self.size)]
+            for future in futures:
+                try:
+                    session = future.result()
+                except Exception as e:
+                    print(f"Warning: could not start a warm {self.browser} session: {e}")
+                    continue
+                self._idle.append(session)
+        print(f"{len(self._idle)} warm {self.browser} session(s) ready.")
+
+    def _checkout(self):
+        with self._lock:
+            session = self._idle.pop() if self._idle else None
+        if session is None:
+            print("No idle warm session; starting a new one for this lease.")
+            return self._launch(), False
+        return session, True
+
+    def _checkin(self, session, clean=True, origins=()):
+        if not clean and self.browser == "chrome":
+            # Script hook (Page.addScriptToEvaluateOnNewDocument) có thể vẫn còn: không cho thuê lại
+            print("Lease ended without removing its CDP setup; discarding the session.")
+            self._dispose(session)
+            return
+        try:
+            reset_session(session.driver, origins)
+        except Exception as e:
+            print(f"Warning: could not reset session, discarding it: {e}")
+            self._dispose(session)
+            return
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(session)
+                return
+        self._dispose(session)
+
+    def _dispose(self, session):
+        try:
+            session.driver.quit()
+        except Exception:
+            pass
+
+    def _handle(self, conn):
+        try:
+            message = conn.recv()
+            op = message.get("op")
+            if op == "status":
+                with self._lock:
+                    conn.send({"ok": True, "config": self.config, "idle": len(self._idle),
+                               "leases": self.leases, "saved_seconds": self.saved_seconds})
+            elif op == "shutdown":
+                conn.send({"ok": True})
+                self._stopping.set()
+                Client(self.address, authkey=self.authkey).close() # Đánh thức accept()
+            elif op == "lease":
+                if message.get("config") != self.config:
+                    conn.send({"ok": False, "error": f"daemon serves {self.config} sessions"})
+                    return
+                self._serve_lease(conn)
+            else:
+                conn.send({"ok": False, "error": f"unknown op {op!r}"})
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def _serve_lease(self, conn):
+        session, warm = self._checkout()
+        saved = session.startup_seconds if warm else 0.0
+        with self._lock:
+            self.leases += 1
+            self.saved_seconds += saved
+        driver = session.driver
+        clean = False # Chỉ True khi client báo đã gỡ hết thiết lập CDP
+        origins = []
+        try:
+            conn.send({"ok": True, "executor_url": driver.command_executor.client_config.remote_server_addr,
+                       "session_id": driver.session_id, "capabilities": driver.caps, "saved_seconds": saved})
+            # Giữ lease cho tới khi client gửi "release" hoặc mất kết nối
+            while True:
+                message = conn.recv()
+                if message.get("op") == "release":
+                    clean = bool(message.get("clean"))
+                    origins = message.get("origins") or []
+                    break
+        except (EOFError, OSError):
+            pass
+        finally:
+            self._checkin(session, clean, origins)
+
+    def serve_forever(self):
+        self.warm_up()
+        with Listener(self.address, authkey=self.authkey) as listener:
+            print(f"Browser daemon listening on {self.address[0]}:{self.address[1]}")
+            while not self._stopping.is_set():
+                try:
+                    conn = listener.accept()
+                except Exception as e:
+                    print(f"Warning: rejected connection: {e}")
+                    continue
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        self.close()
+
+    def close(self):
+        with self._lock:
+            sessions, self._idle = self._idle, []
+        for session in sessions:
+            self._dispose(session)
+        print(f"Browser daemon stopped ({self.leases} leases, ~{self.saved_seconds:.1f}s of startup saved).")
+
+
+class AttachedDriver(webdriver.Remote):
+    """
+    webdriver.Remote bound to a session leased from the daemon. start_session
+    adopts the existing session instead of creating one, and quit() undoes the
+    CDP setup applied through it and hands it back instead of closing the browser.
+    """
+
+    def __init__(self, conn, lease, options):
+        self._lease_conn = conn
+        self._lease = lease
+        self._script_ids = [] # identifier của Page.addScriptToEvaluateOnNewDocument
+        self._blocked_urls = False
+        self._origins = set() # Origin đã điều hướng tới, báo cho daemon để xoá storage khi trả session
+        self.saved_startup_seconds = lease.get("saved_seconds", 0.0)
+        # options chỉ dùng để chọn RemoteConnection phù hợp (Chrome -> ChromiumRemoteConnection có lệnh CDP)
+        super().__init__(command_executor=lease["executor_url"], options=options)
+
+    def start_session(self, capabilities):
+        self.session_id = self._lease["session_id"]
+        self.caps = self._lease["capabilities"]
+
+    def get(self, url):
+        origin = url_origin(url)
+        if origin:
+            self._origins.add(origin)
+        return super().get(url)
+
+    def execute_cdp_cmd(self, cmd, cmd_args):
+        result = super().execute_cdp_cmd(cmd, cmd_args)
+        if cmd == "Page.addScriptToEvaluateOnNewDocument" and result.get("identifier"):
+            self._script_ids.append(result["identifier"])
+        elif cmd == "Network.setBlockedURLs":
+            self._blocked_urls = bool(cmd_args.get("urls"))
+        return result
+
+    def _undo_cdp_setup(self):
+        """Removes the scripts and blocked URLs added through this lease. Returns False if any could not be undone."""
+        clean = True
+        for identifier in self._script_ids:
+            try:
+                super().execute_cdp_cmd("Page.removeScriptToEvaluateOnNewDocument", {"identifier": identifier})
+            except Exception as e:
+                print(f"Warning: could not remove injected script from the leased session: {e}")
+                clean = False
+        self._script_ids = []
+        alert_hook.forget(self)
+        if self._blocked_urls:
+            try:
+                super().execute_cdp_cmd("Network.setBlockedURLs", {"urls": []})
+                self._blocked_urls = False
+            except Exception as e:
+                print(f"Warning: could not clear blocked URLs of the leased session: {e}")
+                clean = False
+        return clean
+
+    def quit(self):
+        conn, self._lease_conn = self._lease_conn, None
+        if conn is None:
+            return
+        clean = self._undo_cdp_setup()
+        try:
+            conn.send({"op": "release", "clean": clean, "origins": sorted(self._origins)})
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+
+def _request(message, address, authkey):
+    conn = Client(address, authkey=authkey)
+    conn.send(message)
+    return conn, conn.recv()
+
+
+def attach_driver(browser="chrome", use_headless=True, address=DEFAULT_ADDRESS, page_load_strategy="normal",
+                  fast_navigation=False, authkey=None):
+    """Leases a warm session from the daemon. Raises OSError/RuntimeError if none can be had."""
+    browser = browser.lower()
+    config = {"browser": browser, "headless": use_headless,
+              "page_load_strategy": page_load_strategy, "fast_navigation": fast_navigation}
+    conn, reply = _request({"op": "lease", "config": config}, address, authkey or load_authkey())
+    if not reply.get("ok"):
+        conn.close()
+        raise RuntimeError(reply.get("error", "lease refused"))
+    options = ChromeOptions() if browser == "chrome" else FirefoxOptions()
+    try:
+        return AttachedDriver(conn, reply, options)
+    except Exception:
+        conn.close()
+        raise
+
+
+def attach_or_create_driver(browser="chrome", use_headless=True, address=DEFAULT_ADDRESS, page_load_strategy="normal",
+                            fast_navigation=False):
+    """attach_driver, falling back to a locally started driver when the daemon is unavailable."""
+    try:
+        return attach_driver(browser, use_headless, address, page_load_strategy, fast_navigation)
+    except Exception as e:
+        print(f"WARNING: Browser daemon unavailable ({e}); starting a local {browser} driver.")
+        return create_driver(browser, use_headless, page_load_strategy, fast_navigation)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep warm browser sessions for run_all_tests.py --daemon.")
+    parser.add_argument("-b", "--browser", default="chrome", choices=list(SUPPORTED_BROWSERS), help="Browser to keep warm (default: chrome)")
+    parser.add_argument("--no-headless", action="store_true", help="Disable headless mode")
+    parser.add_argument("--size", type=int, default=DEFAULT_WARM_SESSIONS, help=f"Warm sessions to keep ready (default: {DEFAULT_WARM_SESSIONS})")
+    parser.add_argument("--address", default=f"{DEFAULT_ADDRESS[0]}:{DEFAULT_ADDRESS[1]}", help="host:port to listen on")
+    parser.add_argument("--page-load-strategy", default="normal", choices=list(PAGE_LOAD_STRATEGIES), help="Page load strategy of the warm sessions (default: normal)")
+    parser.add_argument("--fast-navigation", action="store_true", help="Create sessions for run_all_tests.py --fast-navigation")
+    parser.add_argument("--status", action="store_true", help="Print the running daemon's status and exit")
+    parser.add_argument("--stop", action="store_true", help="Stop the running daemon")
+    args = parser.parse_args()
+    address = parse_address(args.address)
+
+    if args.status or args.stop:
+        conn, reply = _request({"op": "status" if args.status else "shutdown"}, address, load_authkey())
+        conn.close()
+        print(reply)
+    else:
+        if args.size < 1:
+            parser.error("--size must be at least 1")
+        BrowserDaemon(args.browser, not args.no_headless, args.size, address,
+                      page_load_strategy=args.page_load_strategy, fast_navigation=args.fast_navigation).serve_forever()
@@ -0,0 +1,13 @@
+import os
+from pathlib import Path
+
+CACHE_DIR_ENV = "SELENIUM_XSS_CACHE_DIR"
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "selenium-xss"
+
+
+def get_cache_dir(*parts):
+    """Returns (and creates) a sub-directory of the on-disk cache ($SELENIUM_XSS_CACHE_DIR overrides the base)."""
+    base = Path(os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR)
+    path = base.joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
@@ -0,0 +1,133 @@
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from xss_harness.discovery import DiscoveryCache
+from xss_harness.journal import ProbeJournal
+from xss_harness.metrics import MetricsRecorder
+from xss_harness.payload_scheduler import PayloadScheduler
+from xss_harness.probe_planner import ProbePlanner
+from xss_harness.rescan_cache import RescanCache
+from xss_harness.results import Finding, ResultStream
+from xss_harness.targets import ScanTarget
+
+
+@dataclass
+class ScanContext:
+    """
+    Per-run options and shared services handed to a test script's run_test.
+
+    Test scripts accept it as an optional ``context`` argument so they still work
+    when called as ``run_test(driver, target_url)``; every field has a default
+    that reproduces the original single-driver behaviour.
+    """
+
+    # Tạo thêm WebDriver (cùng cấu hình với driver chính) cho chế độ sharded
+    driver_factory: Optional[Callable[[], WebDriver]] = None
+    # Số browser session dùng song song cho một module (1 = tuần tự như cũ)
+    shard_count: int = 1
+    # Cách phát hiện alert: "dialog" (chờ hộp thoại thật) hoặc "hook" (xem xss_harness.alert_hook)
+    alert_backend: str = "dialog"
+    # Gửi canary qua HTTP trước, chỉ đưa các tham số được phản chiếu vào browser
+    reflection_prefilter: bool = False
+    # Chỉ thử payload phù hợp với ngữ cảnh phản chiếu (cần reflection_prefilter)
+    payload_context_filter: bool = False
+    # Cache trang/form dùng chung giữa các module trong một lượt chạy (xss_harness.discovery)
+    discovery: Optional[DiscoveryCache] = None
+    # Gửi POST của stored XSS qua "browser" (fetch trong trang) hoặc "http" (requests + cookie của browser)
+    submit_engine: str = "browser"
+    # Target đang quét (method/url/body từ --targets); None khi chạy với một -u
+    target: Optional[ScanTarget] = None
+    # Chặn ảnh/font/CSS/analytics trong các vòng probe (xss_harness.fast_navigation)
+    fast_navigation: bool = False
+    # Thu thập thời gian từng phase (xss_harness.metrics); None = tắt
+    metrics: Optional[MetricsRecorder] = None
+    # Luồng kết quả JSONL của lượt chạy (xss_harness.results); None = không ghi
+    results: Optional[ResultStream] = None
+    # Module đang chạy và thời điểm bắt đầu (runner điền cho từng job)
+    module_name: Optional[str] = None
+    module_started: Optional[float] = None
+    # Journal các probe đã xong để chạy tiếp sau khi bị ngắt (xss_harness.journal); None = tắt
+    journal: Optional[ProbeJournal] = None
+    # Kết quả probe giữa các lần chạy, bỏ qua probe âm tính khi fingerprint không đổi (xss_harness.rescan_cache)
+    rescan_cache: Optional[RescanCache] = None
+    # {tham số/trường: fingerprint} của job hiện tại; script điền trước khi probe (runner tạo dict mới mỗi job)
+    fingerprints: dict = field(default_factory=dict)
+    # Sắp xếp payload theo tỉ lệ trúng trong quá khứ (xss_harness.payload_scheduler); None = thứ tự file
+    payload_scheduler: Optional[PayloadScheduler] = None
+    # {tham số: ngữ cảnh phản chiếu} của các vị trí đã được order_payloads sắp xếp (runner tạo dict mới mỗi job)
+    injection_contexts: dict = field(default_factory=dict)
+    # Browser của pool chạy job (runner điền; khoá journal/rescan cache theo engine)
+    browser: Optional[str] = None
+    # Chế độ chỉ xác nhận: [(tham số/trường, payload)] lấy từ finding của browser đầu tiên; None = quét đầy đủ
+    focus: Optional[list] = None
+    # Gộp probe GET của nhiều script vào chung lần tải trang (xem xss_harness.probe_planner); None = tắt
+    probe_planner: Optional[ProbePlanner] = None
+
+    def report_finding(self, location, payload, marker=None, alert_text=None):
+        """Records a confirmed finding for the running module (no-op without a result stream)."""
+        if self.results is None:
+            return
+        elapsed = time.monotonic() - self.module_started if self.module_started is not None else None
+        self.results.add_finding(Finding(module=self.module_name or "", target=self.target.key if self.target else "",
+                                         location=location, payload=payload, marker=marker,
+                                         alert_text=alert_text, elapsed=elapsed, browser=self.browser))
+
+    @property
+    def _probe_module(self):
+        # Kết quả probe phụ thuộc engine: tách journal/rescan cache theo browser
+        module = self.module_name or ""
+        return f"{module}@{self.browser}" if self.browser else module
+
+    def _journal_key(self):
+        return (self.target.key if self.target else "", self._probe_module)
+
+    def journaled(self, location, payload):
+        """JournalEntry of a probe completed in an earlier run, or None."""
+        if self.journal is None:
+            return None
+        return self.journal.get(*self._journal_key(), location, payload)
+
+    def journaled_hits(self):
+        """Journaled probes of the running module that triggered an alert."""
+        if self.journal is None:
+            return []
+        return self.journal.hits(*self._journal_key())
+
+    def skip_probe(self, location, payload):
+        """True if the probe is already in the journal, or known negative for an unchanged fingerprint."""
+        if self.journaled(location, payload) is not None:
+            return True
+        fingerprint = self.fingerprints.get(location)
+        if self.rescan_cache is None or fingerprint is None or self.target is None:
+            return False
+        return self.rescan_cache.is_known_negative(self.target.url, self._probe_module, location, payload, fingerprint)
+
+    def record_probe(self, location, payload, alert_text=None):
+        """Checkpoints a completed probe in the journal and, if location has a fingerprint, the rescan cache."""
+        if self.journal is not None:
+            self.journal.record(*self._journal_key(), location, payload, alert_text)
+        fingerprint = self.fingerprints.get(location)
+        if self.rescan_cache is not None and fingerprint is not None and self.target is not None:
+            self.rescan_cache.record(self.target.url, self._probe_module, location, payload, fingerprint, alert_text)
+        if self.payload_scheduler is not None and location in self.injection_contexts:
+            self.payload_scheduler.record(payload, alert_text is not None, self.injection_contexts[location], fingerprint)
+
+    def order_payloads(self, location, payloads, contexts=()):
+        """payloads for location, most promising first (unchanged without a scheduler); outcomes are then fed back by record_probe."""
+        if self.payload_scheduler is None:
+            return payloads
+        self.injection_contexts[location] = set(contexts)
+        return self.payload_scheduler.order(payloads, contexts, self.fingerprints.get(location))
+
+    def in_focus(self, location):
+        """False if a confirm-only job was not asked to check location."""
+        return self.focus is None or any(focus_location == location for focus_location, _ in self.focus)
+
+    def focus_payloads(self, location, payloads):
+        """The payloads to confirm at location in a confirm-only job, otherwise payloads unchanged."""
+        if self.focus is None:
+            return payloads
+        return [payload for focus_location, payload in self.focus if focus_location == location]
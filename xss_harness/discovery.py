@@ -0,0 +1,124 @@
+"""
+Per-run page discovery cache shared by the test scripts.
+
+The first script that needs a target URL loads it once and extracts its POST
+form. Later scripts, and later calls from other workers, reuse the cached
+PageInfo instead of waiting for and analysing the form again. Only the form's
+structure is shared: field values (CSRF tokens, nonces) belong to one browser
+session and are read again from each driver's own copy of the page.
+"""
+import threading
+from dataclasses import dataclass, field
+from typing import Optional
+from urllib.parse import urlparse, parse_qsl
+
+from xss_harness import metrics
+from xss_harness.forms import extract_forms, find_post_form, form_from_body, initial_form_data, FORM_WAIT_TIMEOUT
+from xss_harness.waits import wait_for_document_ready
+
+
+def query_param_names(url):
+    """Sorted unique query parameter names of url."""
+    return sorted({key for key, _ in parse_qsl(urlparse(url).query, keep_blank_values=True)})
+
+
+def same_origin(url_a, url_b):
+    a, b = urlparse(url_a), urlparse(url_b)
+    return (a.scheme, a.netloc) == (b.scheme, b.netloc)
+
+
+@dataclass
+class PageInfo:
+    url: str
+    param_names: list
+    form_action_url: Optional[str] = None
+    initial_form_data: dict = field(default_factory=dict) # Giá trị của session đã discover, không dùng lại
+    form: Optional[dict] = None # Form POST đã serialize (xem xss_harness.forms)
+
+    @property
+    def has_post_form(self):
+        return self.form is not None
+
+
+class DiscoveryCache:
+    """Thread-safe {url: PageInfo} cache; each URL is loaded at most once per run."""
+
+    def __init__(self, form_wait_timeout=FORM_WAIT_TIMEOUT):
+        self.form_wait_timeout = form_wait_timeout
+        self._pages = {}
+        self._url_locks = {}
+        self._lock = threading.Lock()
+
+    def peek(self, url):
+        with self._lock:
+            return self._pages.get(url)
+
+    def get(self, driver, url):
+        """Returns the PageInfo for url, loading it with driver on the first call."""
+        with self._lock:
+            url_lock = self._url_locks.setdefault(url, threading.Lock())
+        with url_lock:
+            page = self.peek(url)
+            if page is None:
+                page = self._discover(driver, url)
+                with self._lock:
+                    self._pages[url] = page
+            return page
+
+    def _discover(self, driver, url):
+        print(f"Discovering {url} (page load + form extraction, cached for this run)...")
+        with metrics.timed(metrics.NAVIGATE):
+            driver.get(url)
+        wait_for_document_ready(driver)
+        page = PageInfo(url=url, param_names=query_param_names(url))
+        found_form = find_post_form(driver, url, self.form_wait_timeout)
+        if found_form is not None:
+            page.form_action_url, page.initial_form_data, page.form = found_form
+        return page
+
+
+def load_post_form(driver, target_url, discovery=None, target=None):
+    """
+    Leaves driver on target_url's origin and returns (form_action_url,
+    initial_form_data, form) for its first POST form, or None.
+
+    For a POST target (xss_harness.targets.ScanTarget) the form is the target's
+    own request: its body fields are submitted to its URL, and the page is not
+    searched for a form. With a DiscoveryCache the page is analysed once per
+    run; the field values are still read from the driver's own copy of the
+    page (one execute_script), so CSRF tokens match its session.
+    """
+    if target is not None and target.method == "POST":
+        if not same_origin(driver.current_url, target_url):
+            with metrics.timed(metrics.NAVIGATE):
+                driver.get(target_url)
+            wait_for_document_ready(driver)
+        form = form_from_body(target.url, target.body)
+        if form is None:
+            return None
+        return form["action"], initial_form_data(form), form
+
+    if discovery is None:
+        with metrics.timed(metrics.NAVIGATE):
+            driver.get(target_url)
+        wait_for_document_ready(driver)
+        return find_post_form(driver, target_url)
+
+    page = discovery.get(driver, target_url)
+    if not page.has_post_form:
+        return None
+    if driver.current_url != target_url:
+        with metrics.timed(metrics.NAVIGATE):
+            driver.get(target_url)
+        wait_for_document_ready(driver)
+    return _session_form_values(driver, target_url, page)
+
+
+def _session_form_values(driver, target_url, page):
+    """The cached form re-read from the driver's current page, so token values are this session's."""
+    forms = extract_forms(driver)
+    form = next((f for f in forms if f["action"] == page.form_action_url), forms[0] if forms else None)
+    if form is None:
+        # Form do JavaScript tạo có thể chưa xuất hiện: chờ như lần discover
+        return find_post_form(driver, target_url)
+    return form["action"], initial_form_data(form), form
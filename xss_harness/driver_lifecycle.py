@@ -0,0 +1,232 @@
+"""
+Browser recycling for long runs.
+
+Thousands of driver.get() calls on one browser process make it grow and slow
+down. ManagedDriver wraps a driver from a factory and forwards everything to
+it, counting navigations and, every RSS_CHECK_INTERVAL navigations, the
+resident memory of the driver's process tree (psutil if installed, else
+/proc). When max_navigations or max_rss_mb is crossed, the next get() first
+replaces the browser:
+
+1. a new browser is started with the same factory;
+2. the CDP setup the scripts applied (alert hook, blocked URLs of the fast
+   navigation profile) is replayed on it;
+3. the cookies of every domain (CDP) or of the current page are copied over
+   (the latter by loading the root of the page's origin, not the page itself),
+   so logged-in sessions survive;
+4. the old browser is quit.
+
+Pools and scripts keep using the same ManagedDriver object. localStorage and
+open windows are not carried over.
+
+    python run_all_tests.py --targets targets.txt --workers 4 --recycle-after 500 --max-browser-rss 1500
+"""
+import os
+import time
+from urllib.parse import urlparse
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+RSS_CHECK_INTERVAL = 50 # Đo RSS sau mỗi bấy nhiêu lần điều hướng (duyệt cây tiến trình không miễn phí)
+# Lệnh CDP thay đổi trạng thái của cả session: chạy lại trên browser mới
+REPLAYED_CDP_COMMANDS = ("Network.enable", "Network.setBlockedURLs", "Page.addScriptToEvaluateOnNewDocument")
+# Các trường Network.setCookies nhận (CookieParam); Network.getAllCookies trả thêm trường chỉ đọc làm cả lệnh lỗi
+COOKIE_PARAM_KEYS = ("name", "value", "url", "domain", "path", "secure", "httpOnly", "sameSite", "expires",
+                     "priority", "sameParty", "sourceScheme", "sourcePort", "partitionKey")
+
+
+def _proc_children():
+    """{ppid: [pid, ...]} from /proc."""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "r") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # Tên tiến trình (trong ngoặc) có thể chứa khoảng trắng: tách sau dấu ')' cuối
+        fields = stat[stat.rfind(")") + 2:].split()
+        children.setdefault(int(fields[1]), []).append(int(entry))
+    return children
+
+
+def process_tree_rss(pid):
+    """Resident memory in bytes of pid and all its descendants, or None if it cannot be measured."""
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            tree = [process] + process.children(recursive=True)
+        except psutil.Error:
+            return None
+        total = 0
+        for p in tree:
+            try:
+                total += p.memory_info().rss
+            except psutil.Error:
+                pass # Tiến trình con vừa thoát
+        return total
+    if not os.path.isdir("/proc"):
+        return None
+    children = _proc_children()
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        try:
+            with open(f"/proc/{current}/statm", "r") as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            if current == pid:
+                return None
+        stack.extend(children.get(current, []))
+    return total
+
+
+def driver_pid(driver):
+    """PID of the driver service (chromedriver/geckodriver) whose children are the browser, or None (remote/attached)."""
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+def cookie_param(cookie):
+    """A Network.getAllCookies cookie reduced to the CookieParam keys Network.setCookies accepts."""
+    param = {key: cookie[key] for key in COOKIE_PARAM_KEYS if key in cookie}
+    if param.get("expires") == -1:
+        del param["expires"] # -1 = cookie phiên
+    return param
+
+
+class ManagedDriver:
+    """WebDriver proxy that replaces its browser once it has navigated or grown too much."""
+
+    def __init__(self, factory, max_navigations=None, max_rss_mb=None):
+        self._factory = factory
+        self.max_navigations = max_navigations
+        self.max_rss_mb = max_rss_mb
+        self.recycles = 0
+        self._cdp_setup = [] # (cmd, args) cần chạy lại trên browser mới
+        self._driver = factory()
+        self._navigations = 0
+
+    def __getattr__(self, name):
+        if name == "_driver":
+            raise AttributeError(name) # Chưa có browser (factory lỗi trong __init__)
+        attribute = getattr(self._driver, name)
+        if name == "execute_cdp_cmd":
+            return self._execute_cdp_cmd
+        return attribute
+
+    @property
+    def driver(self):
+        """The browser currently behind the proxy."""
+        return self._driver
+
+    @property
+    def navigations(self):
+        """Navigations of the current browser."""
+        return self._navigations
+
+    def _execute_cdp_cmd(self, cmd, cmd_args):
+        result = self._driver.execute_cdp_cmd(cmd, cmd_args)
+        if cmd in REPLAYED_CDP_COMMANDS and (cmd, cmd_args) not in self._cdp_setup:
+            if cmd != "Page.addScriptToEvaluateOnNewDocument":
+                # Chỉ giá trị mới nhất có hiệu lực (vd. danh sách URL bị chặn)
+                self._cdp_setup = [(c, a) for c, a in self._cdp_setup if c != cmd]
+            self._cdp_setup.append((cmd, cmd_args))
+        return result
+
+    def rss_mb(self):
+        """Resident memory of the browser in MB, or None if it cannot be measured."""
+        pid = driver_pid(self._driver)
+        rss = process_tree_rss(pid) if pid is not None else None
+        return rss / (1024 * 1024) if rss is not None else None
+
+    def _recycle_reason(self):
+        if self.max_navigations and self._navigations >= self.max_navigations:
+            return f"{self._navigations} navigations"
+        if self.max_rss_mb and self._navigations and self._navigations % RSS_CHECK_INTERVAL == 0:
+            rss = self.rss_mb()
+            if rss is not None and rss >= self.max_rss_mb:
+                return f"RSS {rss:.0f} MB"
+        return None
+
+    def get(self, url):
+        reason = self._recycle_reason()
+        if reason is not None:
+            self.recycle(reason)
+        self._navigations += 1
+        return self._driver.get(url)
+
+    def _copy_cookies(self, old):
+        """Cookies of every domain via CDP, else those visible on the old browser's current page."""
+        try:
+            return "cdp", old.execute_cdp_cmd("Network.getAllCookies", {}).get("cookies", [])
+        except Exception:
+            pass
+        try:
+            return "page", old.get_cookies()
+        except Exception:
+            return "page", []
+
+    def _restore_cookies(self, new, source, cookies, url):
+        if not cookies:
+            return
+        if source == "cdp":
+            params = [cookie_param(cookie) for cookie in cookies]
+            new.execute_cdp_cmd("Network.setCookies", {"cookies": params})
+            return
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https"):
+            return
+        # WebDriver chỉ thêm cookie cho domain của trang hiện tại. Gốc của origin thay vì
+        # URL hiện tại: trang cuối có thể là URL tấn công, tải lại sẽ chạy payload lần nữa
+        new.get(f"{parsed.scheme}://{parsed.netloc}/")
+        self._navigations += 1
+        for cookie in cookies:
+            try:
+                new.add_cookie(cookie)
+            except Exception as e:
+                print(f"Warning: could not restore cookie '{cookie.get('name')}': {e}")
+
+    def recycle(self, reason="requested"):
+        """Starts a new browser, carries the session over and quits the old one."""
+        old = self._driver
+        try:
+            url = old.current_url
+        except Exception:
+            url = ""
+        started = time.monotonic()
+        try:
+            new = self._factory()
+        except Exception as e:
+            print(f"Warning: could not start a replacement browser ({reason}): {e}; keeping the current one.")
+            self._navigations = 0 # Không thử lại ở mọi lần get()
+            return
+        for cmd, cmd_args in self._cdp_setup:
+            try:
+                new.execute_cdp_cmd(cmd, cmd_args)
+            except Exception as e:
+                print(f"Warning: could not replay {cmd} on the replacement browser: {e}")
+        source, cookies = self._copy_cookies(old)
+        self._driver = new
+        self._navigations = 0
+        try:
+            self._restore_cookies(new, source, cookies, url)
+        except Exception as e:
+            print(f"Warning: could not restore cookies on the replacement browser: {e}")
+        try:
+            old.quit()
+        except Exception as e:
+            print(f"Warning: error while closing recycled WebDriver: {e}")
+        self.recycles += 1
+        print(f"Recycled browser ({reason}) in {time.monotonic() - started:.1f}s; {len(cookies)} cookies restored.")
+
+    def quit(self):
+        self._driver.quit()
@@ -0,0 +1,118 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.firefox.options import Options as FirefoxOptions
+
+from xss_harness.fast_navigation import FIREFOX_PREFS
+
+SUPPORTED_BROWSERS = ("chrome", "firefox")
+
+
+def create_driver(browser='chrome', use_headless=True, page_load_strategy="normal", fast_navigation=False):
+    """
+    Creates a single WebDriver instance for the given browser.
+
+    page_load_strategy is passed to the driver ("eager" returns from get() at
+    DOMContentLoaded, "none" immediately). fast_navigation sets the Firefox
+    preferences of the fast navigation profile (Chromium blocks resources per
+    probe loop instead, see xss_harness.fast_navigation).
+    """
+    browser = browser.lower()
+    if browser == 'chrome':
+        options = ChromeOptions()
+        options.page_load_strategy = page_load_strategy
+        if use_headless:
+            options.add_argument("--headless")
+        options.add_argument("--no-sandbox") # Thường cần thiết trong môi trường container/CI
+        options.add_argument("--disable-dev-shm-usage") # Thường cần thiết
+        # options.add_argument("--window-size=1920,1080") # Có thể cần thiết cho headless
+        return webdriver.Chrome(options=options)
+    if browser == 'firefox':
+        options = FirefoxOptions()
+        options.page_load_strategy = page_load_strategy
+        if use_headless:
+            options.add_argument("--headless")
+        if fast_navigation:
+            for name, value in FIREFOX_PREFS.items():
+                options.set_preference(name, value)
+        driver = webdriver.Firefox(options=options)
+        driver.fast_navigation_prefs = fast_navigation # blocked_resources không cần cảnh báo thiếu CDP
+        return driver
+    raise ValueError(f"Unsupported browser '{browser}'")
+
+
+class WebDriverPool:
+    """
+    A fixed-size pool of WebDriver instances.
+
+    Drivers are started in parallel when the pool is opened. Each caller borrows a
+    driver with ``acquire()`` and gets it back into the pool when the block exits,
+    so one driver is only ever used by one thread at a time.
+    """
+
+    def __init__(self, size, factory, dispose=None):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.size = size
+        self._factory = factory
+        self._dispose = dispose or (lambda driver: driver.quit())
+        self._idle = queue.Queue()
+        self._drivers = []
+        self._lock = threading.Lock()
+
+    def open(self):
+        """Starts ``size`` drivers concurrently. Fails if none could be started."""
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            futures = [executor.submit(self._factory) for _ in range(self.size)]
+            for future in futures:
+                try:
+                    self._add(future.result())
+                except Exception as e:
+                    errors.append(e)
+        if not self._drivers:
+            raise RuntimeError(f"Could not start any WebDriver: {errors[0]}")
+        if errors:
+            print(f"Warning: only {len(self._drivers)}/{self.size} WebDrivers started ({errors[0]})")
+            self.size = len(self._drivers)
+        return self
+
+    @property
+    def drivers(self):
+        """The drivers currently owned by the pool."""
+        with self._lock:
+            return list(self._drivers)
+
+    def _add(self, driver):
+        with self._lock:
+            self._drivers.append(driver)
+        self._idle.put(driver)
+
+    @contextmanager
+    def acquire(self):
+        """Borrows an idle driver, blocking until one is free."""
+        driver = self._idle.get()
+        try:
+            yield driver
+        finally:
+            self._idle.put(driver)
+
+    def close(self):
+        """Disposes every driver owned by the pool."""
+        with self._lock:
+            drivers, self._drivers = self._drivers, []
+        for driver in drivers:
+            try:
+                self._dispose(driver)
+            except Exception as e:
+                print(f"Warning: error while closing WebDriver: {e}")
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,69 @@
+"""
+Fast navigation profile for probe page loads.
+
+Detection only needs the reflected main document, so while a probe loop runs
+the subresources it would otherwise pull in (images, fonts, stylesheets, media,
+common analytics/ad scripts) are blocked with CDP ``Network.setBlockedURLs``.
+Chromium only; Firefox gets the closest equivalent through preferences set when
+the driver is created (see xss_harness.driver_pool.create_driver). A driver
+without CDP is warned about once, and not at all if it has those preferences.
+"""
+import threading
+from contextlib import contextmanager
+
+BLOCKED_URL_PATTERNS = (
+    # Ảnh, font, CSS, media
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.bmp", "*.avif",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.css",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg", "*.wav",
+    # Analytics / quảng cáo bên thứ ba phổ biến
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*googlesyndication.com*", "*facebook.net*", "*hotjar.com*", "*segment.io*",
+)
+
+# Preference Firefox tương đương (áp dụng cho cả session)
+FIREFOX_PREFS = {
+    "permissions.default.image": 2,           # Không tải ảnh
+    "browser.display.use_document_fonts": 0, # Không tải web font
+    "media.autoplay.default": 5,              # Chặn mọi autoplay
+}
+
+PAGE_LOAD_STRATEGIES = ("normal", "eager", "none")
+
+_warned_sessions = set() # Session đã được cảnh báo thiếu CDP
+_warned_lock = threading.Lock()
+
+
+def set_blocked_urls(driver, patterns):
+    """Replaces the driver's blocked URL patterns. Returns False if the driver has no CDP."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+    except Exception:
+        return False
+    return True
+
+
+def _warn_no_cdp(driver):
+    if getattr(driver, "fast_navigation_prefs", False):
+        return # Firefox đã có profile preference tương đương
+    session_id = getattr(driver, "session_id", None)
+    with _warned_lock:
+        if session_id in _warned_sessions:
+            return
+        _warned_sessions.add(session_id)
+    print("WARNING: Resource blocking needs a Chromium-based driver; loading pages with all resources.")
+
+
+@contextmanager
+def blocked_resources(driver, enabled=True, patterns=BLOCKED_URL_PATTERNS):
+    """Blocks patterns on driver for the duration of the block; yields whether blocking is active."""
+    active = enabled and set_blocked_urls(driver, patterns)
+    if enabled and not active:
+        _warn_no_cdp(driver)
+    try:
+        yield active
+    finally:
+        if active:
+            set_blocked_urls(driver, [])
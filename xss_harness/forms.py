@@ -0,0 +1,97 @@
+"""
+One-round-trip form extraction.
+
+Reading a form with ``find_elements`` / ``get_attribute`` costs one WebDriver
+HTTP round trip per field and attribute. ``extract_forms`` serializes the forms
+(action, method, fields, defaults and select options) with a single
+``execute_script`` instead.
+"""
+from urllib.parse import urljoin, parse_qsl
+
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+POST_FORM_SELECTOR = "form[method='POST']"
+FORM_WAIT_TIMEOUT = 10
+
+# arguments[0]: một <form> cụ thể, hoặc null để lấy mọi form khớp arguments[1]
+FORM_EXTRACTION_SCRIPT = """
+var forms = arguments[0] ? [arguments[0]] : Array.prototype.slice.call(document.querySelectorAll(arguments[1]));
+return forms.map(function (form) {
+    var actionAttr = form.getAttribute('action');
+    var fields = [];
+    var controls = form.querySelectorAll('input, textarea, select');
+    for (var i = 0; i < controls.length; i++) {
+        var el = controls[i];
+        var name = el.getAttribute('name');
+        if (!name) { continue; }
+        var tag = el.tagName.toLowerCase();
+        var field = { name: name, tag: tag, type: (el.getAttribute('type') || '').toLowerCase(),
+                      value: el.value, default_value: el.defaultValue, options: [] };
+        if (tag === 'textarea' && !field.value) {
+            field.value = el.textContent;
+        } else if (tag === 'select') {
+            var selected = el.querySelector('option[selected]') || el.querySelector('option');
+            field.value = selected ? selected.value : '';
+            field.default_value = field.value;
+            for (var j = 0; j < el.options.length; j++) {
+                field.options.push({ value: el.options[j].value, text: el.options[j].text,
+                                     selected: el.options[j].hasAttribute('selected') });
+            }
+        }
+        if (field.value === null || field.value === undefined) { field.value = ''; }
+        fields.push(field);
+    }
+    return {
+        action: actionAttr ? new URL(actionAttr, document.baseURI).href : document.URL,
+        method: (form.getAttribute('method') || 'get').toLowerCase(),
+        fields: fields
+    };
+});
+"""
+
+
+def extract_forms(driver, form_element=None, selector=POST_FORM_SELECTOR):
+    """Serializes form_element (or every form matching selector) in one execute_script call."""
+    return driver.execute_script(FORM_EXTRACTION_SCRIPT, form_element, selector) or []
+
+
+def initial_form_data(form):
+    """{field name: initial value} for a serialized form (later fields with the same name win)."""
+    return {field["name"]: field["value"] for field in form["fields"]}
+
+
+def form_from_body(action_url, body):
+    """
+    Serialized POST form built from a form-encoded request body (the fields a
+    JSONL POST target submits), or None if the body is empty or not form-encoded.
+    """
+    body = (body or "").strip()
+    if not body or body.startswith(("{", "[")):
+        return None # JSON body: submission chỉ gửi form-urlencoded
+    pairs = parse_qsl(body, keep_blank_values=True)
+    if not pairs:
+        return None
+    fields = [{"name": name, "tag": "input", "type": "", "value": value, "default_value": value, "options": []}
+              for name, value in pairs]
+    return {"action": action_url, "method": "post", "fields": fields}
+
+
+def find_post_form(driver, target_url, timeout=FORM_WAIT_TIMEOUT):
+    """
+    Waits for the first POST form on the current page and serializes it.
+    Returns (form_action_url, initial_form_data, form) or None if no form appears.
+    """
+    try:
+        form_element = WebDriverWait(driver, timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, POST_FORM_SELECTOR))
+        )
+    except (NoSuchElementException, TimeoutException):
+        return None
+    forms = extract_forms(driver, form_element)
+    if not forms:
+        return None
+    form = forms[0]
+    return urljoin(target_url, form["action"]), initial_form_data(form), form
@@ -0,0 +1,60 @@
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+HTTP_POOL_SIZE = 16 # Số kết nối giữ sẵn cho mỗi host
+REQUEST_TIMEOUT = 10
+
+_shared_session = None
+_shared_adapter = None
+_lock = threading.Lock()
+
+
+def _mount(session, adapter):
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def new_session(pool_size=HTTP_POOL_SIZE):
+    """Creates a requests.Session with a keep-alive connection pool of pool_size per host."""
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    return _mount(requests.Session(), adapter)
+
+
+def get_shared_session():
+    """Returns the process-wide pooled session (created on first use)."""
+    global _shared_session
+    with _lock:
+        if _shared_session is None:
+            _shared_session = new_session()
+        return _shared_session
+
+
+def browser_session(driver):
+    """
+    A session of its own for one job, carrying driver's cookies and User-Agent.
+    Only the connection pool is shared between jobs: cookies of one browser
+    (another login, another target) never leak into another job's requests.
+    """
+    global _shared_adapter
+    with _lock:
+        if _shared_adapter is None:
+            _shared_adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+        adapter = _shared_adapter
+    return copy_browser_state(_mount(requests.Session(), adapter), driver)
+
+
+def copy_browser_state(session, driver):
+    """Copies the browser's cookies (for its current page) and User-Agent into session."""
+    try:
+        for cookie in driver.get_cookies():
+            session.cookies.set(cookie["name"], cookie["value"],
+                                domain=cookie.get("domain"), path=cookie.get("path", "/"))
+        user_agent = driver.execute_script("return navigator.userAgent")
+        if user_agent:
+            session.headers["User-Agent"] = user_agent
+    except Exception as e:
+        print(f"WARNING: Could not copy browser cookies into HTTP session: {e}")
+    return session
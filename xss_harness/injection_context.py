@@ -0,0 +1,133 @@
+"""
+Injection-context classification for reflected canaries, and payload tagging.
+
+``classify_reflection`` looks at where a canary lands in a raw HTML response.
+``payload_contexts`` guesses which of those contexts a payload is built to
+break out of. ``select_payloads`` keeps the payloads whose tags match. The
+classifier is a heuristic scan of the surrounding text, not a full HTML parser.
+"""
+import re
+from urllib.parse import unquote
+
+HTML = "html"                    # Text node of the document body
+ATTR_QUOTED = "attr_quoted"      # Inside a '...' or "..." attribute value
+ATTR_UNQUOTED = "attr_unquoted"  # Unquoted attribute value, or loose inside a tag
+SCRIPT_STRING = "script_string"  # Inside <script> (or an on* handler), usually in a JS string
+URL_ATTR = "url_attr"            # At the start of href/src/action/... values
+COMMENT = "comment"              # Inside <!-- ... -->
+ALL_CONTEXTS = (HTML, ATTR_QUOTED, ATTR_UNQUOTED, SCRIPT_STRING, URL_ATTR, COMMENT)
+
+URL_ATTRIBUTES = {"href", "src", "action", "formaction", "data", "srcdoc", "poster", "background", "xlink:href"}
+
+_SCRIPT_OPEN = re.compile(r"<script\b[^>]*>", re.IGNORECASE)
+_SCRIPT_CLOSE = re.compile(r"</script\s*>", re.IGNORECASE)
+_TAG_START = re.compile(r"<[a-zA-Z][^<>]*$")
+_ATTR_VALUE_AT_END = re.compile(r"""([^\s"'=<>/]+)\s*=\s*("[^"]*|'[^']*|[^\s"'>]*)$""")
+
+
+def _last_match_end(pattern, text):
+    last = None
+    for last in pattern.finditer(text):
+        pass
+    return last.end() if last else -1
+
+
+def _last_match_start(pattern, text):
+    last = None
+    for last in pattern.finditer(text):
+        pass
+    return last.start() if last else -1
+
+
+def _in_js_string(code):
+    """True if the end of code sits inside a '...', "..." or `...` literal."""
+    quote = None
+    escaped = False
+    for ch in code:
+        if escaped:
+            escaped = False
+        elif ch == "\\":
+            escaped = True
+        elif quote:
+            if ch == quote:
+                quote = None
+        elif ch in "'\"`":
+            quote = ch
+    return quote is not None
+
+
+def classify_position(body, index):
+    """Returns the set of contexts for a reflection starting at body[index]."""
+    prefix = body[:index]
+
+    if prefix.rfind("<!--") > prefix.rfind("-->"):
+        return {COMMENT}
+
+    script_open = _last_match_end(_SCRIPT_OPEN, prefix)
+    if script_open > _last_match_start(_SCRIPT_CLOSE, prefix):
+        # Dù ở trong chuỗi JS hay không, payload kiểu '-alert()-' / </script> là phù hợp nhất
+        return {SCRIPT_STRING}
+
+    tag = _TAG_START.search(prefix)
+    if tag is None:
+        return {HTML}
+
+    attr = _ATTR_VALUE_AT_END.search(tag.group(0))
+    if attr is None:
+        # Nằm giữa các thuộc tính / tên thẻ: có thể chèn thuộc tính mới trực tiếp
+        return {ATTR_UNQUOTED}
+    name, value = attr.group(1).lower(), attr.group(2)
+    contexts = {ATTR_QUOTED if value[:1] in ("'", '"') else ATTR_UNQUOTED}
+    if name in URL_ATTRIBUTES and value.lstrip("'\"").strip() == "":
+        contexts.add(URL_ATTR)
+    if name.startswith("on") and _in_js_string(value[1:] if value[:1] in ("'", '"') else value):
+        contexts.add(SCRIPT_STRING)
+    return contexts
+
+
+def classify_reflection(body, canary):
+    """Returns the union of contexts of every occurrence of canary in body (empty if none)."""
+    contexts = set()
+    lower_body, lower_canary = body.lower(), canary.lower()
+    start = lower_body.find(lower_canary)
+    while start != -1:
+        contexts |= classify_position(body, start)
+        start = lower_body.find(lower_canary, start + len(lower_canary))
+    return contexts
+
+
+def payload_contexts(payload):
+    """
+    Guesses the contexts a payload targets from its shape. Payloads that match
+    no rule are tagged with every context so they are never filtered out.
+    """
+    text = unquote(payload.strip())
+    lower = text.lower()
+    contexts = set()
+    has_tag = re.search(r"<[a-z!/]", lower) is not None
+
+    if lower.startswith("javascript:") or lower.startswith("data:"):
+        contexts.add(URL_ATTR)
+    if "-->" in lower:
+        contexts.add(COMMENT)
+    if has_tag:
+        contexts.add(HTML)
+    if "</script" in lower:
+        contexts.add(SCRIPT_STRING)
+    if re.match(r"""^['"]\s*[-+*/%;,|&)]""", text):
+        contexts.add(SCRIPT_STRING)
+    if re.match(r"""^['"]?\s*/?>""", text):
+        # Đóng thẻ hiện tại rồi mở thẻ mới
+        contexts.update({ATTR_QUOTED, ATTR_UNQUOTED})
+    if re.match(r"""^['"][^<>]*\bon\w+\s*=""", lower):
+        contexts.add(ATTR_QUOTED)
+    if re.match(r"""^(?:[^<>'"]*\s)?on\w+\s*=""", lower):
+        contexts.add(ATTR_UNQUOTED)
+    return contexts or set(ALL_CONTEXTS)
+
+
+def select_payloads(payloads, contexts):
+    """Keeps the payloads tagged with at least one of contexts (all of them if contexts is empty)."""
+    if not contexts:
+        return list(payloads)
+    return [payload for payload in payloads if payload_contexts(payload) & contexts]
@@ -0,0 +1,80 @@
+"""
+Checkpoint journal of completed probes.
+
+Every probe a script finishes - one (target, module, parameter/field, payload)
+tuple - is appended to the journal as a JSON line and fsync'd before the next
+one starts, together with the alert text when it was a hit. A run started with
+``--resume`` loads the journal first; scripts then skip probes that are already
+in it and reuse recorded hits instead of probing again, so an interrupted sweep
+loses at most the probe that was in flight.
+
+    python run_all_tests.py -u "https://target.example/?q=1" --journal scan.journal
+    python run_all_tests.py -u "https://target.example/?q=1" --journal scan.journal --resume
+
+Scripts whose payloads carry a random marker journal the payload template
+(marker replaced by ``{marker}``) so the key is the same in every run.
+"""
+import json
+import os
+import threading
+from collections import namedtuple
+
+# alert_text: None nếu probe không kích hoạt alert
+JournalEntry = namedtuple("JournalEntry", ["location", "payload", "alert_text"])
+
+
+class ProbeJournal:
+    """Thread-safe append-only journal; resume=True loads the existing entries, otherwise the file is started afresh."""
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self._entries = {} # (target, module, location, payload) -> JournalEntry
+        self._lock = threading.Lock()
+        if resume and os.path.exists(path):
+            self._load()
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    key = (record["target"], record["module"], record["location"], record["payload"])
+                except (ValueError, KeyError, TypeError):
+                    continue # Dòng cuối bị ghi dở khi tiến trình chết
+                self._entries[key] = JournalEntry(record["location"], record["payload"], record.get("alert_text"))
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, target, module, location, payload):
+        """The entry of a completed probe, or None."""
+        with self._lock:
+            return self._entries.get((target, module, location, payload))
+
+    def hits(self, target, module):
+        """Entries of (target, module) that triggered an alert."""
+        with self._lock:
+            return [entry for (t, m, _, _), entry in self._entries.items()
+                    if (t, m) == (target, module) and entry.alert_text is not None]
+
+    def record(self, target, module, location, payload, alert_text=None):
+        """Appends a completed probe and waits until it is on disk."""
+        entry = JournalEntry(location, payload, alert_text)
+        line = json.dumps({"target": target, "module": module, "location": location,
+                           "payload": payload, "alert_text": alert_text}, ensure_ascii=False)
+        with self._lock:
+            self._entries[(target, module, location, payload)] = entry
+            if self._file is None:
+                return entry
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        return entry
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
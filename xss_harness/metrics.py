@@ -0,0 +1,195 @@
+"""
+Per-phase timing metrics.
+
+The scripts and helpers wrap each phase of a probe in ``timed(PHASE)``:
+
+* ``navigate``    - driver.get() of an attack or discovery URL
+* ``dom_wait``    - waiting for the document / an element to be there
+* ``alert_wait``  - waiting for (or polling for) an alert
+* ``post``        - submitting a stored payload
+* ``reload``      - driver.get() of the target after a submission
+* ``interaction`` - scrolling, hovering, clicking
+
+``timed`` is a no-op unless the calling thread is bound to a MetricsRecorder
+with ``recording(recorder, module_name)``; run_all_tests does this around each
+script when metrics are requested. The recorder keeps the raw records and rolls
+them up into one histogram per (module, phase), exportable as JSON or as a
+Prometheus textfile.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+
+NAVIGATE = "navigate"
+DOM_WAIT = "dom_wait"
+ALERT_WAIT = "alert_wait"
+POST = "post"
+RELOAD = "reload"
+INTERACTION = "interaction"
+PHASES = (NAVIGATE, DOM_WAIT, ALERT_WAIT, POST, RELOAD, INTERACTION)
+
+HISTOGRAM_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0) # Giây
+MAX_RECORDS = 100000 # Số bản ghi thô tối đa giữ lại (histogram vẫn đếm đủ)
+PROMETHEUS_METRIC = "xss_harness_phase_seconds"
+
+# module: tên script; ok: False nếu phase kết thúc bằng exception
+PhaseRecord = namedtuple("PhaseRecord", ["module", "phase", "started", "seconds", "ok"])
+
+_binding = threading.local()
+
+
+class Histogram:
+    """Cumulative-bucket histogram of durations in seconds."""
+
+    def __init__(self, buckets=HISTOGRAM_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-quantile (max for the overflow bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        for bound, cumulative in zip(self.buckets, self.counts):
+            if cumulative >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self):
+        return {"count": self.count, "sum": self.sum, "max": self.max,
+                "p50": self.quantile(0.5), "p95": self.quantile(0.95),
+                "buckets": dict(zip((str(b) for b in self.buckets), self.counts))}
+
+
+class MetricsRecorder:
+    """Thread-safe sink for PhaseRecords."""
+
+    def __init__(self, max_records=MAX_RECORDS):
+        self.records = deque(maxlen=max_records)
+        self.histograms = {} # (module, phase) -> Histogram
+        self._lock = threading.Lock()
+
+    def observe(self, module, phase, started, seconds, ok=True):
+        record = PhaseRecord(module, phase, started, seconds, ok)
+        with self._lock:
+            self.records.append(record)
+            histogram = self.histograms.get((module, phase))
+            if histogram is None:
+                histogram = self.histograms[(module, phase)] = Histogram()
+            histogram.observe(seconds)
+
+    def phase_totals(self):
+        """{phase: Histogram} merged over all modules."""
+        totals = {}
+        with self._lock:
+            items = list(self.histograms.items())
+        for (_, phase), histogram in items:
+            merged = totals.setdefault(phase, Histogram())
+            merged.count += histogram.count
+            merged.sum += histogram.sum
+            merged.max = max(merged.max, histogram.max)
+            merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+        return totals
+
+    def summary(self):
+        """Text table of time spent per phase, largest first."""
+        totals = self.phase_totals()
+        grand_total = sum(h.sum for h in totals.values()) or 1.0
+        lines = [f"{'phase':<12}{'count':>8}{'total s':>10}{'share':>8}{'mean s':>9}{'p50 s':>8}{'p95 s':>8}{'max s':>8}"]
+        for phase, h in sorted(totals.items(), key=lambda item: item[1].sum, reverse=True):
+            lines.append(f"{phase:<12}{h.count:>8}{h.sum:>10.2f}{h.sum / grand_total:>8.0%}{h.sum / h.count:>9.3f}"
+                         f"{h.quantile(0.5):>8.3f}{h.quantile(0.95):>8.3f}{h.max:>8.3f}")
+        return "\n".join(lines)
+
+    def to_json(self):
+        with self._lock:
+            records = [record._asdict() for record in self.records]
+            histograms = [{"module": module, "phase": phase, **h.to_dict()}
+                          for (module, phase), h in sorted(self.histograms.items())]
+        return {"histograms": histograms, "records": records}
+
+    def to_prometheus(self):
+        lines = [f"# HELP {PROMETHEUS_METRIC} Duration of harness phases.",
+                 f"# TYPE {PROMETHEUS_METRIC} histogram"]
+        with self._lock:
+            items = sorted(self.histograms.items())
+        for (module, phase), h in items:
+            labels = f'module="{module}",phase="{phase}"'
+            for bound, cumulative in zip(h.buckets, h.counts):
+                lines.append(f'{PROMETHEUS_METRIC}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{PROMETHEUS_METRIC}_bucket{{{labels},le="+Inf"}} {h.count}')
+            lines.append(f"{PROMETHEUS_METRIC}_sum{{{labels}}} {h.sum}")
+            lines.append(f"{PROMETHEUS_METRIC}_count{{{labels}}} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path):
+        _write_atomic(path, json.dumps(self.to_json(), indent=2))
+
+    def write_prometheus(self, path):
+        # node_exporter đọc textfile bất kỳ lúc nào: ghi file tạm rồi rename
+        _write_atomic(path, self.to_prometheus())
+
+
+def _write_atomic(path, text):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def current():
+    """The (recorder, module) binding of the calling thread, or None."""
+    return getattr(_binding, "value", None)
+
+
+@contextmanager
+def recording(recorder, module=None):
+    """Binds the calling thread to recorder for module (no-op binding if recorder is None)."""
+    previous = current()
+    _binding.value = (recorder, module) if recorder is not None else None
+    try:
+        yield
+    finally:
+        _binding.value = previous
+
+
+@contextmanager
+def bound(binding):
+    """Re-applies a binding captured with current(), e.g. inside a worker thread."""
+    if binding is None:
+        yield
+        return
+    with recording(*binding):
+        yield
+
+
+@contextmanager
+def timed(phase):
+    """Times the block as phase for the calling thread's recorder (if any)."""
+    binding = current()
+    if binding is None:
+        yield
+        return
+    recorder, module = binding
+    started_wall = time.time()
+    started = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        recorder.observe(module, phase, started_wall, time.perf_counter() - started, ok)
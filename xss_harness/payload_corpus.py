@@ -0,0 +1,226 @@
+"""
+Cached, streaming loader for line-based payload lists (local files or URLs).
+
+The first load streams the source line by line, strips and de-duplicates it, and
+writes two cache files: the normalized lines (``.txt``) and an offset index
+(``.idx``: one uint64 start offset per line, plus the end). The data file is
+memory-mapped, so the text of a multi-megabyte list costs no Python memory
+until a line is read; the index is read into an array (8 bytes per line).
+Together they make ``corpus[i]`` and shard slicing cheap. The cache is
+revalidated against the file's mtime/size, or for remote lists with a
+conditional GET (ETag / Last-Modified).
+
+``load_corpus`` keeps one loaded corpus per source for the whole process, so
+the scripts of every job share one mapping instead of opening a new one each
+run. A local list is re-read only when its mtime/size change; a remote list is
+revalidated once per process.
+"""
+import hashlib
+import json
+import mmap
+import os
+import threading
+from array import array
+from pathlib import Path
+
+from xss_harness.cache_dir import get_cache_dir
+from xss_harness.http_session import get_shared_session, REQUEST_TIMEOUT
+
+CACHE_FORMAT_VERSION = 1
+
+_build_locks = {}
+_build_locks_guard = threading.Lock()
+_loaded = {} # (source, cache file) -> PayloadCorpus đã map, dùng chung trong tiến trình
+_loaded_guard = threading.Lock()
+
+
+def is_remote(source):
+    return str(source).startswith(('http://', 'https://'))
+
+
+def _lock_for(key):
+    with _build_locks_guard:
+        return _build_locks.setdefault(key, threading.Lock())
+
+
+class PayloadCorpus:
+    """
+    Read-only sequence of normalized, de-duplicated lines from source.
+
+    Supports ``len()``, iteration, ``corpus[i]``, ``corpus[a:b]`` and
+    ``iter_shard(index, count)``. Create it with ``load_corpus(source)``.
+    """
+
+    def __init__(self, source, cache_dir=None, session=None):
+        self.source = str(source)
+        self.remote = is_remote(self.source)
+        if not self.remote:
+            self.source = str(Path(self.source).resolve())
+        self._session = session
+        cache_root = Path(cache_dir) if cache_dir else get_cache_dir("corpus")
+        key = hashlib.sha1(self.source.encode("utf-8")).hexdigest()
+        self._data_path = cache_root / f"{key}.txt"
+        self._index_path = cache_root / f"{key}.idx"
+        self._meta_path = cache_root / f"{key}.json"
+        self._data = None
+        self._offsets = None
+        self._count = 0
+        self._source_stat = None # (mtime_ns, size) của file nguồn khi load
+        self.from_cache = False
+
+    # --- Loading ---
+
+    def load(self):
+        """Validates (or rebuilds) the on-disk cache and maps it. Returns self."""
+        with _lock_for(str(self._data_path)):
+            meta = self._read_meta()
+            if self.remote:
+                self.from_cache = self._refresh_remote(meta)
+            else:
+                stat = os.stat(self.source) # FileNotFoundError nếu file không tồn tại
+                self._source_stat = (stat.st_mtime_ns, stat.st_size)
+                fresh = (meta is not None and meta.get("mtime_ns") == stat.st_mtime_ns
+                         and meta.get("size") == stat.st_size)
+                if not fresh:
+                    with open(self.source, "r", encoding="utf-8") as f:
+                        self._build(f, {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size})
+                self.from_cache = fresh
+            self._map()
+        return self
+
+    def is_current(self):
+        """True if the source has not changed since load (remote lists: always, until the process ends)."""
+        if self.remote:
+            return True
+        try:
+            stat = os.stat(self.source)
+        except OSError:
+            return False
+        return self._source_stat == (stat.st_mtime_ns, stat.st_size)
+
+    def _read_meta(self):
+        try:
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get("version") != CACHE_FORMAT_VERSION or meta.get("source") != self.source:
+            return None
+        if not (self._data_path.exists() and self._index_path.exists()):
+            return None
+        return meta
+
+    def _refresh_remote(self, meta):
+        """Conditional GET; returns True if the cached copy is still valid."""
+        session = self._session or get_shared_session()
+        headers = {}
+        if meta:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        try:
+            with session.get(self.source, headers=headers, stream=True, timeout=REQUEST_TIMEOUT) as response:
+                if meta and response.status_code == 304:
+                    return True
+                response.raise_for_status() # Ném lỗi nếu request không thành công (e.g., 404)
+                response.encoding = response.encoding or "utf-8"
+                self._build(response.iter_lines(decode_unicode=True),
+                            {"etag": response.headers.get("ETag"),
+                             "last_modified": response.headers.get("Last-Modified")})
+                return False
+        except Exception as e:
+            if meta is None:
+                raise
+            print(f"WARNING: Could not revalidate payload list '{self.source}' ({e}); using cached copy.")
+            return True
+
+    def _build(self, lines, validators):
+        """Streams lines into the cache files (written to temp files, then renamed)."""
+        data_tmp = self._data_path.with_suffix(".txt.tmp")
+        index_tmp = self._index_path.with_suffix(".idx.tmp")
+        seen = set()
+        offsets = array("Q")
+        position = 0
+        with open(data_tmp, "wb") as data:
+            for line in lines:
+                line = line.strip()
+                if not line:
+                    continue
+                encoded = line.encode("utf-8")
+                digest = hashlib.sha1(encoded).digest()
+                if digest in seen:
+                    continue
+                seen.add(digest)
+                offsets.append(position)
+                data.write(encoded + b"\n")
+                position += len(encoded) + 1
+        offsets.append(position)
+        with open(index_tmp, "wb") as index:
+            offsets.tofile(index)
+        os.replace(data_tmp, self._data_path)
+        os.replace(index_tmp, self._index_path)
+        meta = {"version": CACHE_FORMAT_VERSION, "source": self.source, "count": len(offsets) - 1}
+        meta.update(validators)
+        with open(self._meta_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+    def _map(self):
+        self.close()
+        with open(self._index_path, "rb") as index:
+            offsets = array("Q")
+            offsets.frombytes(index.read())
+        self._offsets = offsets
+        self._count = len(offsets) - 1
+        if offsets[-1] == 0:
+            self._data = b"" # mmap không nhận file rỗng
+        else:
+            with open(self._data_path, "rb") as data:
+                self._data = mmap.mmap(data.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._data = None
+
+    # --- Sequence interface ---
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self[i] for i in range(*item.indices(self._count))]
+        if item < 0:
+            item += self._count
+        if not 0 <= item < self._count:
+            raise IndexError("payload index out of range")
+        start, end = self._offsets[item], self._offsets[item + 1] - 1 # bỏ "\n"
+        return self._data[start:end].decode("utf-8")
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    def iter_shard(self, index, count):
+        """Lazily yields every count-th line starting at index (shard index of count)."""
+        for i in range(index, self._count, count):
+            yield self[i]
+
+
+def load_corpus(source, cache_dir=None, session=None):
+    """
+    Loads (and caches) the line list at source, a file path or an http(s) URL.
+    Returns the process-wide corpus for source while it is current.
+    """
+    corpus = PayloadCorpus(source, cache_dir=cache_dir, session=session)
+    key = (corpus.source, str(corpus._data_path))
+    with _loaded_guard:
+        loaded = _loaded.get(key)
+    if loaded is not None and loaded.is_current():
+        return loaded
+    corpus.load()
+    with _loaded_guard:
+        # Corpus cũ không bị close: job khác có thể vẫn đang đọc, mmap được giải phóng khi hết tham chiếu
+        _loaded[key] = corpus
+    return corpus
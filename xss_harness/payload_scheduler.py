@@ -0,0 +1,105 @@
+"""
+Adaptive payload ordering from historical hit rates (Thompson sampling).
+
+Every probe outcome is counted per payload in two buckets: the injection
+context(s) the parameter reflects in (see xss_harness.injection_context), and
+the target fingerprint (see xss_harness.rescan_cache). Before a sweep each
+payload gets a score drawn from
+
+    Beta(PRIOR_HITS + hits_fp + CONTEXT_WEIGHT * hits_ctx,
+         PRIOR_MISSES + misses_fp + CONTEXT_WEIGHT * misses_ctx)
+
+and payloads are tried by decreasing score. Payloads that worked before come
+first; payloads with few observations have wide distributions and regularly
+draw high scores, so new payloads still get tried. Counts are kept in SQLite
+and shared between runs and workers.
+
+    python run_all_tests.py -u "https://target.example/?q=1" --adaptive-order
+"""
+import random
+import sqlite3
+import threading
+
+from xss_harness.cache_dir import get_cache_dir
+from xss_harness.rescan_cache import payload_hash
+
+DEFAULT_DB_FILENAME = "payload_stats.sqlite3"
+PRIOR_HITS = 1.0
+PRIOR_MISSES = 1.0
+CONTEXT_WEIGHT = 0.5 # Kinh nghiệm cùng ngữ cảnh ở target khác đáng tin bằng nửa kinh nghiệm trên chính target
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS payload_stats (
+    bucket       TEXT NOT NULL,
+    payload_hash TEXT NOT NULL,
+    hits         INTEGER NOT NULL DEFAULT 0,
+    misses       INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (bucket, payload_hash)
+)
+"""
+
+
+def default_db_path():
+    return str(get_cache_dir("scheduler") / DEFAULT_DB_FILENAME)
+
+
+def context_bucket(contexts):
+    return "ctx:" + (",".join(sorted(contexts)) or "unknown")
+
+
+def fingerprint_bucket(fingerprint):
+    return f"fp:{fingerprint}" if fingerprint else None
+
+
+class PayloadScheduler:
+    """Thread-safe Thompson-sampling scheduler backed by one SQLite connection."""
+
+    def __init__(self, path=None, rng=None):
+        self.path = path or default_db_path()
+        self.rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(SCHEMA)
+        self._conn.commit()
+
+    def _bucket_stats(self, bucket):
+        if bucket is None:
+            return {}
+        rows = self._conn.execute("SELECT payload_hash, hits, misses FROM payload_stats WHERE bucket = ?", (bucket,))
+        return {row[0]: (row[1], row[2]) for row in rows}
+
+    def order(self, payloads, contexts=(), fingerprint=None):
+        """Returns payloads as a list sorted by a sampled success probability (highest first)."""
+        with self._lock:
+            by_context = self._bucket_stats(context_bucket(contexts))
+            by_fingerprint = self._bucket_stats(fingerprint_bucket(fingerprint))
+            scored = []
+            for position, payload in enumerate(payloads):
+                key = payload_hash(payload)
+                ctx_hits, ctx_misses = by_context.get(key, (0, 0))
+                fp_hits, fp_misses = by_fingerprint.get(key, (0, 0))
+                score = self.rng.betavariate(PRIOR_HITS + fp_hits + CONTEXT_WEIGHT * ctx_hits,
+                                             PRIOR_MISSES + fp_misses + CONTEXT_WEIGHT * ctx_misses)
+                scored.append((-score, position, payload))
+        scored.sort()
+        return [payload for _, _, payload in scored]
+
+    def record(self, payload, hit, contexts=(), fingerprint=None):
+        """Counts one outcome of payload in its context and fingerprint buckets."""
+        column = "hits" if hit else "misses"
+        key = payload_hash(payload)
+        with self._lock:
+            for bucket in (context_bucket(contexts), fingerprint_bucket(fingerprint)):
+                if bucket is None:
+                    continue
+                self._conn.execute("INSERT OR IGNORE INTO payload_stats (bucket, payload_hash) VALUES (?, ?)",
+                                   (bucket, key))
+                self._conn.execute(f"UPDATE payload_stats SET {column} = {column} + 1"
+                                   " WHERE bucket = ? AND payload_hash = ?", (bucket, key))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,133 @@
+"""
+Test-script requirements, read without importing the script.
+
+A script declares what it needs in a module-level literal dict:
+
+    PLUGIN_REQUIREMENTS = {
+        "query_params": True,   # the target URL must have query parameters
+        "post_form": False,     # the page must have a POST form
+        "javascript": True,     # the target must be an HTML page a browser runs scripts in
+        "headless": True,       # the script also works in a headless browser
+        "cost": 3,              # relative run time, used to start expensive scripts first
+        "hover_probes": False,  # mouseover probes other scripts' page loads may carry (xss_harness.probe_planner)
+        "methods": ["GET"],     # target request methods the script can send (a POST target's body is its form)
+    }
+
+``read_requirements`` takes the dict from the script's source with ``ast``
+(missing keys fall back to DEFAULT_REQUIREMENTS), so the runner can decide per
+target which scripts apply before importing any of them. The facts about a
+target come from one cheap ``probe_page`` request; ``skip_reason`` compares the
+two. A target whose method a script cannot send is skipped rather than scanned
+as a GET of its URL. Anything the probe could not establish (network error, a page whose forms
+may be built by JavaScript) counts as satisfied, so a script is only skipped
+when it certainly cannot find anything.
+"""
+import ast
+from dataclasses import dataclass
+from html.parser import HTMLParser
+from typing import Optional
+
+from xss_harness.discovery import query_param_names
+from xss_harness.forms import form_from_body
+from xss_harness.http_session import get_shared_session, REQUEST_TIMEOUT
+
+REQUIREMENTS_NAME = "PLUGIN_REQUIREMENTS"
+DEFAULT_REQUIREMENTS = {"query_params": False, "post_form": False, "javascript": True, "headless": True, "cost": 1,
+                        "hover_probes": False, "methods": ["GET"]}
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+
+def read_requirements(script_path):
+    """The script's PLUGIN_REQUIREMENTS merged over DEFAULT_REQUIREMENTS (defaults only if absent or not a literal)."""
+    requirements = dict(DEFAULT_REQUIREMENTS)
+    try:
+        with open(script_path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=str(script_path))
+    except (OSError, SyntaxError, ValueError):
+        return requirements # Lỗi import sẽ được báo khi script thực sự được nạp
+    for node in tree.body:
+        if (isinstance(node, ast.Assign) and len(node.targets) == 1
+                and isinstance(node.targets[0], ast.Name) and node.targets[0].id == REQUIREMENTS_NAME):
+            try:
+                declared = ast.literal_eval(node.value)
+            except ValueError:
+                print(f"WARNING: {REQUIREMENTS_NAME} in {script_path} is not a literal; using the defaults.")
+                return requirements
+            if isinstance(declared, dict):
+                requirements.update(declared)
+    return requirements
+
+
+@dataclass
+class PageProfile:
+    url: str
+    param_names: list
+    method: str = "GET"
+    html: Optional[bool] = None      # None = không biết (probe lỗi hoặc chưa chạy)
+    post_form: Optional[bool] = None
+    error: Optional[str] = None
+
+
+class _FormScanner(HTMLParser):
+    def __init__(self):
+        super().__init__()
+        self.post_form = False
+        self.scripts = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "form" and (dict(attrs).get("method") or "").lower() == "post":
+            self.post_form = True
+        elif tag == "script":
+            self.scripts = True
+
+
+def probe_page(url, fetch=True, session=None, timeout=REQUEST_TIMEOUT, method="GET", body=None):
+    """
+    Profiles url from its query string and (if fetch) one HTTP GET of the raw
+    page. For a POST target the form is its form-encoded body, not the page's.
+    """
+    profile = PageProfile(url=url, param_names=query_param_names(url), method=method)
+    if method == "POST":
+        profile.post_form = form_from_body(url, body) is not None
+    if not fetch:
+        return profile
+    session = session or get_shared_session()
+    try:
+        response = session.get(url, timeout=timeout)
+    except Exception as e:
+        profile.error = str(e)
+        return profile
+    content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    profile.html = not content_type or content_type in HTML_CONTENT_TYPES
+    if profile.html and method != "POST":
+        scanner = _FormScanner()
+        scanner.feed(response.text)
+        # Không có form trong HTML gốc nhưng có script: form có thể do JavaScript tạo ra
+        profile.post_form = True if scanner.post_form else (None if scanner.scripts else False)
+    return profile
+
+
+def needs_page_fetch(requirements):
+    """True if a script with these requirements can only be checked against the fetched page."""
+    return bool(requirements.get("post_form") or requirements.get("javascript"))
+
+
+def skip_reason(requirements, profile, use_headless):
+    """Why a script with requirements cannot apply to the profiled page, or None if it may."""
+    methods = requirements.get("methods") or DEFAULT_REQUIREMENTS["methods"]
+    if profile.method not in methods:
+        return f"the script cannot send {profile.method} requests (target body would be dropped)"
+    if requirements.get("query_params") and not profile.param_names:
+        return "the URL has no query parameters"
+    if requirements.get("javascript") and profile.html is False:
+        return "the response is not an HTML page"
+    if requirements.get("post_form") and profile.post_form is False:
+        return "the request body is not form-encoded" if profile.method == "POST" else "the page has no POST form"
+    if not requirements.get("headless", True) and use_headless:
+        return "the script needs a visible browser (run with --no-headless)"
+    return None
+
+
+def order_by_cost(requirements_by_module):
+    """Module names, most expensive first so the long scripts do not start last."""
+    return sorted(requirements_by_module, key=lambda name: (-requirements_by_module[name].get("cost", 1), name))
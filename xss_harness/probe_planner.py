@@ -0,0 +1,210 @@
+"""
+Shared GET navigations for probes of different scripts.
+
+test_reflected_xss_get loads one attack URL per (parameter, payload) and
+watches for an alert on load; test_search_mouseover_xss puts a marker payload
+in each parameter and watches for an alert when the element carrying it is
+hovered. Probes in different parameters do not conflict, so one page load can
+carry a reflected payload in one parameter and mouseover markers in the others.
+
+The runner registers the mouseover probes a target needs (``expect``). Each
+reflected navigation claims the ones in its other parameters (``claim``),
+loads the merged URL, checks its own alert and hands the page to ``resolve``,
+which hovers the elements carrying a marker and routes each alert back to its
+probe by marker text. When the mouseover script runs it collects the outcomes
+for its parameters (``take``) instead of loading the page again, waiting for
+claims still in flight; anything left unresolved (broken page, navigation
+error, hover error, a marker the page does not reflect) is probed by the
+script as before.
+
+Riding overwrites the original values of the other parameters, so a page that
+needs one of them (``postId=5``) may render an error page instead. Parameters
+whose original value looks like an identifier (``required_params``) are never
+ridden, and a page that reflects none of the riders' markers counts as broken:
+the riders go back to the mouseover script and the reflected probe is loaded
+again on its own. A required parameter that does not look like an identifier
+is not detected; turn merging off for such targets.
+
+Alerts are attributed by reading the alert hook's records, so merging needs
+the ``hook`` alert backend (see xss_harness.alert_hook).
+
+    python run_all_tests.py -u "https://target.example/?q=1&page=2" --alert-backend hook --merge-get-probes
+"""
+import random
+import re
+import string
+import threading
+import time
+from urllib.parse import urlparse, parse_qsl
+
+from selenium.webdriver.common.action_chains import ActionChains
+
+from xss_harness import alert_hook, metrics
+
+MARKER_LENGTH = 15
+HOVER_SCROLL_SLEEP = 0.5   # Chờ sau khi cuộn tới phần tử, như test_search_mouseover_xss
+HOVER_ALERT_TIMEOUT = 1
+CLAIM_WAIT_TIMEOUT = 30    # Thời gian tối đa script chủ chờ một navigation dùng chung đang chạy (giây)
+
+# Giá trị gốc trông như định danh (số, UUID, hash): trang có thể cần nó, không ghi đè bằng marker
+REQUIRED_VALUE_PATTERN = re.compile(r"^(\d+|[0-9a-fA-F-]{16,})$")
+
+WANTED = "wanted"
+CLAIMED = "claimed"
+RESOLVED = "resolved"
+
+# Một lần quét DOM: trả về [element, marker] cho mọi phần tử có onmouseover chứa một marker,
+# và present: các marker xuất hiện ở bất kỳ đâu trong trang (không có marker nào -> trang lỗi/bị chặn)
+MARKER_SCAN_SCRIPT = """
+var markers = arguments[0], matches = [], present = [];
+if (!document.body || document.body.children.length === 0) { return { broken: true, matches: [], present: [] }; }
+var html = document.documentElement.outerHTML;
+for (var k = 0; k < markers.length; k++) {
+    if (html.indexOf(markers[k]) !== -1) { present.push(markers[k]); }
+}
+var elements = document.querySelectorAll('[onmouseover]');
+for (var i = 0; i < elements.length; i++) {
+    var handler = elements[i].getAttribute('onmouseover') || '';
+    for (var j = 0; j < markers.length; j++) {
+        if (handler.indexOf(markers[j]) !== -1) { matches.push([elements[i], markers[j]]); break; }
+    }
+}
+return { broken: false, matches: matches, present: present };
+"""
+
+
+def make_marker(length=MARKER_LENGTH):
+    chars = string.ascii_letters + string.digits
+    return ''.join(random.choice(chars) for _ in range(length))
+
+
+def required_params(url):
+    """Query parameters of url whose original value looks like an identifier the page may need."""
+    return {key for key, value in parse_qsl(urlparse(url).query, keep_blank_values=True)
+            if REQUIRED_VALUE_PATTERN.match(value)}
+
+
+def build_mouseover_payload(marker):
+    """Payload đóng thuộc tính hiện tại và thêm onmouseover="alert('marker')"."""
+    return f'"onmouseover="alert(\'{marker}\')'
+
+
+class HoverProbe:
+    """A mouseover probe of one parameter, owned by module; alert_text is set when a resolved probe hit."""
+
+    def __init__(self, module, param):
+        self.module = module
+        self.param = param
+        self.state = WANTED
+        self.marker = None
+        self.element_tag = None
+        self.alert_text = None
+        self.done = threading.Event()
+
+    @property
+    def payload(self):
+        return build_mouseover_payload(self.marker)
+
+
+class ProbePlanner:
+    """Thread-safe registry of mouseover probes that reflected navigations may carry."""
+
+    def __init__(self, wait_timeout=CLAIM_WAIT_TIMEOUT):
+        self.wait_timeout = wait_timeout
+        self.merged = 0 # Probe mouseover được trả lời bởi navigation của script khác
+        self._probes = {} # (target_key, module) -> {param: HoverProbe}
+        self._lock = threading.Lock()
+
+    def expect(self, target_key, module, params):
+        """Registers that module will probe params of target_key."""
+        with self._lock:
+            probes = self._probes.setdefault((target_key, module), {})
+            for param in params:
+                probes.setdefault(param, HoverProbe(module, param))
+
+    def claim(self, target_key, exclude=()):
+        """Claims at most one wanted probe per parameter of target_key not in exclude, each with a fresh marker."""
+        claimed = {}
+        with self._lock:
+            for (key, _), probes in self._probes.items():
+                if key != target_key:
+                    continue
+                for param, probe in probes.items():
+                    if probe.state == WANTED and param not in exclude and param not in claimed:
+                        probe.state = CLAIMED
+                        probe.marker = make_marker()
+                        probe.done.clear()
+                        claimed[param] = probe
+        return list(claimed.values())
+
+    def release(self, probes):
+        """Returns claimed probes unresolved (the navigation carrying them failed)."""
+        with self._lock:
+            for probe in probes:
+                probe.state = WANTED
+                probe.done.set()
+
+    def resolve(self, driver, probes, expected_url):
+        """
+        Hovers the elements carrying the probes' markers on the current page and
+        records each outcome. Only probes whose marker the page reflects are
+        resolved; the others are released. Returns False if the page reflected
+        none of them (broken or error page), True otherwise.
+        """
+        if not probes:
+            return True
+        if urlparse(driver.current_url)[:3] != urlparse(expected_url)[:3]:
+            self.release(probes) # Payload đã điều hướng trang đi nơi khác
+            return False
+        by_marker = {probe.marker: probe for probe in probes}
+        try:
+            scan = driver.execute_script(MARKER_SCAN_SCRIPT, list(by_marker))
+        except Exception:
+            scan = {"broken": True}
+        present = set(scan.get("present") or [])
+        if scan.get("broken") or not present:
+            self.release(probes)
+            return False
+        # Marker không có trong trang: không kết luận âm tính, để script mouseover tự thử
+        unresolved = [probe for marker, probe in by_marker.items() if marker not in present]
+        for element, marker in scan.get("matches") or []:
+            try:
+                by_marker[marker].element_tag = element.tag_name
+                with metrics.timed(metrics.INTERACTION):
+                    driver.execute_script("arguments[0].scrollIntoView(true);", element)
+                    time.sleep(HOVER_SCROLL_SLEEP)
+                    ActionChains(driver).move_to_element(element).perform()
+            except Exception:
+                unresolved.append(by_marker[marker])
+                continue
+            for captured in alert_hook.wait_for_all_alerts(driver, alert_hook.BACKEND_HOOK, HOVER_ALERT_TIMEOUT):
+                # Marker trong alert (chứ không phải của phần tử được hover) xác định probe
+                if captured.text in by_marker and by_marker[captured.text].alert_text is None:
+                    by_marker[captured.text].alert_text = captured.text
+        self.release(unresolved)
+        with self._lock:
+            for probe in probes:
+                if probe not in unresolved:
+                    probe.state = RESOLVED
+                    self.merged += 1
+                    probe.done.set()
+        return True
+
+    def take(self, target_key, module, params):
+        """
+        Stops further claims for module's probes of target_key and returns
+        {param: HoverProbe} for those resolved by other navigations (waiting up to
+        wait_timeout for claims in flight).
+        """
+        with self._lock:
+            probes = self._probes.pop((target_key, module), {})
+        resolved = {}
+        for param in params:
+            probe = probes.get(param)
+            if probe is None or probe.state == WANTED:
+                continue
+            if probe.state == CLAIMED:
+                probe.done.wait(self.wait_timeout)
+            if probe.state == RESOLVED:
+                resolved[param] = probe
+        return resolved
@@ -0,0 +1,73 @@
+"""
+Cheap HTTP pre-pass for reflected probes.
+
+Each query parameter gets a unique canary value. The parameter is passed on to
+the browser stage only if the canary comes back in the raw response.
+"""
+import random
+import string
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse
+
+from xss_harness.http_session import get_shared_session, REQUEST_TIMEOUT
+
+CANARY_PREFIX = "xsscanary"
+CANARY_LENGTH = 10
+MAX_CONCURRENT_REQUESTS = 8
+
+
+@dataclass
+class ReflectionProbe:
+    param: str
+    canary: str
+    status: Optional[int] = None
+    body: str = ""
+    error: Optional[str] = None
+
+    @property
+    def reflected(self):
+        # Lỗi mạng -> không kết luận được, vẫn để browser kiểm tra
+        return self.error is not None or self.canary.lower() in self.body.lower()
+
+
+def make_canary():
+    """A random lowercase alphanumeric marker that survives most filters unchanged."""
+    chars = string.ascii_lowercase + string.digits
+    return CANARY_PREFIX + ''.join(random.choice(chars) for _ in range(CANARY_LENGTH))
+
+
+def replace_query_params(url, values):
+    """Returns url with each parameter in values ({name: value}) set to its value (other parameters are kept)."""
+    parsed = urlparse(url)
+    qlist = [(k, v) for k, v in parse_qsl(parsed.query, keep_blank_values=True) if k not in values]
+    qlist.extend(values.items())
+    return urlunparse(parsed._replace(query=urlencode(qlist)))
+
+
+def replace_query_param(url, param_name, value):
+    """Returns url with param_name set to value (other parameters are kept)."""
+    return replace_query_params(url, {param_name: value})
+
+
+def probe_param(session, target_url, param, timeout=REQUEST_TIMEOUT):
+    """Sends one canary request for param and returns the ReflectionProbe."""
+    probe = ReflectionProbe(param=param, canary=make_canary())
+    try:
+        response = session.get(replace_query_param(target_url, param, probe.canary), timeout=timeout)
+        probe.status = response.status_code
+        probe.body = response.text
+    except Exception as e:
+        probe.error = str(e)
+    return probe
+
+
+def probe_reflections(target_url, param_names, session=None, timeout=REQUEST_TIMEOUT):
+    """Probes every parameter concurrently and returns {param: ReflectionProbe}."""
+    session = session or get_shared_session()
+    if not param_names:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_REQUESTS, len(param_names))) as executor:
+        probes = executor.map(lambda param: probe_param(session, target_url, param, timeout), param_names)
+        return {probe.param: probe for probe in probes}
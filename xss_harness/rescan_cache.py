@@ -0,0 +1,118 @@
+"""
+Persistent cross-run cache of probe outcomes, for cheap nightly re-scans.
+
+Each outcome is keyed on the normalized endpoint URL, the module, the parameter
+or field, a hash of the payload and a fingerprint of what the probe was run
+against:
+
+* GET parameters - the HTTP response to a canary value with the canary removed
+  (``response_fingerprint``), i.e. the template the parameter is reflected in;
+* stored-XSS fields - the structure of the POST form (``form_fingerprint``).
+
+A probe whose last outcome was negative for the same fingerprint is skipped;
+when the fingerprint drifts (the page or form changed) it is tested again.
+Positive outcomes are never skipped, so findings are re-confirmed every run.
+Outcomes live in an SQLite database (WAL mode) shared by all workers.
+
+    python run_all_tests.py -u "https://target.example/?q=1" --rescan-cache
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse, parse_qsl
+
+from xss_harness.cache_dir import get_cache_dir
+
+DEFAULT_DB_FILENAME = "rescan.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outcomes (
+    endpoint     TEXT NOT NULL,
+    module       TEXT NOT NULL,
+    location     TEXT NOT NULL,
+    payload_hash TEXT NOT NULL,
+    fingerprint  TEXT NOT NULL,
+    alert_text   TEXT,
+    tested_at    REAL NOT NULL,
+    PRIMARY KEY (endpoint, module, location, payload_hash)
+)
+"""
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def default_db_path():
+    return str(get_cache_dir("rescan") / DEFAULT_DB_FILENAME)
+
+
+def normalize_url(url):
+    """scheme://host[:port]/path?sorted-param-names - parameter values and fragments do not identify an endpoint."""
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or "").lower()
+    default_port = {"http": 80, "https": 443}.get(scheme)
+    netloc = host if parsed.port in (None, default_port) else f"{host}:{parsed.port}"
+    names = sorted({key for key, _ in parse_qsl(parsed.query, keep_blank_values=True)})
+    return f"{scheme}://{netloc}{parsed.path or '/'}" + (f"?{'&'.join(names)}" if names else "")
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def payload_hash(payload):
+    return _digest(payload)
+
+
+def response_fingerprint(body, canary):
+    """Hash of a canary response with the canary removed (and whitespace collapsed)."""
+    template = re.sub(re.escape(canary), "", body, flags=re.IGNORECASE)
+    return _digest(_WHITESPACE.sub(" ", template))
+
+
+def form_fingerprint(form):
+    """Hash of a serialized form's action, method and field names/types (values such as CSRF tokens are ignored)."""
+    fields = sorted((f["name"], f.get("tag", ""), f.get("type", "")) for f in form.get("fields", []))
+    return _digest(json.dumps([form.get("action", ""), form.get("method", ""), fields]))
+
+
+class RescanCache:
+    """Thread-safe store of probe outcomes (one SQLite connection guarded by a lock)."""
+
+    def __init__(self, path=None):
+        self.path = path or default_db_path()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL") # Mất vài kết quả cuối khi mất điện chỉ làm chúng bị test lại
+        self._conn.execute(SCHEMA)
+        self._conn.commit()
+        self.skipped = 0
+
+    def is_known_negative(self, url, module, location, payload, fingerprint):
+        """True if the last run of this probe against the same fingerprint found nothing."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT fingerprint, alert_text FROM outcomes"
+                " WHERE endpoint = ? AND module = ? AND location = ? AND payload_hash = ?",
+                (normalize_url(url), module, location, payload_hash(payload)),
+            ).fetchone()
+            known = row is not None and row[0] == fingerprint and row[1] is None
+            if known:
+                self.skipped += 1
+            return known
+
+    def record(self, url, module, location, payload, fingerprint, alert_text=None):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO outcomes VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (normalize_url(url), module, location, payload_hash(payload), fingerprint, alert_text, time.time()),
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
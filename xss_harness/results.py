@@ -0,0 +1,116 @@
+"""
+Typed scan results and the JSONL result stream.
+
+Scripts report each confirmed finding with ``ScanContext.report_finding``; the
+runner adds one ModuleResult per (target, module) job. Both go to a
+ResultStream, which appends them as JSON lines (``{"type": "finding", ...}`` /
+``{"type": "result", ...}``) to an optional file and keeps them in memory for
+the end-of-run summary.
+"""
+import json
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+
+@dataclass
+class Finding:
+    module: str
+    target: str
+    location: str                     # Tham số GET hoặc trường form
+    payload: str
+    marker: Optional[str] = None      # Marker ngẫu nhiên dùng để quy alert về vị trí
+    alert_text: Optional[str] = None
+    elapsed: Optional[float] = None   # Giây kể từ lúc module bắt đầu
+    browser: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+
+
+@dataclass
+class ModuleResult:
+    module: str
+    target: str
+    success: bool
+    message: str
+    elapsed: float
+    findings: int = 0
+    browser: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+
+
+def _job(record):
+    return (record.module, record.target, record.browser)
+
+
+class ResultStream:
+    """Thread-safe JSONL writer for Finding / ModuleResult records."""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.findings = []
+        self.results = []
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8") if path else None
+
+    def _write(self, record_type, record):
+        if self._file is None:
+            return
+        self._file.write(json.dumps({"type": record_type, **asdict(record)}, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def add_finding(self, finding):
+        with self._lock:
+            self.findings.append(finding)
+            self._write("finding", finding)
+
+    def add_result(self, result):
+        with self._lock:
+            result.findings = sum(1 for f in self.findings if _job(f) == _job(result))
+            self.results.append(result)
+            self._write("result", result)
+
+    def findings_for(self, module, target, browser=None):
+        with self._lock:
+            return [f for f in self.findings if _job(f) == (module, target, browser)]
+
+    def summary_lines(self):
+        """End-of-run summary, grouped by target when there is more than one."""
+        with self._lock:
+            results = list(self.results)
+            findings = list(self.findings)
+        targets = sorted({r.target for r in results})
+        several_browsers = len({r.browser for r in results}) > 1
+        lines = []
+        for target in targets:
+            if len(targets) > 1:
+                lines.append(f"[{target}]")
+            for r in sorted((r for r in results if r.target == target), key=lambda r: (r.module, r.browser or "")):
+                name = f"{r.module} [{r.browser}]" if several_browsers else r.module
+                lines.append(f"- {name}: {'PASS' if r.success else 'FAIL'} ({r.message}) [{r.elapsed:.1f}s]")
+                for f in findings:
+                    if _job(f) == _job(r):
+                        lines.append(f"    finding: {f.location} <- {f.payload!r}"
+                                     f" (alert {f.alert_text!r}{f', {f.elapsed:.1f}s' if f.elapsed is not None else ''})")
+        return lines
+
+    def matrix_lines(self, browsers):
+        """One row per (target, module) and one PASS/FAIL column per browser ('-' = not run)."""
+        with self._lock:
+            cells = {(r.target, r.module, r.browser): r.success for r in self.results}
+        rows = sorted({(target, module) for target, module, _ in cells})
+        width = max([len("target / module")] + [len(f"{t} / {m}") for t, m in rows])
+        lines = ["target / module".ljust(width) + "".join(f"  {b:>8}" for b in browsers)]
+        for target, module in rows:
+            marks = []
+            for b in browsers:
+                success = cells.get((target, module, b))
+                marks.append("-" if success is None else "PASS" if success else "FAIL")
+            lines.append(f"{target} / {module}".ljust(width) + "".join(f"  {m:>8}" for m in marks))
+        return lines
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,105 @@
+"""
+Form submission engines for the stored-XSS scripts.
+
+``browser`` (the default) POSTs with fetch() from the page the driver is on.
+``http`` sends the same form body with a pooled requests.Session that carries
+the browser's cookies and User-Agent. The browser is then only needed to render
+the page and trigger the payload, and several POSTs can be in flight at once.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import requests
+
+from xss_harness import metrics
+from xss_harness.http_session import copy_browser_state, new_session
+
+SUBMIT_BROWSER = "browser"
+SUBMIT_HTTP = "http"
+SUBMIT_ENGINES = (SUBMIT_BROWSER, SUBMIT_HTTP)
+
+POST_TIMEOUT = 15 # Thời gian tối đa chờ fetch POST hoàn tất (giây)
+MAX_CONCURRENT_POSTS = 8
+
+# Gửi POST từ trang hiện tại (cùng cookie/origin với browser) và chỉ trả về khi
+# promise của fetch đã settle. URL và body đi qua arguments nên không cần escape.
+FETCH_POST_SCRIPT = """
+var url = arguments[0], body = arguments[1], done = arguments[arguments.length - 1];
+fetch(url, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
+    body: body,
+    credentials: 'same-origin'
+})
+.then(function (response) {
+    return response.text().then(function (text) {
+        done({ status: response.status, error: null, preview: String(text).substring(0, 100) });
+    });
+})
+.catch(function (error) { done({ status: null, error: String(error), preview: '' }); });
+"""
+
+
+def post_form_via_fetch(driver, action_url, post_data, timeout=POST_TIMEOUT):
+    """
+    POSTs post_data (x-www-form-urlencoded) to action_url with fetch() inside the browser.
+
+    Returns a dict with the HTTP ``status`` (None on network error), ``error``,
+    the first 100 characters of the response (``preview``) and ``elapsed`` seconds.
+    """
+    # Driver thuộc pool: trả lại script timeout cũ để các script sau không thừa hưởng timeout của POST
+    previous_timeout = driver.timeouts.script
+    driver.set_script_timeout(timeout)
+    started = time.monotonic()
+    try:
+        with metrics.timed(metrics.POST):
+            result = driver.execute_async_script(FETCH_POST_SCRIPT, action_url, urlencode(post_data)) or {}
+    finally:
+        driver.set_script_timeout(previous_timeout)
+    result["elapsed"] = time.monotonic() - started
+    return result
+
+
+def post_form_via_http(session, action_url, post_data, timeout=POST_TIMEOUT):
+    """Same as post_form_via_fetch, but sent by session instead of the browser."""
+    started = time.monotonic()
+    try:
+        with metrics.timed(metrics.POST):
+            response = session.post(action_url, data=post_data, timeout=timeout)
+    except requests.RequestException as e:
+        return {"status": None, "error": str(e), "preview": "", "elapsed": time.monotonic() - started}
+    return {"status": response.status_code, "error": None, "preview": response.text[:100],
+            "elapsed": time.monotonic() - started}
+
+
+def open_submit_session(driver, engine=SUBMIT_BROWSER):
+    """
+    Returns a pooled session carrying driver's cookies for the http engine, or
+    None for the browser engine. Call it while driver is on the target origin.
+    """
+    if engine != SUBMIT_HTTP:
+        return None
+    return copy_browser_state(new_session(), driver)
+
+
+def submit_form(driver, action_url, post_data, session=None, timeout=POST_TIMEOUT):
+    """POSTs post_data over HTTP if session is set (see open_submit_session), otherwise through the browser."""
+    if session is not None:
+        return post_form_via_http(session, action_url, post_data, timeout)
+    return post_form_via_fetch(driver, action_url, post_data, timeout)
+
+
+def submit_forms_concurrently(session, action_url, post_data_list, timeout=POST_TIMEOUT,
+                              max_workers=MAX_CONCURRENT_POSTS):
+    """POSTs every body in post_data_list in parallel over session; results keep the input order."""
+    if not post_data_list:
+        return []
+    binding = metrics.current()
+
+    def post(post_data):
+        with metrics.bound(binding):
+            return post_form_via_http(session, action_url, post_data, timeout)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(post_data_list))) as executor:
+        return list(executor.map(post, post_data_list))
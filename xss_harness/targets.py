@@ -0,0 +1,65 @@
+"""
+Scan target input: one URL per line, or JSONL objects with method/url/body.
+
+Targets are streamed so a list of thousands of endpoints is never held in
+memory at once. Blank lines and lines starting with '#' are skipped. A POST
+target's form-encoded body is the form the stored-XSS scripts submit; scripts
+that only send GET probes report it as not applicable (xss_harness.plugins).
+"""
+import json
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlparse
+
+
+@dataclass(frozen=True)
+class ScanTarget:
+    url: str
+    method: str = "GET"
+    body: Optional[str] = None # Body gốc của request (POST), nếu có
+
+    @property
+    def key(self):
+        """Name used to key results: the URL, prefixed with the method unless it is GET."""
+        return self.url if self.method == "GET" else f"{self.method} {self.url}"
+
+
+def _check_url(url):
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.netloc:
+        raise ValueError(f"not an http(s) URL: {url!r}")
+    return url
+
+
+def parse_target_line(line):
+    """Parses one input line into a ScanTarget (None for blank/comment lines). Raises ValueError if invalid."""
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    if not line.startswith("{"):
+        return ScanTarget(url=_check_url(line))
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"invalid JSON: {e}")
+    url = record.get("url") if isinstance(record, dict) else None
+    if not url:
+        raise ValueError("JSON target has no 'url'")
+    _check_url(url)
+    body = record.get("body")
+    if body is not None and not isinstance(body, str):
+        body = json.dumps(body)
+    return ScanTarget(url=url, method=str(record.get("method") or "GET").upper(), body=body)
+
+
+def iter_targets(path):
+    """Yields the ScanTargets in path one by one, skipping (with a warning) lines that cannot be parsed."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            try:
+                target = parse_target_line(line)
+            except ValueError as e:
+                print(f"WARNING: Skipping target on line {line_number} of {path}: {e}")
+                continue
+            if target is not None:
+                yield target
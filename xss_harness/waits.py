@@ -0,0 +1,27 @@
+from selenium.common.exceptions import NoAlertPresentException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from xss_harness import metrics
+
+DOCUMENT_READY_TIMEOUT = 10
+
+
+def document_is_ready(driver):
+    """
+    Expected condition: the current document has finished loading.
+
+    An open alert counts as ready: the page is blocked on it, and running a script
+    now would make the driver dismiss the very alert the test is waiting for.
+    """
+    try:
+        driver.switch_to.alert
+        return True
+    except NoAlertPresentException:
+        pass
+    return driver.execute_script("return document.readyState") == "complete"
+
+
+def wait_for_document_ready(driver, timeout=DOCUMENT_READY_TIMEOUT):
+    """Blocks until document.readyState is 'complete' (raises TimeoutException otherwise)."""
+    with metrics.timed(metrics.DOM_WAIT):
+        WebDriverWait(driver, timeout).until(document_is_ready)